@@ -1 +1,23 @@
-from .agent import Agent
+import importlib
+
+# Imported on first use, so the sync CLI doesn't pay for AsyncAgent (httpx)
+_EXPORTS = {
+    "Agent": (".agent", "Agent"),
+    "AsyncAgent": (".async_agent", "AsyncAgent"),
+    "TrajectoryRecorder": (".trajectory", "TrajectoryRecorder"),
+    "TrajectoryReplayer": (".trajectory", "TrajectoryReplayer"),
+    "LoopDetector": (".loop_detector", "LoopDetector"),
+    "ToolRegistry": (".tools", "ToolRegistry"),
+    "WAYFAIR_TOOLS": (".tools", "WAYFAIR_TOOLS"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
@@ -1,20 +1,32 @@
 from computers import Computer
 from utils import (
     create_response,
+    stream_response,
     show_image,
-    pp,
-    sanitize_message,
     check_blocklisted_url,
 )
 import json
+import time
+from collections import Counter
 from typing import Callable
+from steps import run_sync, steps
+from telemetry import TELEMETRY
+from debug_log import LOGGER, LazyJson, ensure_debug_logging
+from .coalesce import PlannedAction, plan_actions
+from .loop_detector import LoopDetector, LoopEvent, StuckLoopError, loop_message
+from .tools import COMPUTER_METHOD_TOOLS, ToolRegistry, method_result
 
 
+@run_sync
 class Agent:
     """
     A sample agent class that can be used to interact with a computer.
 
     (See simple_cua_loop.py for a simple example without an agent.)
+
+    The turn loop and item handling are `@steps` (see `steps.py`) that yield
+    every computer, tool and model call, so `AsyncAgent` runs the same bodies
+    with an async computer and client.
     """
 
     def __init__(
@@ -23,14 +35,36 @@ class Agent:
         computer: Computer = None,
         tools: list[dict] = [],
         acknowledge_safety_check_callback: Callable = lambda: False,
+        recorder=None,
+        stream: bool = False,
+        registry: ToolRegistry | None = None,
+        coalesce: bool = True,
+        loop_detector: LoopDetector | None = None,
     ):
         self.model = model
         self.computer = computer
-        self.tools = tools
+        self.tools = list(tools)  # don't mutate the caller's (or the default) list
         self.print_steps = True
         self.debug = False
         self.show_images = False
         self.acknowledge_safety_check_callback = acknowledge_safety_check_callback
+        self.recorder = recorder  # optional TrajectoryRecorder
+        self.stream = stream  # dispatch actions while the response is still streaming
+        self.first_action_ms: list[float] = []  # model request -> first action starts
+        self.first_action_at: float | None = None  # time.monotonic() of the session's first action
+        self._first_action_pending = False
+        self._debug_logged = 0  # history items already written to the debug log
+        self._page_perf: list[dict] = []  # this turn's page timing snapshots, for the recorder
+        self._step_info: dict[str, dict] = {}  # call_id -> URL after the step, coalescing, for the recorder
+        self.coalesce = coalesce  # merge bursts of computer_calls (see coalesce.py); not when streaming
+        self.coalesce_stats = Counter()  # coalesced calls, quick captures
+        self._action_plan: dict[str, PlannedAction] = {}
+        self._last_screenshot: tuple[str, str] | None = None  # (base64, mime)
+        self.loop_detector = loop_detector  # no-progress cycles (see loop_detector.py)
+        self._loop_event: LoopEvent | None = None
+        self.registry = registry  # local function tools with real results
+        if registry:
+            self.tools += registry.schemas()
 
         if computer:
             self.tools += [
@@ -41,11 +75,38 @@ class Agent:
                     "environment": computer.environment,
                 },
             ]
+            self.tools += [
+                tool for tool in COMPUTER_METHOD_TOOLS if hasattr(computer, tool["name"])
+            ]
 
     def debug_print(self, *args):
         if self.debug:
-            pp(*args)
+            ensure_debug_logging()
+            LOGGER.debug("%s", LazyJson(args[0] if len(args) == 1 else args))
+
+    def _debug_log_input(self, history: list) -> None:
+        """Log only the items added since the last logged turn (not the whole history)."""
+        if not self.debug:
+            return
+        if self._debug_logged > len(history):  # a different conversation
+            self._debug_logged = 0
+        ensure_debug_logging()
+        LOGGER.debug(
+            "input +%d items:\n%s",
+            len(history) - self._debug_logged,
+            LazyJson(history[self._debug_logged :]),
+        )
+        self._debug_logged = len(history)
+
+    def _debug_log_response(self, response: dict) -> None:
+        if not self.debug:
+            return
+        ensure_debug_logging()
+        LOGGER.debug("response:\n%s", LazyJson(response))
+        # the output items come back as input next turn; don't log them twice
+        self._debug_logged += len(response.get("output", []))
 
+    @steps
     def handle_item(self, item):
         """Handle each item; may cause a computer action + screenshot."""
         if item["type"] == "message":
@@ -57,59 +118,218 @@ class Agent:
             if self.print_steps:
                 print(f"{name}({args})")
 
-            if hasattr(self.computer, name):  # if function exists on computer, call it
-                method = getattr(self.computer, name)
-                method(**args)
-            return [
-                {
-                    "type": "function_call_output",
-                    "call_id": item["call_id"],
-                    "output": "success",  # hard-coded output for demo
-                }
-            ]
+            TELEMETRY.count("function_calls", name=name)
+            with TELEMETRY.span("agent.function_call", labels={"name": name}) as span:
+                if self.registry and name in self.registry:
+                    result = yield self._call_tool(name, args)
+                elif hasattr(self.computer, name):  # if function exists on computer, call it
+                    try:
+                        value = yield getattr(self.computer, name)(**args)
+                        result = method_result(value, (yield self._current_url()))
+                    except Exception as e:
+                        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                else:
+                    result = {"ok": False, "error": f"unknown function {name}"}
+                if isinstance(result, dict) and not result.get("ok", True):
+                    span.set(ok=False, error=result.get("error"))
+            yield self._collect_page_perf(item, name)
+            return [self._function_call_output(item, result)]
 
         if item["type"] == "computer_call":
-            action = item["action"]
-            action_type = action["type"]
-            action_args = {k: v for k, v in action.items() if k != "type"}
-            if self.print_steps:
-                print(f"{action_type}({action_args})")
-
-            method = getattr(self.computer, action_type)
-            method(**action_args)
-
-            screenshot_base64 = self.computer.screenshot()
-            if self.show_images:
-                show_image(screenshot_base64)
-
-            # if user doesn't ack all safety checks exit with error
-            pending_checks = item.get("pending_safety_checks", [])
-            for check in pending_checks:
-                message = check["message"]
-                if not self.acknowledge_safety_check_callback(message):
-                    raise ValueError(
-                        f"Safety check failed: {message}. Cannot continue with unacknowledged safety checks."
-                    )
-
-            call_output = {
-                "type": "computer_call_output",
-                "call_id": item["call_id"],
-                "acknowledged_safety_checks": pending_checks,
-                "output": {
-                    "type": "input_image",
-                    "image_url": f"data:image/png;base64,{screenshot_base64}",
-                },
-            }
+            planned = self._action_plan.pop(item["call_id"], None)
+            if planned and planned.action is None:
+                self._step_info[item["call_id"]] = {"coalesced": True}  # not run, nothing to check on replay
+                # merged into a later call of this burst: nothing to run, the
+                # model only needs an output for the call_id
+                TELEMETRY.count("actions_coalesced", type=item["action"]["type"])
+                self.coalesce_stats["coalesced"] += 1
+                if self.print_steps:
+                    print(f"[coalesced] {item['action']['type']}")
+                if self._last_screenshot is None:
+                    self._last_screenshot = ((yield self.computer.screenshot()), "image/png")
+                screenshot_base64, mime = self._last_screenshot
+            else:
+                action = planned.action if planned else item["action"]
+                if action != item["action"]:
+                    self._step_info[item["call_id"]] = {"action": action}  # what actually ran
+                action_type = action["type"]
+                action_args = {k: v for k, v in action.items() if k != "type"}
+                if self.print_steps:
+                    print(f"{action_type}({action_args})")
+
+                method = getattr(self.computer, action_type)
+                TELEMETRY.count("actions", type=action_type)
+                with TELEMETRY.span("computer.action", labels={"type": action_type}):
+                    yield method(**action_args)
+
+                # let the page finish rendering so the model doesn't see a half-drawn frame
+                if action_type not in ("screenshot", "wait") and getattr(
+                    self.computer, "settle_after_actions", False
+                ):
+                    with TELEMETRY.span("computer.settle"):
+                        yield self.computer.settle()
+                yield self._collect_page_perf(item, action_type)
+
+                quick = planned and planned.capture == "quick" and hasattr(self.computer, "quick_screenshot")
+                with TELEMETRY.span("computer.screenshot", quick=bool(quick)) as span:
+                    if quick:
+                        screenshot_base64, mime = (yield self.computer.quick_screenshot()), "image/jpeg"
+                        self.coalesce_stats["quick_captures"] += 1
+                    else:
+                        screenshot_base64, mime = (yield self.computer.screenshot()), "image/png"
+                    _record_screenshot(span, screenshot_base64)
+                self._last_screenshot = (screenshot_base64, mime)
+                if self.show_images:
+                    show_image(screenshot_base64)
+
+            call_output = self._computer_call_output(item, screenshot_base64, mime)
 
             # additional URL safety checks for browser environments
+            current_url = None
             if self.computer.environment == "browser":
-                current_url = self.computer.get_current_url()
+                current_url = yield self.computer.get_current_url()
                 check_blocklisted_url(current_url)
                 call_output["output"]["current_url"] = current_url
 
+            if self.loop_detector and not (planned and planned.action is None):
+                event = self.loop_detector.observe(action, screenshot_base64, current_url)
+                self._loop_event = event or self._loop_event
+
             return [call_output]
         return []
 
+    def _call_tool(self, name: str, args: dict):
+        """Hook: run a registry tool (`AsyncAgent` returns an awaitable)."""
+        return self.registry.call(self.computer, name, args)
+
+    def _create_response(self, request: dict):
+        """Hook: one buffered model call (`AsyncAgent` returns an awaitable)."""
+        return create_response(**request)
+
+    @steps
+    def _current_url(self) -> str | None:
+        if self.computer and self.computer.environment == "browser":
+            return self.computer.get_current_url()
+        return None
+
+    @steps
+    def _loop_intervention(self) -> list[dict]:
+        """Act on a loop found during the turn: items to add to the conversation, or abort."""
+        event, self._loop_event = self._loop_event, None
+        if event is None:
+            return []
+        TELEMETRY.count("loops_detected", policy=event.policy)
+        if self.print_steps:
+            print(f"[loop:{event.policy}] {event.diagnostic()}")
+        if event.policy == "abort":
+            raise StuckLoopError(event.diagnostic())
+        if event.recover_url:
+            yield self.computer.goto(event.recover_url)
+        return [loop_message(event)]
+
+    @steps
+    def _prefetch(self) -> None:
+        """Let the browser warm likely next pages while the model request is in flight."""
+        if not getattr(self.computer, "speculative_prefetch", False):
+            return
+        with TELEMETRY.span("computer.prefetch") as span:
+            urls = yield self.computer.prefetch_visible_links()
+            span.set(urls=len(urls))
+        if urls and self.print_steps:
+            print(f"[prefetch] {len(urls)} links")
+
+    @steps
+    def _collect_page_perf(self, item, action: str) -> None:
+        """Snapshot page timings after an action or function call (see computers/page_perf.py)."""
+        if not getattr(self.computer, "collect_page_perf", False):
+            return
+        with TELEMETRY.span("computer.page_perf") as span:
+            record = yield self.computer.page_perf(action)
+            if record and TELEMETRY.enabled:
+                span.set(**_page_perf_attrs(record))
+        if record:
+            self._page_perf.append({"call_id": item["call_id"], **record})
+
+    def _function_call_output(self, item, result: dict) -> dict:
+        """JSON result; tools that return `images` (data URLs) get a text + images output."""
+        images = result.pop("images", None) if isinstance(result, dict) else None
+        output = json.dumps(result, default=str)
+        if self.print_steps:
+            print(f"  -> {output[:200]}" + (f" (+{len(images)} images)" if images else ""))
+        if images:
+            output = [{"type": "input_text", "text": output}] + [
+                {"type": "input_image", "image_url": image_url} for image_url in images
+            ]
+        return {"type": "function_call_output", "call_id": item["call_id"], "output": output}
+
+    def _computer_call_output(self, item, screenshot_base64: str, mime: str = "image/png") -> dict:
+        """Build the `computer_call_output` for `item`, checking pending safety checks."""
+        # if user doesn't ack all safety checks exit with error
+        pending_checks = item.get("pending_safety_checks", [])
+        for check in pending_checks:
+            message = check["message"]
+            if not self.acknowledge_safety_check_callback(message):
+                raise ValueError(
+                    f"Safety check failed: {message}. Cannot continue with unacknowledged safety checks."
+                )
+
+        return {
+            "type": "computer_call_output",
+            "call_id": item["call_id"],
+            "acknowledged_safety_checks": pending_checks,
+            "output": {
+                "type": "input_image",
+                "image_url": f"data:{mime};base64,{screenshot_base64}",
+            },
+        }
+
+    def first_action_summary(self) -> str:
+        if not self.first_action_ms:
+            return "Time to first action: no samples"
+        import numpy as np
+
+        p50, p95 = np.percentile(self.first_action_ms, [50, 95])
+        mode = "streaming" if self.stream else "buffered"
+        return (
+            f"Time to first action ({mode}): {len(self.first_action_ms)} turns, "
+            f"p50 {p50:.0f}ms, p95 {p95:.0f}ms"
+        )
+
+    @steps
+    def _dispatch(self, item, turn_start: float):
+        """handle_item, noting how long after the request the turn's first action began."""
+        if self._first_action_pending and item["type"] in ("computer_call", "function_call"):
+            now = time.monotonic()
+            self.first_action_ms.append((now - turn_start) * 1000)
+            self._first_action_pending = False
+            if self.first_action_at is None:
+                self.first_action_at = now
+        with TELEMETRY.span("agent.step", labels={"kind": item["type"]}) as span:
+            outputs = yield self.handle_item(item)
+            if (TELEMETRY.enabled or self.recorder) and item["type"] in ("computer_call", "function_call"):
+                url = yield self._current_url()
+                span.set(url=url)
+                self._step_info.setdefault(item["call_id"], {})["url"] = url
+        return outputs
+
+    def _stream_turn(self, request: dict, turn_start: float):
+        """Run one model call in streaming mode; returns (response, call_outputs)."""
+        response, output, call_outputs = {}, [], []
+        for event in stream_response(**request):
+            match event["type"]:
+                case "response.output_item.done":
+                    # each item is complete here, even though the response isn't
+                    output.append(event["item"])
+                    call_outputs += self._dispatch(event["item"], turn_start)
+                case "response.completed" | "response.incomplete" | "response.failed":
+                    response = event["response"]
+                case "error":
+                    response = event
+        if output or "output" in response:
+            response["output"] = output
+        return response, call_outputs
+
+    @steps
     def run_full_turn(
         self, input_items, print_steps=True, debug=False, show_images=False
     ):
@@ -117,26 +337,106 @@ class Agent:
         self.debug = debug
         self.show_images = show_images
         new_items = []
+        if self.loop_detector:
+            self.loop_detector.start_task()
+        if self.recorder:
+            self.recorder.start_run()  # one run per task in the log
 
         # keep looping until we get a final response
         while new_items[-1].get("role") != "assistant" if new_items else True:
-            self.debug_print([sanitize_message(msg) for msg in input_items + new_items])
-
-            response = create_response(
-                model=self.model,
-                input=input_items + new_items,
-                tools=self.tools,
-                reasoning={"summary": "concise"},
-                truncation="auto",
-            )
-            self.debug_print(response)
-
-            if "output" not in response and self.debug:
-                print(response)
-                raise ValueError("No output from model")
-            else:
-                new_items += response["output"]
-                for item in response["output"]:
-                    new_items += self.handle_item(item)
+            self._debug_log_input(input_items + new_items)
+
+            with TELEMETRY.span("agent.turn"):
+                turn_input = input_items + new_items
+                start_url = (yield self._current_url()) if self.recorder else None  # before this turn's steps
+                request = dict(
+                    model=self.model,
+                    input=turn_input,
+                    tools=self.tools,
+                    reasoning={"summary": "concise"},
+                    truncation="auto",
+                )
+                yield self._prefetch()
+                if self.loop_detector:
+                    self.loop_detector.new_turn()
+                turn_start = time.monotonic()
+                self._first_action_pending = True
+                call_outputs = None
+                # with streaming, the model span also covers actions dispatched mid-stream
+                with TELEMETRY.span("model.request", model=self.model, stream=self.stream) as span:
+                    _record_request(span, request)
+                    if self.stream:
+                        response, call_outputs = yield self._stream_turn(request, turn_start)
+                    else:
+                        response = yield self._create_response(request)
+                    _record_usage(span, response)
+                self._debug_log_response(response)
+
+                if "output" not in response and self.debug:
+                    print(response)
+                    raise ValueError("No output from model")
+                else:
+                    new_items += response["output"]
+                    if call_outputs is None:
+                        self._action_plan = plan_actions(response["output"]) if self.coalesce else {}
+                        call_outputs = []
+                        for item in response["output"]:
+                            call_outputs += yield self._dispatch(item, turn_start)
+                    new_items += call_outputs
+                    new_items += yield self._loop_intervention()
+                    if self.recorder:
+                        self.recorder.record_turn(
+                            turn_input, response["output"], call_outputs, (yield self._current_url()),
+                            page_perf=self._page_perf, start_url=start_url, step_info=self._step_info,
+                        )
+                    self._page_perf = []
+                    self._step_info = {}
 
         return new_items
+
+
+def _record_request(span, request: dict) -> None:
+    TELEMETRY.count("model_requests")
+    if TELEMETRY.enabled:  # serializing the whole conversation isn't free
+        request_bytes = len(json.dumps(request))
+        span.set(request_bytes=request_bytes)
+        TELEMETRY.count("model_request_bytes", request_bytes)
+
+
+def _record_usage(span, response: dict) -> None:
+    """Token counts from the response's `usage`, as span attributes and counters."""
+    if not TELEMETRY.enabled:
+        return
+    usage = response.get("usage") or {}
+    tokens = {
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cached_tokens": (usage.get("input_tokens_details") or {}).get("cached_tokens", 0),
+    }
+    span.set(**tokens)
+    if response.get("error"):
+        span.set(error=response["error"].get("type"))
+    for name, value in tokens.items():
+        TELEMETRY.count(f"model_{name}", value)
+
+
+def _record_screenshot(span, screenshot_base64: str) -> None:
+    screenshot_bytes = len(screenshot_base64) * 3 // 4
+    span.set(bytes=screenshot_bytes)
+    TELEMETRY.count("screenshot_bytes", screenshot_bytes)
+
+
+def _page_perf_attrs(record: dict) -> dict:
+    """Navigation and per-action page timings as span attributes (for the run-metrics store)."""
+    navigation = record.get("navigation") or {}
+    since_last = record.get("since_last") or {}
+    return {
+        "url": record["url"],
+        "pattern": record["pattern"],
+        "ttfb_ms": navigation.get("ttfb_ms") if record["new_document"] else None,
+        "load_ms": navigation.get("load_ms") if record["new_document"] else None,
+        "lcp_ms": record.get("lcp_ms"),
+        "cls": record.get("cls"),
+        "inp_ms": since_last.get("inp_ms"),
+        "long_task_ms": since_last.get("long_task_ms"),
+    }
@@ -0,0 +1,48 @@
+import httpx
+from utils import create_response_async, stream_response_async
+from steps import run_async
+from .agent import Agent
+
+
+@run_async
+class AsyncAgent(Agent):
+    """
+    asyncio version of `Agent`, for running many sessions in one event loop.
+
+    Pair it with an async computer (e.g. `AsyncLocalPlaywrightComputer`). Pass a
+    shared `httpx.AsyncClient` to reuse API connections across agents. The
+    turn loop and item handling are `Agent`'s, run as coroutines; only the
+    model and tool calls and the stream reader differ.
+    """
+
+    def __init__(self, *args, client: httpx.AsyncClient | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = client
+
+    def _call_tool(self, name: str, args: dict):
+        return self.registry.call_async(self.computer, name, args)
+
+    def _create_response(self, request: dict):
+        return create_response_async(client=self.client, **request)
+
+    async def _stream_turn(self, request: dict, turn_start: float):
+        """Async `Agent._stream_turn`."""
+        if self.client is None:
+            async with httpx.AsyncClient(timeout=120) as client:
+                return await self._stream_turn_with(client, request, turn_start)
+        return await self._stream_turn_with(self.client, request, turn_start)
+
+    async def _stream_turn_with(self, client, request: dict, turn_start: float):
+        response, output, call_outputs = {}, [], []
+        async for event in stream_response_async(client, **request):
+            match event["type"]:
+                case "response.output_item.done":
+                    output.append(event["item"])
+                    call_outputs += await self._dispatch(event["item"], turn_start)
+                case "response.completed" | "response.incomplete" | "response.failed":
+                    response = event["response"]
+                case "error":
+                    response = event
+        if output or "output" in response:
+            response["output"] = output
+        return response, call_outputs
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+
+# Actions that move the mouse to their own coordinates first
+_POINTER_ACTIONS = ("click", "double_click", "drag")
+
+
+@dataclass
+class PlannedAction:
+    """
+    How to run one `computer_call` of a burst: `action` is what to execute
+    (None when it was merged into a later call) and `capture` is "full" for
+    the last call of the burst, "quick" for executed intermediates and
+    "cached" (the latest screenshot, nothing executed) for merged calls.
+    """
+
+    action: dict | None
+    capture: str = "full"
+
+
+def _merge(first: dict, second: dict) -> dict | None:
+    """One action with the effect of `first` then `second`, or None if they don't combine."""
+    a, b = first["type"], second["type"]
+    if a == "screenshot":
+        return second
+    if a == b == "scroll" and (first["x"], first["y"]) == (second["x"], second["y"]):
+        return {
+            **second,
+            "scroll_x": first["scroll_x"] + second["scroll_x"],
+            "scroll_y": first["scroll_y"] + second["scroll_y"],
+        }
+    if a == b == "wait":
+        return {**second, "ms": first.get("ms", 1000) + second.get("ms", 1000)}
+    if a == "move" and (b == "move" or b in _POINTER_ACTIONS):
+        return second
+    return None
+
+
+def plan_actions(items: list[dict]) -> dict[str, PlannedAction]:
+    """
+    Plan consecutive `computer_call` items of one response (reasoning items in
+    between are ignored): merge scrolls at the same point, collapse waits,
+    drop moves that a later move or click overrides, and mark every call but
+    the last of each burst for a quick capture. Calls with pending safety
+    checks are never merged. Single calls get no entry (run as usual).
+    """
+    plan: dict[str, PlannedAction] = {}
+    burst: list[dict] = []
+
+    def close_burst():
+        if len(burst) > 1:
+            executed = None  # (item, action) still waiting to be run
+            for item in burst:
+                action = item["action"]
+                checked = item.get("pending_safety_checks") or (executed and executed[0].get("pending_safety_checks"))
+                if executed and not checked:
+                    merged = _merge(executed[1], action)
+                    if merged is not None:
+                        plan[executed[0]["call_id"]] = PlannedAction(None, "cached")
+                        action = merged
+                if executed and plan.get(executed[0]["call_id"]) is None:
+                    plan[executed[0]["call_id"]] = PlannedAction(executed[1], "quick")
+                executed = (item, action)
+            plan[executed[0]["call_id"]] = PlannedAction(executed[1], "full")
+        burst.clear()
+
+    for item in items:
+        if item["type"] == "computer_call":
+            burst.append(item)
+        elif item["type"] != "reasoning":
+            close_burst()
+    close_burst()
+    return plan
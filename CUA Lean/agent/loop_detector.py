@@ -0,0 +1,183 @@
+import base64
+from collections import Counter, deque
+from dataclasses import dataclass
+from computers.stability import average_hash, hash_distance
+
+POLICIES = ("hint", "recover", "abort", "escalate")
+
+# Actions that only look at the page: they neither count towards a loop nor end one
+_PASSIVE_ACTIONS = ("screenshot", "wait")
+
+
+class StuckLoopError(RuntimeError):
+    """Raised by the "abort" policy; the message is the diagnostic."""
+
+
+def action_signature(action: dict, grid: int = 16) -> tuple:
+    """An action's type and arguments, coordinates snapped to `grid` px and scrolls to their direction."""
+    signature = [action["type"]]
+    for key, value in sorted(action.items()):
+        if key in ("x", "y"):
+            value = value // grid
+        elif key in ("scroll_x", "scroll_y"):
+            value = (value > 0) - (value < 0)
+        elif key == "path":
+            value = tuple((p["x"] // grid, p["y"] // grid) for p in value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        if key != "type":
+            signature.append((key, value))
+    return tuple(signature)
+
+
+def _describe(action: dict) -> str:
+    args = ", ".join(f"{k}={v}" for k, v in action.items() if k not in ("type", "path"))
+    return f"{action['type']}({args})"
+
+
+@dataclass
+class LoopEvent:
+    policy: str  # what to do about it: hint, recover or abort
+    steps: int  # no-progress steps in a row
+    actions: list[str]  # the repeated actions, described
+    url: str | None
+    turn: int  # model call of the task it was detected in
+    recover_url: str | None = None  # last different page of the task, for "recover"
+
+    def diagnostic(self) -> str:
+        return (
+            f"No visible progress after {self.steps} steps on {self.url} (turn {self.turn}), "
+            f"repeating: {'; '.join(self.actions)}"
+        )
+
+
+class LoopDetector:
+    """
+    Flags no-progress cycles in the computer steps of a task. A step makes no
+    progress when its screenshot is within `max_distance` aHash bits of a
+    state seen in the last `window` steps on the same URL, and its action was
+    already tried from the state it started in. `patience` such steps in a row
+    are a loop.
+
+    The policy decides what happens: "hint" adds a developer message, "recover"
+    also goes back to the task's previous page, "abort" raises StuckLoopError,
+    and "escalate" does each in turn on repeated loops within a task.
+    Turns saved assume a stuck run would otherwise go on until it is killed
+    at `kill_after_turns`: an abort saves the rest, and so does a hint or
+    recovery that is followed by progress.
+    """
+
+    def __init__(
+        self,
+        policy: str = "escalate",
+        window: int = 12,
+        patience: int = 3,
+        max_distance: int = 3,
+        kill_after_turns: int = 50,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown loop policy {policy!r}, expected one of {POLICIES}")
+        self.policy = policy
+        self.window = window
+        self.patience = patience
+        self.max_distance = max_distance
+        self.kill_after_turns = kill_after_turns
+        self.counts = Counter()  # loops, hint, recover, abort, no_progress_steps
+        self.turns_saved = 0
+        self.events: list[LoopEvent] = []
+        self.start_task()
+
+    def start_task(self) -> None:
+        """Forget the previous task's states (call once per user request)."""
+        self._states = deque(maxlen=self.window)  # (url, hash) after each step
+        self._tried = deque(maxlen=self.window)  # (url, hash, signature) of actions taken
+        self._current: tuple | None = None
+        self._urls: list[str] = []  # distinct pages of the task, in order
+        self._stuck: list[str] = []
+        self._loops = 0
+        self._turn = 0
+        self._awaiting: int | None = None  # turn of an intervention not yet followed by progress
+
+    def new_turn(self) -> None:
+        self._turn += 1
+
+    def observe(self, action: dict, screenshot_base64: str, url: str | None) -> LoopEvent | None:
+        """Record one executed step; returns a LoopEvent when it completes a loop."""
+        state = (url, average_hash(base64.b64decode(screenshot_base64)))
+        if url and (not self._urls or self._urls[-1] != url):
+            self._urls.append(url)
+        before, self._current = self._current, state
+        if action["type"] in _PASSIVE_ACTIONS:
+            return None
+
+        signature = action_signature(action)
+        seen = any(self._same(state, s) for s in self._states)
+        tried = before is not None and any(
+            self._same(before, (u, h)) and signature == s for u, h, s in self._tried
+        )
+        if before is not None:
+            self._tried.append((*before, signature))
+        self._states.append(state)
+
+        if not (seen and tried):
+            self._stuck.clear()
+            if self._awaiting is not None:
+                self.turns_saved += max(self.kill_after_turns - self._awaiting, 0)
+                self._awaiting = None
+            return None
+
+        self.counts["no_progress_steps"] += 1
+        self._stuck.append(_describe(action))
+        if len(self._stuck) < self.patience:
+            return None
+        return self._detected(url)
+
+    def _same(self, a: tuple, b: tuple) -> bool:
+        return a[0] == b[0] and hash_distance(a[1], b[1]) <= self.max_distance
+
+    def _detected(self, url: str | None) -> LoopEvent:
+        self._loops += 1
+        policy = self.policy
+        if policy == "escalate":
+            policy = ("hint", "recover", "abort")[min(self._loops, 3) - 1]
+        recover_url = next((u for u in reversed(self._urls) if u != url), None)
+        if policy == "recover" and recover_url is None:
+            policy = "hint"  # nowhere to go back to
+        event = LoopEvent(
+            policy=policy,
+            steps=len(self._stuck),
+            actions=list(dict.fromkeys(self._stuck)),
+            url=url,
+            turn=self._turn,
+            recover_url=recover_url if policy == "recover" else None,
+        )
+        self.counts["loops"] += 1
+        self.counts[policy] += 1
+        if policy == "abort":
+            self.turns_saved += max(self.kill_after_turns - self._turn, 0)
+        else:
+            self._awaiting = self._turn
+        self.events.append(event)
+        self._stuck.clear()
+        return event
+
+    def format(self) -> str:
+        handled = ", ".join(f"{p} {self.counts[p]}" for p in ("hint", "recover", "abort") if self.counts[p])
+        return (
+            f"Loops: {self.counts['loops']} detected ({handled or 'none'}), "
+            f"{self.counts['no_progress_steps']} no-progress steps, "
+            f"~{self.turns_saved} turns saved (vs. a kill at {self.kill_after_turns} turns)"
+        )
+
+
+def loop_message(event: LoopEvent) -> dict:
+    """Developer message telling the model about a hint or recovery."""
+    text = (
+        f"Your last {event.steps} actions ({'; '.join(event.actions)}) did not change the page. "
+        "Do not repeat them."
+    )
+    if event.recover_url:
+        text += f" The browser was sent back to {event.recover_url}; take a screenshot and try another way."
+    else:
+        text += " Try a different element, another page (e.g. a search URL), or going back."
+    return {"role": "developer", "content": text}
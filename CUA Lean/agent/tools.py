@@ -0,0 +1,311 @@
+from urllib.parse import quote_plus, urlparse
+from typing import Callable
+from steps import resolve, resolve_async
+
+WAYFAIR_URL = "https://www.wayfair.com"
+
+
+class ToolRegistry:
+    """
+    Function tools that run locally and return real results to the model.
+
+    A tool is a plain function taking the computer plus the model's arguments
+    and returning a JSON-serializable dict. Exceptions become
+    `{"ok": False, "error": ...}` so the model can recover without a screenshot.
+    Coroutine tools are supported by `AsyncAgent`, and generator tools that
+    yield each page or computer call (see `steps.py`) by both agents.
+    """
+
+    def __init__(self):
+        self._tools: dict[str, tuple[Callable, dict]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __iter__(self):
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def register(self, name: str | None = None, description: str = "", parameters: dict | None = None):
+        """Decorator: `@registry.register(description=..., parameters={...})`."""
+
+        def decorator(func):
+            tool_name = name or func.__name__
+            schema = {
+                "type": "function",
+                "name": tool_name,
+                "description": description or (func.__doc__ or "").strip(),
+                "parameters": parameters or {"type": "object", "properties": {}},
+            }
+            self._tools[tool_name] = (func, schema)
+            return func
+
+        return decorator
+
+    def schemas(self) -> list[dict]:
+        return [schema for _, schema in self._tools.values()]
+
+    def call(self, computer, name: str, args: dict) -> dict:
+        try:
+            return resolve(self._tools[name][0](computer, **args))
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    async def call_async(self, computer, name: str, args: dict) -> dict:
+        try:
+            return await resolve_async(self._tools[name][0](computer, **args))
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def method_result(value, url: str | None = None) -> dict:
+    """Result for a plain computer method called as a function tool (e.g. goto)."""
+    result = {"ok": True}
+    status = getattr(value, "status", None)  # playwright Response from goto/back
+    if status is not None:
+        result["ok"], result["status"] = value.ok, status
+    elif isinstance(value, dict):
+        result.update(value)
+    elif isinstance(value, (str, int, float, bool, list)):
+        result["result"] = value
+    if url is not None:
+        result["url"] = url
+    return result
+
+
+# Schemas for extra Playwright computer methods; `Agent` offers each one
+# whenever its computer has the method.
+EXTRACT_LISTING_TOOL = {
+    "type": "function",
+    "name": "extract_listing",
+    "description": (
+        "Read the products on the current Wayfair search-results or product page as JSON "
+        "(name, price, rating, review_count, shipping, url), plus cards_on_page: how many "
+        "products the page has loaded so far. Much cheaper than scrolling and reading "
+        "screenshots to compare products."
+    ),
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "max_tokens": {"type": "integer", "description": "Cap on the size of the result."},
+            "fresh": {
+                "type": "boolean",
+                "description": "Re-read the page instead of reusing the result of an earlier call "
+                "(set it if the page may have changed on its own, e.g. results still loading).",
+            },
+        },
+        "additionalProperties": False,
+    },
+}
+
+
+OPEN_IN_TABS_TOOL = {
+    "type": "function",
+    "name": "open_in_tabs",
+    "description": (
+        "Open several URLs (e.g. products to compare) in parallel tabs and get back one "
+        "image with a numbered screenshot of each, plus each tab's title and status. "
+        "The current page is left as it was."
+    ),
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "urls": {"type": "array", "items": {"type": "string"}, "description": "Pages to open (up to 6)."},
+            "composite": {
+                "type": "boolean",
+                "description": "One tiled image (default) or a separate image per tab.",
+            },
+        },
+        "additionalProperties": False,
+        "required": ["urls"],
+    },
+}
+
+CAPTURE_PAGE_TOOL = {
+    "type": "function",
+    "name": "capture_page",
+    "description": (
+        "See the whole current page at once instead of scrolling: returns it as "
+        "viewport-sized image tiles from the top, or one downscaled overview."
+    ),
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "max_tiles": {"type": "integer", "description": "Most tiles to return (default 4)."},
+            "overview": {"type": "boolean", "description": "One small image of the whole page instead of tiles."},
+        },
+        "additionalProperties": False,
+    },
+}
+
+COMPUTER_METHOD_TOOLS = [EXTRACT_LISTING_TOOL, OPEN_IN_TABS_TOOL, CAPTURE_PAGE_TOOL]
+
+
+# --- Wayfair composite tools ---
+# Each runs a whole sub-task (type + submit + wait, click + wait, ...) in one call
+# and reports what happened, instead of one screenshot round trip per step.
+# They yield every page and computer call, so they work with `Agent` and
+# `AsyncAgent` alike (see `steps.py`).
+
+WAYFAIR_TOOLS = ToolRegistry()
+
+_SEARCH_INPUT = 'input[type="search"], input[name="keyword"], input[aria-label*="Search" i]'
+_PRODUCT_CARD = '[data-enzyme-id="ProductCard"]'
+_ADD_TO_CART = '[data-enzyme-id="AddToCartButton"], button:has-text("Add to Cart")'
+
+# How long to wait for an action to change the URL: a search or a product
+# click should navigate; a filter may instead update the results in place
+_NAVIGATION_TIMEOUT_MS = 10000
+_FILTER_NAVIGATION_TIMEOUT_MS = 3000
+
+# Click the option `value` in the filter group whose heading matches `name`;
+# returns the available groups/options instead when there is no match.
+_APPLY_FILTER_JS = """
+([name, value]) => {
+  const norm = (s) => (s || '').trim().toLowerCase();
+  const groups = Array.from(document.querySelectorAll('[data-enzyme-id="FilterGroup"], fieldset'));
+  const available = {};
+  for (const group of groups) {
+    const headingEl = group.querySelector('h2, h3, h4, legend, button');
+    const heading = norm(headingEl?.textContent);
+    const options = Array.from(group.querySelectorAll('a, label, button, input[type="checkbox"]'))
+      .filter((el) => el !== headingEl && norm(el.textContent || el.value));
+    available[heading] = options.map((el) => (el.textContent || el.value).trim());
+    if (!heading.includes(norm(name))) continue;
+    const option = options.find((el) => norm(el.textContent || el.value) === norm(value))
+      || options.find((el) => norm(el.textContent || el.value).includes(norm(value)));
+    if (option) {
+      option.click();
+      return {clicked: (option.textContent || option.value).trim(), group: heading};
+    }
+  }
+  return {clicked: null, available};
+}
+"""
+
+
+def _page_state(computer, **extra) -> dict:
+    page = computer.page
+    return {"ok": True, "url": page.url, "title": (yield page.title()), **extra}
+
+
+def _after_navigation(computer, url_before: str, timeout_ms: int = _NAVIGATION_TIMEOUT_MS):
+    """
+    Wait for the URL to change from `url_before` (a navigation or a history
+    update) and the new document to be parsed, then settle. True if it changed.
+    """
+    try:
+        yield computer.page.wait_for_url(
+            lambda url: url != url_before, wait_until="domcontentloaded", timeout=timeout_ms
+        )
+        navigated = True
+    except Exception:  # Playwright's TimeoutError (sync or async API): updated in place, or nothing happened
+        navigated = False
+    if getattr(computer, "settle_after_actions", False):
+        yield computer.settle()
+    return navigated
+
+
+def _result_cards(computer, max_tokens: int = 400) -> dict:
+    listing = yield computer.extract_listing(max_tokens=max_tokens, fresh=True)
+    return {
+        "result_count": listing.get("cards_on_page", listing["count"]),
+        "top_results": listing["items"],
+        "next_page": listing.get("next"),
+    }
+
+
+@WAYFAIR_TOOLS.register(
+    description="Search Wayfair for `query` and return the number of results and the first few (name, price, rating, url).",
+    parameters={
+        "type": "object",
+        "properties": {"query": {"type": "string", "description": "What to search for."}},
+        "additionalProperties": False,
+        "required": ["query"],
+    },
+)
+def search(computer, query: str) -> dict:
+    page = computer.page
+    search_box = page.locator(_SEARCH_INPUT).first
+    if (yield search_box.count()):
+        url_before = page.url
+        yield search_box.fill(query)
+        yield search_box.press("Enter")
+        yield from _after_navigation(computer, url_before)
+    else:
+        base = WAYFAIR_URL
+        if "wayfair" in (urlparse(page.url).hostname or ""):
+            base = f"{urlparse(page.url).scheme}://{urlparse(page.url).netloc}"
+        yield page.goto(f"{base}/keyword.php?keyword={quote_plus(query)}")  # returns once loaded
+        if getattr(computer, "settle_after_actions", False):
+            yield computer.settle()
+    cards = yield from _result_cards(computer)
+    return (yield from _page_state(computer, query=query, **cards))
+
+
+@WAYFAIR_TOOLS.register(
+    description="Open the n-th product (1-based) from the current search results page.",
+    parameters={
+        "type": "object",
+        "properties": {"n": {"type": "integer", "description": "1-based position in the results."}},
+        "additionalProperties": False,
+        "required": ["n"],
+    },
+)
+def open_result(computer, n: int) -> dict:
+    cards = computer.page.locator(_PRODUCT_CARD)
+    count = yield cards.count()
+    if not 1 <= n <= count:
+        return {"ok": False, "error": f"no result {n}; the page has {count} results"}
+    card = cards.nth(n - 1)
+    link = card.locator('[data-enzyme-id="ProductCardLink"], a[href]').first
+    name = yield card.locator('[data-enzyme-id="ProductCardName"]').first.text_content()
+    url_before = computer.page.url
+    yield link.click()
+    if not (yield from _after_navigation(computer, url_before)):
+        return {"ok": False, "error": f"result {n} did not open", "url": computer.page.url}
+    product = (yield computer.extract_listing(fresh=True))["items"]
+    return (
+        yield from _page_state(computer, opened=(name or "").strip(), product=product[0] if product else None)
+    )
+
+
+@WAYFAIR_TOOLS.register(
+    description="Apply a filter on the current results page, e.g. name='Color', value='Blue'. Lists the available filters if there is no match.",
+    parameters={
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "description": "Filter group, e.g. Color or Upholstery Material."},
+            "value": {"type": "string", "description": "Option to select within the group."},
+        },
+        "additionalProperties": False,
+        "required": ["name", "value"],
+    },
+)
+def apply_filter(computer, name: str, value: str) -> dict:
+    page = computer.page
+    url_before = page.url
+    outcome = yield page.evaluate(_APPLY_FILTER_JS, [name, value])
+    if not outcome["clicked"]:
+        return {"ok": False, "error": f"no filter {name}={value}", "available": outcome["available"]}
+    # the click only starts the navigation (if any), so wait for the URL rather than compare it now
+    yield from _after_navigation(computer, url_before, _FILTER_NAVIGATION_TIMEOUT_MS)
+    cards = yield from _result_cards(computer)
+    return (yield from _page_state(computer, applied={outcome["group"]: outcome["clicked"]}, **cards))
+
+
+@WAYFAIR_TOOLS.register(
+    description="Click Add to Cart on the current product page and report the result.",
+    parameters={"type": "object", "properties": {}, "additionalProperties": False},
+)
+def add_to_cart(computer) -> dict:
+    button = computer.page.locator(_ADD_TO_CART).first
+    if not (yield button.count()):
+        return {"ok": False, "error": "no Add to Cart button on this page", "url": computer.page.url}
+    yield button.click()
+    if getattr(computer, "settle_after_actions", False):
+        yield computer.settle()
+    label = ((yield button.text_content()) or "").strip() if (yield button.count()) else ""
+    return (yield from _page_state(computer, button_text=label))
@@ -0,0 +1,276 @@
+import base64
+import gzip
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from urllib.parse import urldefrag
+from computers.stability import average_hash, hash_distance
+
+
+def _screenshot_hash(screenshot_base64: str) -> str:
+    return f"{average_hash(base64.b64decode(screenshot_base64)):016x}"
+
+
+def _last_user_text(input_items) -> str:
+    for item in reversed(input_items):
+        if item.get("role") == "user":
+            content = item.get("content")
+            return content if isinstance(content, str) else json.dumps(content)[:500]
+    return ""
+
+
+class TrajectoryRecorder:
+    """
+    Appends a compact, gzipped JSONL run log. Each run (one task, see
+    `start_run()`) is a "run" header line with a run id, then one "turn" line
+    per model call holding a request summary, the model's output items and the
+    executed steps (action, resulting URL, screenshot aHash). A file can hold
+    many runs; `load_trajectory` picks one. Screenshots are never stored.
+    """
+
+    def __init__(self, path: str, model: str | None = None):
+        self.path = path
+        self.model = model
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self.run_id: str | None = None
+        self._turns = 0
+
+    def start_run(self) -> None:
+        """Begin a new run: the next recorded turn writes its header."""
+        self.run_id = None
+        self._turns = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def record_turn(
+        self, input_items, output, call_outputs, current_url=None, page_perf=None, start_url=None, step_info=None
+    ) -> None:
+        """
+        Log one model call: `output` is response["output"], `call_outputs` what
+        we sent back, `page_perf` the page timing snapshots taken after each step.
+        `start_url` is the page before the turn's first step, and `step_info`
+        holds per call_id the URL after the step and, for coalesced calls,
+        whether it ran (`coalesced`) or the merged `action` that ran instead.
+        """
+        step_info = step_info or {}
+        if self.run_id is None:
+            self.run_id = uuid.uuid4().hex[:12]
+            self.write(
+                {
+                    "type": "run",
+                    "run": self.run_id,
+                    "started_at": time.time(),
+                    "model": self.model,
+                    "task": _last_user_text(input_items),
+                    "start_url": start_url or current_url,
+                }
+            )
+        self._turns += 1
+
+        outputs_by_call = {o.get("call_id"): o for o in call_outputs}
+        steps = []
+        for item in output:
+            if item["type"] not in ("computer_call", "function_call"):
+                continue
+            info = step_info.get(item["call_id"], {})
+            step = {"kind": item["type"], "call_id": item["call_id"], "url": info.get("url", current_url)}
+            if item["type"] == "computer_call":
+                step["action"] = info.get("action", item["action"])
+                if info.get("coalesced"):
+                    step["coalesced"] = True  # merged into a later step; its screenshot is stale
+                    steps.append(step)
+                    continue
+                call_output = outputs_by_call.get(item["call_id"], {}).get("output", {})
+                if isinstance(call_output, dict) and "image_url" in call_output:
+                    step["url"] = info.get("url") or call_output.get("current_url", current_url)
+                    step["screenshot_hash"] = _screenshot_hash(
+                        call_output["image_url"].split(",", 1)[1]
+                    )
+            else:
+                step["name"] = item["name"]
+                step["arguments"] = item["arguments"]
+            steps.append(step)
+
+        self.write(
+            {
+                "type": "turn",
+                "run": self.run_id,
+                "turn": self._turns,
+                "request": {
+                    "input_items": len(input_items),
+                    "last_user": _last_user_text(input_items)[:200],
+                },
+                "output": output,
+                "steps": steps,
+                **({"page_perf": page_perf} if page_perf else {}),
+            }
+        )
+
+
+def load_runs(path: str) -> list[tuple[dict, list[dict]]]:
+    """Every (run header, turn records) in a run log, in the order recorded."""
+    runs = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["type"] == "run":
+                runs.append((record, []))
+            elif record["type"] == "turn":
+                if not runs:
+                    runs.append(({}, []))
+                runs[-1][1].append(record)  # turns follow their own run's header
+    return runs
+
+
+def load_trajectory(path: str, run: str | int = -1) -> tuple[dict, list[dict]]:
+    """
+    Return (run header, turn records) of one run in a run log: `run` is a run
+    id or an index into the file's runs (default: the last one).
+    """
+    runs = load_runs(path)
+    if isinstance(run, str):
+        matches = [r for r in runs if r[0].get("run") == run]
+        if not matches:
+            raise ValueError(f"no run {run!r} in {path}")
+        return matches[0]
+    if not runs:
+        return {}, []
+    return runs[run]
+
+
+@dataclass
+class ReplayResult:
+    total_steps: int
+    matched_steps: int = 0
+    diverged_at: int | None = None  # index of the first step that didn't match
+    reason: str = ""
+    model_used: bool = False
+    items: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.diverged_at is None
+
+
+class TrajectoryReplayer:
+    """
+    Re-executes a recorded trajectory directly on a `Computer`, with no model
+    calls, checking every step against the recorded URL and screenshot hash.
+
+    `check` is "both" (default), "url" or "screenshot". When a step diverges
+    and an `agent` is given, the model takes over from that point; otherwise
+    replay stops and reports where it diverged (for regression runs).
+    Function calls go to `registry` first, then to methods on the computer.
+    """
+
+    def __init__(
+        self, computer, path: str, check: str = "both", hash_threshold: int = 10, registry=None, run: str | int = -1
+    ):
+        self.computer = computer
+        self.registry = registry
+        self.header, self.turns = load_trajectory(path, run)
+        self.check = check
+        self.hash_threshold = hash_threshold
+        self._observed_url: str | None = None  # after the last step that ran
+
+    @property
+    def steps(self) -> list[dict]:
+        return [step for turn in self.turns for step in turn["steps"]]
+
+    def replay(self, agent=None, input_items=None, **turn_kwargs) -> ReplayResult:
+        steps = self.steps
+        result = ReplayResult(total_steps=len(steps))
+        done = []
+        for index, step in enumerate(steps):
+            reason = self._run_step(step)
+            if reason:
+                result.diverged_at, result.reason = index, reason
+                break
+            if not step.get("coalesced"):
+                done.append(step)
+            result.matched_steps += 1
+
+        if result.ok:
+            # whole trajectory matched: reuse the recorded final answer
+            result.items = [
+                item for item in self.turns[-1]["output"] if item["type"] == "message"
+            ] if self.turns else []
+            return result
+
+        if agent is not None:
+            diverged = steps[result.diverged_at]
+            summary = "These actions were already performed from a recorded run: " + (
+                "; ".join(_describe_step(s) for s in done) or "none"
+            )
+            if self._observed_url is not None:  # the diverging step ran too
+                summary += (
+                    f". Then {_describe_step(diverged)} ran but did not match the recording "
+                    f"({result.reason}); it left the page at {self._observed_url}"
+                )
+            input_items = list(input_items or [{"role": "user", "content": self.header.get("task", "")}])
+            input_items.append(
+                {
+                    "role": "developer",
+                    "content": summary
+                    + f". The page is now at {self.computer.get_current_url()}. "
+                    "Take a screenshot and continue the task from here.",
+                }
+            )
+            result.items = agent.run_full_turn(input_items, **turn_kwargs)
+            result.model_used = True
+        return result
+
+    def _run_step(self, step) -> str:
+        """Execute one step; return "" if it matched the recording, else why not."""
+        self._observed_url = None
+        if step.get("coalesced"):
+            return ""  # its effect is part of the merged action of a later step
+        if step["kind"] == "computer_call":
+            action = dict(step["action"])
+            action_type = action.pop("type")
+            getattr(self.computer, action_type)(**action)
+            if action_type not in ("screenshot", "wait") and getattr(
+                self.computer, "settle_after_actions", False
+            ):
+                self.computer.settle()
+        elif self.registry and step["name"] in self.registry:
+            result = self.registry.call(self.computer, step["name"], json.loads(step["arguments"]))
+            if not result.get("ok", True):
+                self._observed_url = self.computer.get_current_url()
+                return f"{step['name']} failed: {result.get('error')}"
+        else:
+            if not hasattr(self.computer, step["name"]):
+                return f"unknown function {step['name']}"
+            getattr(self.computer, step["name"])(**json.loads(step["arguments"]))
+
+        url = self._observed_url = self.computer.get_current_url()
+        if self.check in ("both", "url") and step.get("url"):
+            if urldefrag(url).url != urldefrag(step["url"]).url:
+                return f"url {url} != recorded {step['url']}"
+        if self.check in ("both", "screenshot") and step.get("screenshot_hash"):
+            distance = hash_distance(
+                int(_screenshot_hash(self.computer.screenshot()), 16),
+                int(step["screenshot_hash"], 16),
+            )
+            if distance > self.hash_threshold:
+                return f"screenshot differs by {distance} bits"
+        return ""
+
+
+def _describe_step(step) -> str:
+    if step["kind"] == "computer_call":
+        action = {k: v for k, v in step["action"].items() if k != "type"}
+        return f"{step['action']['type']}({action})"
+    return f"{step['name']}({step['arguments']})"
@@ -0,0 +1,130 @@
+"""Run many agent sessions concurrently in a single event loop."""
+
+import argparse
+import asyncio
+import time
+import httpx
+from playwright.async_api import async_playwright
+from agent.async_agent import AsyncAgent
+from telemetry import TELEMETRY, configure_telemetry
+from computers import (
+    AsyncBrowserPool,
+    AsyncLocalPlaywrightComputer,
+    AsyncPooledPlaywrightComputer,
+    LAUNCH_PROFILES,
+    get_launch_profile,
+)
+
+
+def make_computer(args, playwright, pool):
+    if pool:
+        return AsyncPooledPlaywrightComputer(pool)
+    return AsyncLocalPlaywrightComputer(
+        playwright=playwright, profile=get_launch_profile(args.profile), start_url=args.start_url
+    )
+
+
+async def run_session(index, task, args, playwright, client, semaphore, pool=None):
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            async with make_computer(args, playwright, pool) as computer:
+                print(f"[session {index}] ready in {(time.monotonic() - start) * 1000:.0f}ms")
+                agent = AsyncAgent(computer=computer, client=client)
+                items = [{"role": "user", "content": task}]
+                output_items = await agent.run_full_turn(items, print_steps=args.verbose)
+                final = output_items[-1] if output_items else {}
+                text = final.get("content", [{}])[0].get("text", "") if final else ""
+                status = "ok"
+        except Exception as e:
+            text, status = str(e), "error"
+        elapsed = time.monotonic() - start
+        print(f"[session {index}] {status} in {elapsed:.1f}s: {text[:200]}")
+        return status, elapsed
+
+
+async def run_sessions(tasks, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        if args.pool:
+            pool = AsyncBrowserPool(
+                browsers=args.browsers,
+                warm_contexts=args.concurrency,
+                start_url=args.start_url,
+                profile=get_launch_profile(args.profile),
+            )
+            async with pool:
+                return await asyncio.gather(
+                    *(
+                        run_session(i, task, args, None, client, semaphore, pool)
+                        for i, task in enumerate(tasks)
+                    )
+                )
+        async with async_playwright() as playwright:
+            return await asyncio.gather(
+                *(
+                    run_session(i, task, args, playwright, client, semaphore)
+                    for i, task in enumerate(tasks)
+                )
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run many agent sessions concurrently in one process."
+    )
+    parser.add_argument("--input", type=str, help="Task given to every session.")
+    parser.add_argument(
+        "--input-file",
+        type=str,
+        help="File with one task per line (one session per line).",
+        default=None,
+    )
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions to run with --input.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max sessions in flight.")
+    parser.add_argument("--start-url", type=str, default="https://www.wayfair.com")
+    parser.add_argument(
+        "--profile",
+        choices=list(LAUNCH_PROFILES),
+        default="container",
+        help="Browser launch profile.",
+    )
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Share warm browsers and give each session a fresh context.",
+    )
+    parser.add_argument("--browsers", type=int, default=1, help="Browsers in the pool.")
+    parser.add_argument("--verbose", action="store_true", help="Print every agent step.")
+    parser.add_argument("--telemetry-jsonl", help="Write spans and counters to this JSONL file.")
+    parser.add_argument("--trace", help="Write a Chrome trace (one track per session) to this file.")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port.")
+    parser.add_argument("--metrics-store", help="Append step-level rows to this Parquet dataset (see report.py).")
+    args = parser.parse_args()
+
+    if args.input_file:
+        with open(args.input_file) as f:
+            tasks = [line.strip() for line in f if line.strip()]
+    elif args.input:
+        tasks = [args.input] * args.sessions
+    else:
+        parser.error("one of --input or --input-file is required")
+
+    configure_telemetry(
+        args.telemetry_jsonl, args.trace, args.metrics_port, args.metrics_store, source="async_driver"
+    )
+    start = time.monotonic()
+    try:
+        results = asyncio.run(run_sessions(tasks, args))
+    finally:
+        TELEMETRY.close()
+    ok = sum(1 for status, _ in results if status == "ok")
+    print(
+        f"{ok}/{len(results)} sessions ok in {time.monotonic() - start:.1f}s "
+        f"(concurrency {args.concurrency})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark blocklist lookups: the old linear scan vs DomainBlocklist (cold and cached)."""
+
+import argparse
+import random
+import string
+import time
+from urllib.parse import urlparse
+from blocklist import DomainBlocklist
+
+
+def random_domain(rng):
+    label = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+    return f"{label}.{rng.choice(['com', 'net', 'io', 'co.uk'])}"
+
+
+def linear_is_blocked(url, domains):
+    """The original check_blocklisted_url logic, returning a bool."""
+    hostname = urlparse(url).hostname or ""
+    return any(hostname == d or hostname.endswith(f".{d}") for d in domains)
+
+
+def make_urls(rng, domains, count, hosts):
+    # a page's subrequests hit a few dozen hosts, a few of them blocked
+    pool = [f"cdn{i}.wayfair.com" for i in range(hosts)]
+    pool += [f"px.{d}" for d in rng.sample(domains, min(hosts // 4, len(domains)))]
+    return [f"https://{rng.choice(pool)}/asset/{i}.js?v=1" for i in range(count)]
+
+
+def rate(fn, urls):
+    start = time.perf_counter()
+    for url in urls:
+        fn(url)
+    return len(urls) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--domains", type=int, default=200_000)
+    parser.add_argument("--file", help="Load domains from a blocklist file instead.")
+    parser.add_argument("--urls", type=int, default=200_000)
+    parser.add_argument("--hosts", type=int, default=40, help="Distinct hosts in the URL mix.")
+    parser.add_argument("--linear-sample", type=int, default=500, help="URLs timed with the linear scan.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    if args.file:
+        blocklist = DomainBlocklist.from_file(args.file)
+        domains = list(blocklist)
+    else:
+        domains = [random_domain(rng) for _ in range(args.domains)]
+        blocklist = DomainBlocklist(domains)
+    print(f"loaded {len(blocklist)} domains in {time.perf_counter() - start:.2f}s")
+
+    urls = make_urls(rng, domains, args.urls, args.hosts)
+
+    linear = rate(lambda u: linear_is_blocked(u, domains), urls[: args.linear_sample])
+    # every URL on a new host, half of them allowed: no cache help at all
+    unique_urls = [
+        f"https://x{i}.{rng.choice(domains) if i % 2 else 'wayfair.com'}/a.js"
+        for i in range(args.urls)
+    ]
+    cold = rate(blocklist.is_blocked_url, unique_urls)
+    blocklist.cache_hits = blocklist.cache_misses = 0
+    cached = rate(blocklist.is_blocked_url, urls)
+
+    print(f"{'linear scan':<24}{linear:>14,.0f} lookups/s")
+    print(f"{'suffix set (uncached)':<24}{cold:>14,.0f} lookups/s")
+    print(f"{'suffix set + host cache':<24}{cached:>14,.0f} lookups/s")
+    print(f"host cache hits={blocklist.cache_hits} misses={blocklist.cache_misses}")
+    pattern = blocklist.route_pattern()
+    print(
+        "route push-down: "
+        + ("one regex" if pattern else "disabled (list too large; Python handler with host cache)")
+    )
+
+
+if __name__ == "__main__":
+    main()
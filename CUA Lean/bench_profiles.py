@@ -0,0 +1,69 @@
+"""Measure startup and per-screenshot cost for each browser launch profile."""
+
+import argparse
+import statistics
+import time
+from playwright.sync_api import sync_playwright
+from computers import LAUNCH_PROFILES, get_launch_profile
+
+
+def bench_profile(playwright, profile, url, screenshots):
+    start = time.monotonic()
+    browser = playwright.chromium.launch(**profile.launch_kwargs())
+    launched = time.monotonic()
+    context = browser.new_context(**profile.context_kwargs())
+    page = context.new_page()
+    page.goto(url)
+    loaded = time.monotonic()
+
+    durations, sizes = [], []
+    for _ in range(screenshots):
+        shot_start = time.monotonic()
+        png_bytes = page.screenshot(full_page=False, scale="css")
+        durations.append((time.monotonic() - shot_start) * 1000)
+        sizes.append(len(png_bytes))
+    browser.close()
+
+    durations.sort()
+    return {
+        "profile": profile.name,
+        "launch_ms": (launched - start) * 1000,
+        "first_page_ms": (loaded - launched) * 1000,
+        "shot_mean_ms": statistics.fmean(durations),
+        "shot_p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "shot_kb": statistics.fmean(sizes) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(LAUNCH_PROFILES),
+        default=list(LAUNCH_PROFILES),
+    )
+    parser.add_argument("--url", default="https://bing.com")
+    parser.add_argument("--screenshots", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per profile (median reported).")
+    args = parser.parse_args()
+
+    columns = ["launch_ms", "first_page_ms", "shot_mean_ms", "shot_p95_ms", "shot_kb"]
+    print(f"{'profile':<10}" + "".join(f"{c:>15}" for c in columns))
+    with sync_playwright() as playwright:
+        for name in args.profiles:
+            profile = get_launch_profile(name)
+            try:
+                runs = [
+                    bench_profile(playwright, profile, args.url, args.screenshots)
+                    for _ in range(args.runs)
+                ]
+            except Exception as e:
+                print(f"{name:<10} failed: {e}")
+                continue
+            medians = {c: statistics.median(r[c] for r in runs) for c in columns}
+            print(f"{name:<10}" + "".join(f"{medians[c]:>15.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
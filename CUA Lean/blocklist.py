@@ -0,0 +1,155 @@
+import ipaddress
+import re
+from urllib.parse import urlsplit
+
+_DOMAIN_RE = re.compile(r"^[a-z0-9_-]+(\.[a-z0-9_-]+)*$")
+_HOSTS_FILE_ADDRESSES = {"0.0.0.0", "127.0.0.1", "::", "::1"}
+_IGNORED_HOSTS = {"localhost", "localhost.localdomain", "local", "broadcasthost"}
+# Adblock element-hiding rules ("example.com##.modal"): cosmetic, not blocks
+_COSMETIC_MARKERS = ("##", "#@#", "#?#")
+
+
+def url_hostname(url: str) -> str:
+    """Lower-cased hostname of an absolute URL ("" for data:, about:, etc.)."""
+    start = url.find("://")
+    if start == -1:
+        return ""
+    start += 3
+    end = len(url)
+    for sep in "/?#":
+        i = url.find(sep, start, end)
+        if i != -1:
+            end = i
+    netloc = url[start:end]
+    if "@" in netloc:
+        netloc = netloc.rpartition("@")[2]
+    if netloc.startswith("["):  # IPv6 literal; rare enough to take the slow path
+        return urlsplit(url).hostname or ""
+    return netloc.partition(":")[0].rstrip(".").lower()
+
+
+class DomainBlocklist:
+    """
+    Hashed-suffix domain blocklist: a host is blocked when it, or any parent
+    domain of it, is in the set, so lookup cost depends on the number of labels
+    in the hostname rather than the size of the list.
+
+    Verdicts are cached per hostname (Wayfair pages fire hundreds of
+    subrequests at a few dozen hosts). The cache is cleared wholesale when it
+    reaches `cache_size` entries.
+    """
+
+    def __init__(self, domains=(), cache_size: int = 8192):
+        self._domains: set[str] = set()
+        self._cache: dict[str, bool] = {}
+        self._route_patterns: dict[int, re.Pattern | None] = {}
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.update(domains)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "DomainBlocklist":
+        """Load plain domain lists, hosts files ("0.0.0.0 host") or "||host^" rules."""
+        blocklist = cls(**kwargs)
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            blocklist.update(_parse_blocklist_lines(f))
+        return blocklist
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def __iter__(self):
+        return iter(self._domains)
+
+    def __contains__(self, domain: str) -> bool:
+        return domain.lower().rstrip(".") in self._domains
+
+    def add(self, domain: str) -> None:
+        self.update([domain])
+
+    def update(self, domains) -> None:
+        for domain in domains:
+            domain = domain.strip().lower().rstrip(".")
+            if domain:
+                self._domains.add(domain)
+        self._cache.clear()
+        self._route_patterns.clear()
+
+    def is_blocked_host(self, hostname: str) -> bool:
+        verdict = self._cache.get(hostname)
+        if verdict is not None:
+            self.cache_hits += 1
+            return verdict
+        self.cache_misses += 1
+
+        verdict = False
+        suffix = hostname
+        while suffix:
+            if suffix in self._domains:
+                verdict = True
+                break
+            suffix = suffix.partition(".")[2]
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[hostname] = verdict
+        return verdict
+
+    def is_blocked_url(self, url: str) -> bool:
+        hostname = url_hostname(url)
+        return bool(hostname) and self.is_blocked_host(hostname)
+
+    def route_pattern(self, max_domains: int = 2000) -> re.Pattern | None:
+        """
+        One regex matching every blocked URL, for `page.route()`. Playwright
+        matches route patterns in the browser driver, so with this installed
+        allowed requests never reach a Python handler. Returns None when the
+        list is too large (or unusual) for a single alternation.
+        """
+        if max_domains not in self._route_patterns:
+            self._route_patterns[max_domains] = self._build_route_pattern(max_domains)
+        return self._route_patterns[max_domains]
+
+    def _build_route_pattern(self, max_domains: int) -> re.Pattern | None:
+        if not self._domains or len(self._domains) > max_domains:
+            return None
+        if not all(_DOMAIN_RE.match(domain) for domain in self._domains):
+            return None
+        alternation = "|".join(
+            domain.replace(".", r"\.") for domain in sorted(self._domains)
+        )
+        return re.compile(
+            rf"^[a-z][a-z0-9+.-]*://([^/?#@]*@)?([^/?#:]*\.)?({alternation})\.?(:\d+)?([/?#]|$)",
+            re.IGNORECASE,
+        )
+
+
+def _parse_blocklist_lines(lines):
+    for line in lines:
+        if any(marker in line for marker in _COSMETIC_MARKERS):
+            continue
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("!"):
+            continue
+        if line.startswith("||"):
+            # adblock-style "||example.com^" (options after "$" are ignored)
+            domain = line[2:].split("$", 1)[0].rstrip("^")
+            if _DOMAIN_RE.match(domain.lower()) and not _is_ip(domain):
+                yield domain
+            continue
+        tokens = line.split()
+        if tokens[0] in _HOSTS_FILE_ADDRESSES:
+            tokens = tokens[1:]
+        for token in tokens:
+            token = token.lower()
+            if token not in _IGNORED_HOSTS and _DOMAIN_RE.match(token) and not _is_ip(token):
+                yield token
+
+
+def _is_ip(token: str) -> bool:
+    try:
+        ipaddress.ip_address(token)
+    except ValueError:
+        return False
+    return True
@@ -1,8 +1,41 @@
+import time
+
+_START = time.monotonic()  # before the imports below, so startup reports include them
+
 import argparse
+import contextlib
+import threading
+from concurrent.futures import Future
 from agent.agent import Agent
+from agent.loop_detector import POLICIES, LoopDetector, StuckLoopError
+from agent.tools import WAYFAIR_TOOLS
+from agent.trajectory import TrajectoryRecorder
+from telemetry import TELEMETRY, configure_telemetry
+from debug_log import configure_debug_logging
 from computers import (
+    LAUNCH_PROFILES,
+    BrowserPool,
     LocalPlaywrightComputer,
+    PooledPlaywrightComputer,
+    get_launch_profile,
 )
+from utils import prewarm_api
+
+IMPORT_MS = (time.monotonic() - _START) * 1000
+
+
+def in_background(fn, *args) -> Future:
+    """Run `fn` on a daemon thread, so a pending input() never blocks exit."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
 
 def acknowledge_safety_check_callback(message: str) -> bool:
     response = input(
@@ -34,6 +67,12 @@ def main():
         action="store_true",
         help="Enable debug mode for detailed output.",
     )
+    parser.add_argument(
+        "--debug-log",
+        type=str,
+        help="With --debug, write the debug log to this file from a background thread instead of stdout.",
+        default=None,
+    )
     parser.add_argument(
         "--show",
         action="store_true",
@@ -45,7 +84,130 @@ def main():
         help="Start the browsing session with a specific URL (only for browser environments).",
         default="https://bing.com",
     )
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Borrow the session from a warm BrowserPool, pre-navigated to --start-url.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(LAUNCH_PROFILES),
+        help="Browser launch profile: headed needs a display; headless/container do not.",
+        default="headed",
+    )
+    parser.add_argument("--width", type=int, help="Viewport width in CSS pixels.", default=None)
+    parser.add_argument("--height", type=int, help="Viewport height in CSS pixels.", default=None)
+    parser.add_argument(
+        "--device-scale",
+        type=float,
+        help="Device scale factor (screenshots are still taken in CSS pixels).",
+        default=None,
+    )
+    parser.add_argument(
+        "--chromium-arg",
+        action="append",
+        help="Extra Chromium flag; may be repeated.",
+        default=[],
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        help="Append a replayable run log (gzipped JSONL) to this path.",
+        default=None,
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream model responses and run each action as soon as it arrives.",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="While the model thinks, prefetch visible product/result links into the HTTP cache.",
+    )
+    parser.add_argument(
+        "--loop-policy",
+        choices=("off",) + POLICIES,
+        default="escalate",
+        help="What to do when actions stop changing the page: hint, recover (go back), abort, "
+        "or escalate through them.",
+    )
+    parser.add_argument(
+        "--no-coalesce",
+        action="store_true",
+        help="Run every computer_call of a response as-is, with a full screenshot after each.",
+    )
+    parser.add_argument(
+        "--input-fidelity",
+        choices=["fast", "events"],
+        help="fast: one call per key chord, drag segment or plain-field text; events: every key and mouse event separately.",
+        default="fast",
+    )
+    parser.add_argument(
+        "--wayfair-tools",
+        action="store_true",
+        help="Give the model the Wayfair function tools (search, open_result, apply_filter, add_to_cart).",
+    )
+    parser.add_argument(
+        "--telemetry-jsonl",
+        type=str,
+        help="Write timed spans (model, actions, screenshots) and counters to this JSONL file.",
+        default=None,
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome trace (chrome://tracing, Perfetto) of the run to this file.",
+        default=None,
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this local port.",
+        default=None,
+    )
+    parser.add_argument(
+        "--metrics-store",
+        type=str,
+        help="Append step-level rows to this Parquet dataset, partitioned by day (see report.py).",
+        default=None,
+    )
+    har_group = parser.add_mutually_exclusive_group()
+    har_group.add_argument(
+        "--har-record",
+        type=str,
+        help="Record the session's network traffic to this HAR file.",
+        default=None,
+    )
+    har_group.add_argument(
+        "--har-replay",
+        type=str,
+        help="Serve all pages from this HAR file; requests not in it fail (offline run).",
+        default=None,
+    )
+    parser.add_argument(
+        "--har-latency",
+        type=int,
+        help="Latency in ms added to each request served from --har-replay.",
+        default=0,
+    )
+    parser.add_argument(
+        "--har-jitter",
+        type=int,
+        help="Random extra latency, up to this many ms, for --har-replay.",
+        default=0,
+    )
     args = parser.parse_args()
+    if args.pool and (args.har_record or args.har_replay):
+        parser.error("--har-record/--har-replay cannot be combined with --pool")
+
+    profile = get_launch_profile(
+        args.profile,
+        extra_args=args.chromium_arg,
+        width=args.width,
+        height=args.height,
+        device_scale_factor=args.device_scale,
+    )
 
     computer_mapping = {
         "local-playwright": LocalPlaywrightComputer,
@@ -53,38 +215,110 @@ def main():
 
     ComputerClass = computer_mapping[args.computer]
 
-    with ComputerClass() as computer:
+    if not args.start_url.startswith("http"):
+        args.start_url = "https://" + args.start_url
+
+    configure_telemetry(args.telemetry_jsonl, args.trace, args.metrics_port, args.metrics_store)
+    if args.debug and args.debug_log:
+        configure_debug_logging(args.debug_log)
+
+    # The API pre-connect and the first prompt run while Chromium launches and
+    # loads --start-url (sync Playwright has to stay on this thread).
+    api_warm = in_background(prewarm_api)
+    pending_input = None if args.input else in_background(input, "> ")
+
+    with contextlib.ExitStack() as stack:
+        stack.callback(TELEMETRY.close)
+        start = time.monotonic()
+        if args.pool:
+            pool = stack.enter_context(BrowserPool(start_url=args.start_url, profile=profile))
+            computer = stack.enter_context(PooledPlaywrightComputer(pool))
+        else:
+            computer = stack.enter_context(
+                ComputerClass(
+                    profile=profile,
+                    har_path=args.har_record or args.har_replay,
+                    har_mode="record" if args.har_record else "replay" if args.har_replay else None,
+                    har_latency_ms=args.har_latency,
+                    har_jitter_ms=args.har_jitter,
+                    start_url=args.start_url,
+                )
+            )
+        computer.input_fidelity = args.input_fidelity
+        computer.speculative_prefetch = args.prefetch
+        recorder = None
+        if args.record:
+            recorder = stack.enter_context(
+                TrajectoryRecorder(args.record, model="computer-use-preview")
+            )
         agent = Agent(
             model="computer-use-preview",
             computer=computer,
             acknowledge_safety_check_callback=acknowledge_safety_check_callback,
+            recorder=recorder,
+            stream=args.stream,
+            registry=WAYFAIR_TOOLS if args.wayfair_tools else None,
+            coalesce=not args.no_coalesce,
+            loop_detector=None if args.loop_policy == "off" else LoopDetector(args.loop_policy),
         )
         items = []
 
-
-        if args.computer in ["browserbase", "local-playwright"]:
-            if not args.start_url.startswith("http"):
-                args.start_url = "https://" + args.start_url
-            agent.computer.goto(args.start_url)
+        session_ms = (time.monotonic() - start) * 1000
+        if args.debug:
+            print(f"Session ready in {session_ms:.0f}ms")
 
         while True:
             try:
-                user_input = args.input or input("> ")
+                if pending_input:
+                    user_input, pending_input = pending_input.result(), None
+                else:
+                    user_input = args.input or input("> ")
                 if user_input == 'exit':
                     break
             except EOFError as e:
                 print(f"An error occurred: {e}")
                 break
+            api_warm.result()  # let the pre-connect finish before the session is shared
             items.append({"role": "user", "content": user_input})
-            output_items = agent.run_full_turn(
-                items,
-                print_steps=True,
-                show_images=args.show,
-                debug=args.debug,
-            )
+            try:
+                output_items = agent.run_full_turn(
+                    items,
+                    print_steps=True,
+                    show_images=args.show,
+                    debug=args.debug,
+                )
+            except StuckLoopError as e:
+                print(f"Stopped: {e}")
+                output_items = []
             items += output_items
             args.input = None
 
+        if computer.settle_histogram.samples:
+            print(computer.settle_histogram.format())
+        if computer.overlays.total:
+            print(computer.overlays.format())
+        if computer.perf_log.records:
+            print(computer.perf_log.format())
+            if recorder:
+                recorder.write({"type": "page_perf_summary", "patterns": computer.perf_log.summary()})
+        if computer.prefetch.issued:
+            print(computer.prefetch.format())
+        if agent.first_action_ms:
+            print(agent.first_action_summary())
+        if agent.loop_detector and agent.loop_detector.counts["loops"]:
+            print(agent.loop_detector.format())
+        if agent.coalesce_stats:
+            print(
+                f"Coalescing: {agent.coalesce_stats['coalesced']} calls merged, "
+                f"{agent.coalesce_stats['quick_captures']} quick captures"
+            )
+        startup = f"Startup: imports {IMPORT_MS:.0f}ms, browser session {session_ms:.0f}ms"
+        if api_warm.done():
+            startup += f", API pre-connect {api_warm.result():.0f}ms"
+        if agent.first_action_at is not None:
+            startup += f", first action {(agent.first_action_at - _START) * 1000:.0f}ms after launch"
+        print(startup)
+
 
 if __name__ == "__main__":
     main()
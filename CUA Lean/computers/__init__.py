@@ -1,2 +1,28 @@
-from .base_playwright import BasePlaywrightComputer as Computer
-from .local_playwright import LocalPlaywrightComputer
+import importlib
+
+# Exports are imported on first use, so `from computers import X` only loads
+# the Playwright API (sync or async) and image libraries that X needs.
+_EXPORTS = {
+    "Computer": (".base_playwright", "BasePlaywrightComputer"),
+    "LocalPlaywrightComputer": (".local_playwright", "LocalPlaywrightComputer"),
+    "AsyncComputer": (".async_base_playwright", "AsyncBasePlaywrightComputer"),
+    "AsyncLocalPlaywrightComputer": (".async_local_playwright", "AsyncLocalPlaywrightComputer"),
+    "BrowserPool": (".browser_pool", "BrowserPool"),
+    "AsyncBrowserPool": (".browser_pool", "AsyncBrowserPool"),
+    "PooledPlaywrightComputer": (".pooled_playwright", "PooledPlaywrightComputer"),
+    "AsyncPooledPlaywrightComputer": (".pooled_playwright", "AsyncPooledPlaywrightComputer"),
+    "LaunchProfile": (".launch_profiles", "LaunchProfile"),
+    "LAUNCH_PROFILES": (".launch_profiles", "LAUNCH_PROFILES"),
+    "get_launch_profile": (".launch_profiles", "get_launch_profile"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _EXPORTS[name]
+    value = getattr(importlib.import_module(module, __name__), attr)
+    globals()[name] = value
+    return value
@@ -0,0 +1,32 @@
+from playwright.async_api import async_playwright, Playwright
+from steps import run_async
+from .playwright_core import PlaywrightComputerCore
+
+
+@run_async
+class AsyncBasePlaywrightComputer(PlaywrightComputerCore):
+    """
+    asyncio twin of `BasePlaywrightComputer`, built on `playwright.async_api`.
+
+      - Same settings and action bodies (`PlaywrightComputerCore`), but every
+        action is a coroutine.
+      - Use with `async with`; subclasses override `_get_browser_and_page()`.
+      - Pass a running `Playwright` to share one driver across many computers
+        in the same event loop (it is then left running on exit).
+    """
+
+    def __init__(self, playwright: Playwright | None = None):
+        super().__init__()
+        self._playwright = playwright
+        self._owns_playwright = playwright is None
+
+    async def __aenter__(self):
+        if self._owns_playwright:
+            self._playwright = await async_playwright().start()
+        await self._open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._close()
+        if self._playwright and self._owns_playwright:
+            await self._playwright.stop()
@@ -0,0 +1,47 @@
+from playwright.async_api import Browser, Page, Playwright
+from .async_base_playwright import AsyncBasePlaywrightComputer
+from .launch_profiles import LaunchProfile, get_launch_profile
+
+
+class AsyncLocalPlaywrightComputer(AsyncBasePlaywrightComputer):
+    """Launches a local Chromium instance using the async Playwright API."""
+
+    def __init__(
+        self,
+        headless: bool = False,
+        playwright: Playwright | None = None,
+        profile: LaunchProfile | None = None,
+        start_url: str | None = None,
+    ):
+        super().__init__(playwright=playwright)
+        self.start_url = start_url
+        self.profile = profile or get_launch_profile("headless" if headless else "headed")
+        self.headless = self.profile.headless
+        self.dimensions = self.profile.dimensions
+
+    async def _get_browser_and_page(self) -> tuple[Browser, Page]:
+        browser = await self._playwright.chromium.launch(**self.profile.launch_kwargs())
+
+        context = await browser.new_context(**self.profile.context_kwargs())
+        context.on("page", self._handle_new_page)
+
+        page = await context.new_page()
+        page.on("close", self._handle_page_close)
+
+        return browser, page
+
+    def _handle_new_page(self, page: Page):
+        """Handle the creation of a new page."""
+        print("New page created")
+        self._page = page
+        page.on("close", self._handle_page_close)
+
+    def _handle_page_close(self, page: Page):
+        """Handle the closure of a page."""
+        print("Page closed")
+        if self._page == page:
+            if page.context.pages:
+                self._page = page.context.pages[-1]
+            else:
+                print("Warning: All pages have been closed.")
+                self._page = None
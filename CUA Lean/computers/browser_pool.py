@@ -0,0 +1,295 @@
+import asyncio
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+from playwright.async_api import async_playwright
+from .launch_profiles import LaunchProfile, get_launch_profile
+
+
+class _PooledBrowser:
+    """A pooled Chromium instance and its context bookkeeping."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0  # contexts created on this browser so far
+        self.active = 0  # contexts currently open (in use or spare)
+
+
+class BrowserPool:
+    """
+    Keeps warm Chromium instances and hands each session a fresh, isolated
+    BrowserContext, optionally already navigated to `start_url`:
+
+      - `warm_contexts` spare contexts are prepared ahead of time, so `acquire()`
+        is usually a list pop plus a liveness probe.
+      - Contexts are never shared between sessions; `release()` closes them.
+      - A browser is relaunched once it has served `max_uses_per_browser`
+        contexts and is idle, which bounds leaks in long-lived workers.
+      - `health_check()` drops disconnected browsers and dead spare contexts.
+    """
+
+    def __init__(
+        self,
+        browsers: int = 1,
+        warm_contexts: int = 1,
+        max_uses_per_browser: int = 100,
+        start_url: str | None = None,
+        profile: LaunchProfile | None = None,
+    ):
+        self.browsers = browsers
+        self.warm_contexts = warm_contexts
+        self.max_uses_per_browser = max_uses_per_browser
+        self.start_url = start_url
+        self.profile = profile or get_launch_profile("headed")
+        self.playwright = None
+        self._browsers: list[_PooledBrowser] = []
+        self._spares: list[tuple[_PooledBrowser, BrowserContext, Page]] = []
+        self._owners: dict[int, _PooledBrowser] = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self) -> None:
+        self.playwright = sync_playwright().start()
+        for _ in range(self.browsers):
+            self._browsers.append(self._launch())
+        self._refill()
+
+    def close(self) -> None:
+        for pooled in self._browsers:
+            try:
+                pooled.browser.close()
+            except Exception:
+                pass
+        self._browsers, self._spares, self._owners = [], [], {}
+        if self.playwright:
+            self.playwright.stop()
+            self.playwright = None
+
+    def acquire(self) -> tuple[Browser, BrowserContext, Page]:
+        """Return (browser, fresh context, its page) for one session."""
+        while self._spares:
+            pooled, context, page = self._spares.pop()
+            if self._is_healthy(pooled, page):
+                return pooled.browser, context, page
+            self._discard(context)
+        pooled = self._pick_browser()
+        context, page = self._new_context(pooled)
+        return pooled.browser, context, page
+
+    def release(self, context: BrowserContext) -> None:
+        """Close a session's context and top the pool back up."""
+        self._discard(context)
+        self._recycle_browsers()
+        self._refill()
+
+    def health_check(self) -> dict:
+        spares = []
+        for pooled, context, page in self._spares:
+            if self._is_healthy(pooled, page):
+                spares.append((pooled, context, page))
+            else:
+                self._discard(context)
+        self._spares = spares
+        self._recycle_browsers()
+        self._refill()
+        return _pool_status(self._browsers, self._spares)
+
+    # --- internals ---
+    def _launch(self) -> _PooledBrowser:
+        browser = self.playwright.chromium.launch(**self.profile.launch_kwargs())
+        return _PooledBrowser(browser)
+
+    def _pick_browser(self) -> _PooledBrowser:
+        pooled = _least_loaded(self._browsers, self.max_uses_per_browser)
+        if pooled is None:
+            pooled = self._launch()
+            self._browsers.append(pooled)
+        return pooled
+
+    def _new_context(self, pooled: _PooledBrowser) -> tuple[BrowserContext, Page]:
+        context = pooled.browser.new_context(**self.profile.context_kwargs())
+        pooled.uses += 1
+        pooled.active += 1
+        self._owners[id(context)] = pooled
+        page = context.new_page()
+        if self.start_url:
+            page.goto(self.start_url)
+        return context, page
+
+    def _discard(self, context: BrowserContext) -> None:
+        pooled = self._owners.pop(id(context), None)
+        if pooled:
+            pooled.active -= 1
+        try:
+            context.close()
+        except Exception:
+            pass
+
+    def _recycle_browsers(self) -> None:
+        for pooled in _retired(self._browsers, self.max_uses_per_browser):
+            self._browsers.remove(pooled)
+            try:
+                pooled.browser.close()
+            except Exception:
+                pass
+        while len(self._browsers) < self.browsers:
+            self._browsers.append(self._launch())
+
+    def _refill(self) -> None:
+        while len(self._spares) < self.warm_contexts:
+            pooled = self._pick_browser()
+            context, page = self._new_context(pooled)
+            self._spares.append((pooled, context, page))
+
+    @staticmethod
+    def _is_healthy(pooled: _PooledBrowser, page: Page) -> bool:
+        if not pooled.browser.is_connected() or page.is_closed():
+            return False
+        try:
+            return page.evaluate("1") == 1
+        except Exception:
+            return False
+
+
+class AsyncBrowserPool(BrowserPool):
+    """`BrowserPool` for `playwright.async_api`; same policy, awaitable methods."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # release() interleaves with other sessions; keep refills from overshooting
+        self._maintenance_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self) -> None:
+        self.playwright = await async_playwright().start()
+        for _ in range(self.browsers):
+            self._browsers.append(await self._launch())
+        await self._refill()
+
+    async def close(self) -> None:
+        for pooled in self._browsers:
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        self._browsers, self._spares, self._owners = [], [], {}
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def acquire(self):
+        while self._spares:
+            pooled, context, page = self._spares.pop()
+            if await self._is_healthy(pooled, page):
+                return pooled.browser, context, page
+            await self._discard(context)
+        pooled = await self._pick_browser()
+        context, page = await self._new_context(pooled)
+        return pooled.browser, context, page
+
+    async def release(self, context) -> None:
+        await self._discard(context)
+        async with self._maintenance_lock:
+            await self._recycle_browsers()
+            await self._refill()
+
+    async def health_check(self) -> dict:
+        spares = []
+        for pooled, context, page in self._spares:
+            if await self._is_healthy(pooled, page):
+                spares.append((pooled, context, page))
+            else:
+                await self._discard(context)
+        self._spares = spares
+        async with self._maintenance_lock:
+            await self._recycle_browsers()
+            await self._refill()
+        return _pool_status(self._browsers, self._spares)
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self.playwright.chromium.launch(**self.profile.launch_kwargs())
+        return _PooledBrowser(browser)
+
+    async def _pick_browser(self) -> _PooledBrowser:
+        pooled = _least_loaded(self._browsers, self.max_uses_per_browser)
+        if pooled is None:
+            pooled = await self._launch()
+            self._browsers.append(pooled)
+        return pooled
+
+    async def _new_context(self, pooled: _PooledBrowser):
+        context = await pooled.browser.new_context(**self.profile.context_kwargs())
+        pooled.uses += 1
+        pooled.active += 1
+        self._owners[id(context)] = pooled
+        page = await context.new_page()
+        if self.start_url:
+            await page.goto(self.start_url)
+        return context, page
+
+    async def _discard(self, context) -> None:
+        pooled = self._owners.pop(id(context), None)
+        if pooled:
+            pooled.active -= 1
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _recycle_browsers(self) -> None:
+        for pooled in _retired(self._browsers, self.max_uses_per_browser):
+            self._browsers.remove(pooled)
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        while len(self._browsers) < self.browsers:
+            self._browsers.append(await self._launch())
+
+    async def _refill(self) -> None:
+        while len(self._spares) < self.warm_contexts:
+            pooled = await self._pick_browser()
+            context, page = await self._new_context(pooled)
+            self._spares.append((pooled, context, page))
+
+    @staticmethod
+    async def _is_healthy(pooled: _PooledBrowser, page) -> bool:
+        if not pooled.browser.is_connected() or page.is_closed():
+            return False
+        try:
+            return await page.evaluate("1") == 1
+        except Exception:
+            return False
+
+
+def _least_loaded(browsers: list[_PooledBrowser], max_uses: int) -> _PooledBrowser | None:
+    live = [b for b in browsers if b.uses < max_uses and b.browser.is_connected()]
+    return min(live, key=lambda b: b.active) if live else None
+
+
+def _retired(browsers: list[_PooledBrowser], max_uses: int) -> list[_PooledBrowser]:
+    """Browsers to close: disconnected ones, and used-up ones with no open contexts."""
+    return [
+        b
+        for b in browsers
+        if not b.browser.is_connected() or (b.uses >= max_uses and b.active == 0)
+    ]
+
+
+def _pool_status(browsers: list[_PooledBrowser], spares: list) -> dict:
+    return {
+        "browsers": len(browsers),
+        "connected": sum(b.browser.is_connected() for b in browsers),
+        "spare_contexts": len(spares),
+        "active_contexts": sum(b.active for b in browsers) - len(spares),
+        "uses": [b.uses for b in browsers],
+    }
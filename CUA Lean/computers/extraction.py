@@ -0,0 +1,127 @@
+import json
+import time
+from collections import OrderedDict
+
+# One in-page pass over a Wayfair search-results or product page. Product pages
+# are read from their JSON-LD Product block (DOM as a fallback); result pages
+# from the product cards, or a JSON-LD ItemList when there are no cards.
+EXTRACT_LISTING_JS = """
+(maxItems) => {
+  const num = (s) => {
+    const m = String(s ?? '').replace(/,/g, '').match(/\\d+(\\.\\d+)?/);
+    return m ? parseFloat(m[0]) : null;
+  };
+  const text = (root, sel) => (root.querySelector(sel)?.textContent || '').trim() || null;
+  const rating = (el) => {
+    if (!el) return [null, null];
+    const label = el.getAttribute('aria-label') || el.getAttribute('title') || '';
+    const m = label.match(/(\\d+(\\.\\d+)?)\\s*out of\\s*5/i);
+    return [m ? parseFloat(m[1]) : num(label), num(el.textContent)];
+  };
+  const jsonLd = [];
+  for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+    try {
+      const data = JSON.parse(script.textContent);
+      jsonLd.push(...(Array.isArray(data) ? data : data['@graph'] || [data]));
+    } catch (e) {}
+  }
+  const nextLink = document.querySelector('[data-enzyme-id="Pagination"] a[rel="next"], a[rel="next"]');
+  const next = nextLink ? nextLink.href : null;
+
+  const product = jsonLd.find((d) => d['@type'] === 'Product');
+  const title = document.querySelector('[data-enzyme-id="ProductTitle"]');
+  if (product || title) {
+    const offer = [].concat(product?.offers || [])[0] || {};
+    const agg = product?.aggregateRating || {};
+    const [domRating, domReviews] = rating(document.querySelector('[data-enzyme-id="ReviewStars"]'));
+    return {page_type: 'product', next, items: [{
+      name: product?.name || title?.textContent.trim() || null,
+      sku: product?.sku || null,
+      price: num(offer.price) ?? num(text(document, '[data-enzyme-id="PriceBlock"]')),
+      currency: offer.priceCurrency || null,
+      rating: num(agg.ratingValue) ?? domRating,
+      review_count: num(agg.reviewCount) ?? domReviews,
+      shipping: text(document, '[data-enzyme-id="ShippingInfo"]'),
+      in_stock: offer.availability ? /InStock/.test(offer.availability) : null,
+      url: location.href,
+    }]};
+  }
+
+  const cards = Array.from(document.querySelectorAll('[data-enzyme-id="ProductCard"]'));
+  if (cards.length) {
+    return {page_type: 'listing', next, cards_on_page: cards.length, items: cards.slice(0, maxItems).map((card) => {
+      const [stars, reviews] = rating(card.querySelector('[data-enzyme-id="ReviewStars"]'));
+      const link = card.querySelector('[data-enzyme-id="ProductCardLink"], a[href]');
+      return {
+        name: text(card, '[data-enzyme-id="ProductCardName"]'),
+        sku: card.getAttribute('data-sku'),
+        price: num(text(card, '[data-enzyme-id="PriceBlock"]')),
+        rating: stars,
+        review_count: reviews,
+        shipping: text(card, '[data-enzyme-id="ShippingInfo"]'),
+        url: link ? link.href : null,
+      };
+    })};
+  }
+
+  const list = jsonLd.find((d) => d['@type'] === 'ItemList');
+  const entries = (list?.itemListElement || []).map((e) => e.item || e);
+  return {page_type: entries.length ? 'listing' : 'unknown', next, cards_on_page: entries.length,
+    items: entries.slice(0, maxItems).map((e) => ({name: e.name || null, url: e.url || null}))};
+}
+"""
+
+
+def estimate_tokens(value) -> int:
+    """Rough token count of `value` as compact JSON (~4 characters per token)."""
+    return len(json.dumps(value, separators=(",", ":"))) // 4 + 1
+
+
+def fit_to_budget(listing: dict, max_tokens: int) -> dict:
+    """Drop empty fields, then trailing records, until the listing fits in `max_tokens`."""
+    items = [{k: v for k, v in item.items() if v is not None} for item in listing["items"]]
+    result = {**listing, "items": [], "truncated": False}
+    used = estimate_tokens(result)
+    for item in items:
+        cost = estimate_tokens(item)
+        if used + cost > max_tokens:
+            result["truncated"] = True
+            break
+        result["items"].append(item)
+        used += cost
+    result["count"] = len(result["items"])
+    return result
+
+
+class ListingCache:
+    """
+    Extracted listings keyed by URL, each valid for `ttl_s` seconds (LRU beyond
+    `max_entries`). The computer clears it on every action that may change the
+    page (click, scroll, typing, navigation).
+    """
+
+    def __init__(self, ttl_s: float = 60, max_entries: int = 128):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, url: str) -> dict | None:
+        entry = self._entries.get(url)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_s:
+            self._entries.pop(url, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(url)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, url: str, listing: dict) -> None:
+        self._entries[url] = (time.monotonic(), listing)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
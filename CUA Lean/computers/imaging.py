@@ -0,0 +1,99 @@
+import base64
+import io
+import math
+from PIL import Image, ImageDraw
+
+# Images returned by multi-page tools are JPEG data URLs: several times smaller
+# than PNG for page screenshots, and still legible to the model.
+JPEG_QUALITY = 75
+
+
+def to_data_url(image: Image.Image, quality: int = JPEG_QUALITY) -> str:
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def data_url_bytes(data_url: str) -> int:
+    """Decoded size of a base64 data URL."""
+    payload = data_url.split(",", 1)[1]
+    return len(payload) * 3 // 4 - payload[-2:].count("=")
+
+
+def compose_grid(
+    screenshots: list[bytes], labels: list[str] | None = None, max_width: int = 2048
+) -> Image.Image:
+    """
+    Tile screenshots into one near-square grid, each cell scaled to the same
+    size and numbered in its corner so the model can refer to "tab 3".
+    """
+    images = [Image.open(io.BytesIO(data)).convert("RGB") for data in screenshots]
+    cols = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / cols)
+    width, height = images[0].size
+    scale = min(1.0, max_width / (cols * width))
+    cell_w, cell_h = int(width * scale), int(height * scale)
+
+    grid = Image.new("RGB", (cols * cell_w, rows * cell_h), "white")
+    draw = ImageDraw.Draw(grid)
+    for i, image in enumerate(images):
+        x, y = (i % cols) * cell_w, (i // cols) * cell_h
+        grid.paste(image.resize((cell_w, cell_h), Image.BILINEAR), (x, y))
+        draw.rectangle([x, y, x + cell_w - 1, y + cell_h - 1], outline="black", width=2)
+        label = labels[i] if labels else str(i + 1)
+        draw.rectangle([x, y, x + 8 + 7 * len(label), y + 18], fill="black")
+        draw.text((x + 4, y + 3), label, fill="white")
+    return grid
+
+
+def tab_capture_result(tabs: list[dict], screenshots: list[tuple[dict, bytes]], composite: bool) -> dict:
+    """Tool result for `open_in_tabs`: tab metadata plus one grid or one image per tab."""
+    if not screenshots:
+        return {"ok": False, "error": "no tab could be loaded", "tabs": tabs}
+    if composite:
+        grid = compose_grid([png for _, png in screenshots], [str(tab["n"]) for tab, _ in screenshots])
+        images = [to_data_url(grid)]
+    else:
+        images = [to_data_url(Image.open(io.BytesIO(png))) for _, png in screenshots]
+    return {"ok": True, "tabs": tabs, "images": images}
+
+
+def slice_tiles(screenshot: bytes, tile_height: int) -> list[Image.Image]:
+    """Cut a full-page screenshot into viewport-height tiles, top to bottom."""
+    image = Image.open(io.BytesIO(screenshot)).convert("RGB")
+    width, height = image.size
+    return [
+        image.crop((0, top, width, min(top + tile_height, height)))
+        for top in range(0, height, tile_height)
+    ]
+
+
+def overview(screenshot: bytes, max_width: int = 768, max_height: int = 4096) -> Image.Image:
+    """The whole page downscaled to fit `max_width` x `max_height`."""
+    image = Image.open(io.BytesIO(screenshot)).convert("RGB")
+    image.thumbnail((max_width, max_height), Image.LANCZOS)
+    return image
+
+
+def page_capture_result(
+    screenshot: bytes, page_height: int, tile_height: int, max_tiles: int, as_overview: bool
+) -> dict:
+    """Tool result for `capture_page`: tiles (or one overview) plus tile counts and bytes."""
+    total_tiles = math.ceil(page_height / tile_height)
+    captured_height = Image.open(io.BytesIO(screenshot)).height  # clipped at max_overview_viewports
+    shown_height = captured_height if as_overview else min(captured_height, max_tiles * tile_height)
+    if as_overview:
+        images = [to_data_url(overview(screenshot))]
+    else:
+        images = [to_data_url(tile) for tile in slice_tiles(screenshot, tile_height)[:max_tiles]]
+    tile_bytes = [data_url_bytes(image) for image in images]
+    return {
+        "ok": True,
+        "page_height": page_height,
+        "total_tiles": total_tiles,
+        "tiles": len(images),
+        "truncated": shown_height < page_height,  # part of the page is in no image, in either mode
+        "tile_bytes": tile_bytes,
+        "bytes": sum(tile_bytes),
+        "images": images,
+    }
@@ -0,0 +1,65 @@
+import math
+
+# True when the focused element is a plain, editable text field: there,
+# Keyboard.insert_text (one input event) is equivalent to typing it out.
+PLAIN_TEXT_FIELD_JS = """
+() => {
+  const el = document.activeElement;
+  if (!el || el.disabled || el.readOnly) return false;
+  if (el.tagName === 'TEXTAREA') return true;
+  return el.tagName === 'INPUT' && ['text', 'search', 'email', 'url', 'tel', 'password'].includes(el.type);
+}
+"""
+
+
+def chord(keys: list[str]) -> str:
+    """Playwright key names as one `keyboard.press` chord ("Control+Shift+T")."""
+    return "+".join(keys)
+
+
+def can_insert(text: str) -> bool:
+    """Tabs move focus when typed, so only text without them can be inserted."""
+    return "\t" not in text
+
+
+def simplify_path(path: list[dict], tolerance: float) -> list[dict]:
+    """
+    Ramer-Douglas-Peucker: drop drag points within `tolerance` px of the
+    straight segment between their neighbours. Endpoints are always kept.
+    """
+    if len(path) <= 2:
+        return list(path)
+    keep = [False] * len(path)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(path) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay, bx, by = path[first]["x"], path[first]["y"], path[last]["x"], path[last]["y"]
+        length = math.hypot(bx - ax, by - ay)
+        worst, index = 0.0, None
+        for i in range(first + 1, last):
+            px, py = path[i]["x"], path[i]["y"]
+            if length:
+                distance = abs((bx - ax) * (ay - py) - (ax - px) * (by - ay)) / length
+            else:
+                distance = math.hypot(px - ax, py - ay)
+            if distance > worst:
+                worst, index = distance, i
+        if index is not None and worst > tolerance:
+            keep[index] = True
+            stack += [(first, index), (index, last)]
+    return [point for point, kept in zip(path, keep) if kept]
+
+
+def drag_segments(path: list[dict], tolerance: float, step_px: float) -> list[tuple[int, int, int]]:
+    """
+    (x, y, steps) moves after the mouse is down at path[0]: one per remaining
+    segment of the simplified path, with Playwright interpolating `steps`
+    intermediate events (about one per `step_px`) inside a single call.
+    """
+    points = simplify_path(path, tolerance)
+    moves = []
+    for start, end in zip(points, points[1:]):
+        distance = math.hypot(end["x"] - start["x"], end["y"] - start["y"])
+        moves.append((end["x"], end["y"], max(1, round(distance / step_px))))
+    return moves
@@ -0,0 +1,79 @@
+import os
+from dataclasses import dataclass, field, replace
+
+BASE_CHROMIUM_ARGS = ["--disable-extensions", "--disable-file-system"]
+
+# Flags for packed headless workers: no /dev/shm dependency (Docker defaults
+# to 64MB), no GPU process, and no background traffic competing with pages.
+CONTAINER_CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--mute-audio",
+    "--hide-scrollbars",
+]
+
+
+@dataclass
+class LaunchProfile:
+    """How to launch Chromium and size its pages for a Playwright computer."""
+
+    name: str
+    headless: bool
+    width: int = 1024
+    height: int = 768
+    device_scale_factor: float = 1
+    chromium_args: list[str] = field(default_factory=list)
+    # Chromium's sandbox needs unprivileged user namespaces, which Docker's
+    # default seccomp profile blocks (and Chromium refuses to run as root with it)
+    chromium_sandbox: bool = True
+
+    @property
+    def dimensions(self) -> tuple[int, int]:
+        return (self.width, self.height)
+
+    def launch_kwargs(self) -> dict:
+        """Keyword arguments for `playwright.chromium.launch()`."""
+        kwargs = {
+            "chromium_sandbox": self.chromium_sandbox,
+            "headless": self.headless,
+            "args": [f"--window-size={self.width},{self.height}", *self.chromium_args],
+        }
+        if not self.headless:
+            # headed browsers need an X server; headless ones must not depend on one
+            kwargs["env"] = {"DISPLAY": os.environ.get("DISPLAY", ":0")}
+        return kwargs
+
+    def context_kwargs(self) -> dict:
+        """Keyword arguments for `browser.new_context()`."""
+        return {
+            "viewport": {"width": self.width, "height": self.height},
+            "device_scale_factor": self.device_scale_factor,
+        }
+
+
+LAUNCH_PROFILES = {
+    "headed": LaunchProfile("headed", headless=False, chromium_args=BASE_CHROMIUM_ARGS),
+    "headless": LaunchProfile("headless", headless=True, chromium_args=BASE_CHROMIUM_ARGS),
+    "container": LaunchProfile(
+        "container",
+        headless=True,
+        chromium_args=BASE_CHROMIUM_ARGS + CONTAINER_CHROMIUM_ARGS,
+        chromium_sandbox=False,  # the container is the isolation boundary
+    ),
+}
+
+
+def get_launch_profile(name: str = "headed", extra_args: list[str] | None = None, **overrides) -> LaunchProfile:
+    """Look up a named profile, overriding fields (width, height, ...) that are not None."""
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown launch profile: {name} (choose from {', '.join(LAUNCH_PROFILES)})")
+    profile = LAUNCH_PROFILES[name]
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    if extra_args:
+        overrides["chromium_args"] = profile.chromium_args + list(extra_args)
+    return replace(profile, **overrides)
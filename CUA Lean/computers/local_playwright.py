@@ -1,36 +1,73 @@
-from playwright.sync_api import Browser, Page
+import random
+from typing import Literal
+from playwright.sync_api import Browser, BrowserContext, Page
 from .base_playwright import BasePlaywrightComputer
+from .launch_profiles import LaunchProfile, get_launch_profile
 
 
 class LocalPlaywrightComputer(BasePlaywrightComputer):
-    """Launches a local Chromium instance using Playwright."""
+    """
+    Launches a local Chromium instance using Playwright, opening `start_url`
+    (if any) as its first and only navigation.
 
-    def __init__(self, headless: bool = False):
+    Optionally records the session's traffic to a HAR file (`har_mode="record"`),
+    or serves it from one with no live network (`har_mode="replay"`), adding
+    `har_latency_ms` (+ up to `har_jitter_ms`) to every replayed request.
+    """
+
+    def __init__(
+        self,
+        headless: bool = False,
+        profile: LaunchProfile | None = None,
+        har_path: str | None = None,
+        har_mode: Literal["record", "replay"] | None = None,
+        har_latency_ms: int = 0,
+        har_jitter_ms: int = 0,
+        start_url: str | None = None,
+    ):
         super().__init__()
-        self.headless = headless
+        self.start_url = start_url
+        self.profile = profile or get_launch_profile("headless" if headless else "headed")
+        self.headless = self.profile.headless
+        self.dimensions = self.profile.dimensions
+        if har_mode and not har_path:
+            raise ValueError(f"har_mode={har_mode!r} needs a har_path")
+        self.har_path = har_path
+        self.har_mode = har_mode
+        self.har_latency_ms = har_latency_ms
+        self.har_jitter_ms = har_jitter_ms
 
     def _get_browser_and_page(self) -> tuple[Browser, Page]:
-        width, height = self.dimensions
-        launch_args = [f"--window-size={width},{height}", "--disable-extensions", "--disable-file-system"]
-        browser = self._playwright.chromium.launch(
-            chromium_sandbox=True,
-            headless=self.headless,
-            args=launch_args,
-            env={"DISPLAY": ":0"}
-        )
-        
-        context = browser.new_context()
+        browser = self._playwright.chromium.launch(**self.profile.launch_kwargs())
+
+        context_kwargs = self.profile.context_kwargs()
+        if self.har_mode == "record":
+            context_kwargs["record_har_path"] = self.har_path  # written on context close
+        context = browser.new_context(**context_kwargs)
+        if self.har_mode == "replay":
+            self._serve_from_har(context)
         
         # Add event listeners for page creation and closure
         context.on("page", self._handle_new_page)
         
         page = context.new_page()
-        page.set_viewport_size({"width": width, "height": height})
         page.on("close", self._handle_page_close)
 
-        page.goto("https://bing.com")
-        
         return browser, page
+
+    def _serve_from_har(self, context: BrowserContext) -> None:
+        # anything missing from the HAR fails instead of reaching the live network
+        context.route_from_har(self.har_path, not_found="abort")
+        if not (self.har_latency_ms or self.har_jitter_ms):
+            return
+
+        def add_latency(route, request):
+            delay = self.har_latency_ms + random.uniform(0, self.har_jitter_ms)
+            # wait_for_timeout yields to Playwright, so other requests keep flowing
+            request.frame.page.wait_for_timeout(delay)
+            route.fallback()  # on to the HAR handler registered above
+
+        context.route("**/*", add_latency)
         
     def _handle_new_page(self, page: Page):
         """Handle the creation of a new page."""
@@ -42,8 +79,8 @@ class LocalPlaywrightComputer(BasePlaywrightComputer):
         """Handle the closure of a page."""
         print("Page closed")
         if self._page == page:
-            if self._browser.contexts[0].pages:
-                self._page = self._browser.contexts[0].pages[-1]
+            if page.context.pages:
+                self._page = page.context.pages[-1]
             else:
                 print("Warning: All pages have been closed.")
                 self._page = None
@@ -0,0 +1,122 @@
+import json
+import os
+from collections import Counter
+
+DEFAULT_RULES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "overlay_rules.json"
+)
+
+# Name of the binding the init script calls with a rule name per suppressed overlay
+BINDING_NAME = "__cuaOverlaySuppressed"
+
+# Runs at document start in every frame. "hide" rules become a stylesheet, so
+# those overlays never paint; "click" rules press a dismiss/reject button as
+# soon as the overlay appears, and with "fallback": "hide" hide the overlay
+# while it has no such button (it is still pressed if it shows up later).
+# Scans are throttled to one per 50ms.
+_OVERLAY_JS = """
+((rules, binding) => {
+  if (window.__cuaOverlays) return;
+  window.__cuaOverlays = true;
+  const report = (name) => { try { window[binding](name); } catch (e) {} };
+  const hide = rules.filter((r) => r.action === 'hide');
+  const click = rules.filter((r) => r.action === 'click');
+
+  const css = hide.map((r) => r.selector).join(',\\n')
+    + ' { display: none !important; visibility: hidden !important; pointer-events: none !important; }';
+  const addStyle = () => {
+    const style = document.createElement('style');
+    style.textContent = css;
+    (document.head || document.documentElement).appendChild(style);
+  };
+  if (hide.length && document.documentElement) addStyle();
+  else if (hide.length) new MutationObserver((_, obs) => {
+    if (document.documentElement) { obs.disconnect(); addStyle(); }
+  }).observe(document, {childList: true});
+
+  const unlock = () => {
+    for (const el of [document.documentElement, document.body]) {
+      if (el && getComputedStyle(el).overflow === 'hidden') el.style.setProperty('overflow', 'auto', 'important');
+    }
+  };
+  const handled = new WeakSet();
+  const hidden = new WeakSet();  // click-rule overlays hidden while waiting for their button
+  const scan = () => {
+    for (const rule of hide) {
+      for (const el of document.querySelectorAll(rule.selector)) {
+        if (handled.has(el)) continue;
+        handled.add(el);
+        report(rule.name);
+        if (rule.unlock_scroll) unlock();
+      }
+    }
+    for (const rule of click) {
+      for (const el of document.querySelectorAll(rule.selector)) {
+        if (handled.has(el)) continue;
+        const button = el.querySelector(rule.click) || document.querySelector(rule.click);
+        if (!button) {
+          if (rule.fallback === 'hide' && !hidden.has(el)) {
+            hidden.add(el);
+            el.style.setProperty('display', 'none', 'important');
+            report(rule.name);
+            if (rule.unlock_scroll) unlock();
+          }
+          continue;
+        }
+        handled.add(el);
+        button.click();
+        if (!hidden.has(el)) report(rule.name);
+        if (rule.unlock_scroll) unlock();
+      }
+    }
+  };
+  let pending = false;
+  const schedule = () => {
+    if (pending) return;
+    pending = true;
+    setTimeout(() => { pending = false; scan(); }, 50);
+  };
+  new MutationObserver(schedule).observe(document, {childList: true, subtree: true});
+  schedule();
+})
+"""
+
+
+def load_overlay_rules(path: str | None = None) -> list[dict]:
+    """Rules from `path`, $CUA_OVERLAY_RULES or the bundled overlay_rules.json."""
+    path = path or os.getenv("CUA_OVERLAY_RULES") or DEFAULT_RULES_FILE
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)["rules"]
+    for rule in rules:
+        if rule.get("action") not in ("hide", "click") or not rule.get("selector"):
+            raise ValueError(f"bad overlay rule in {path}: {rule}")
+        if rule["action"] == "click" and not rule.get("click"):
+            raise ValueError(f"click rule {rule.get('name')!r} in {path} needs a 'click' selector")
+        if rule.get("fallback") not in (None, "hide"):
+            raise ValueError(f"rule {rule.get('name')!r} in {path}: the only fallback is 'hide'")
+    return rules
+
+
+def overlay_init_script(rules: list[dict]) -> str:
+    return f"{_OVERLAY_JS.strip()}({json.dumps(rules)}, {json.dumps(BINDING_NAME)})"
+
+
+class OverlayCounter:
+    """Per-session count of suppressed overlays, by rule name."""
+
+    def __init__(self):
+        self.by_rule: Counter[str] = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_rule.values())
+
+    def record(self, source, rule_name: str) -> None:
+        """Binding callback: `source` is Playwright's {context, page, frame}."""
+        self.by_rule[str(rule_name)] += 1
+
+    def format(self) -> str:
+        if not self.by_rule:
+            return "Overlays suppressed: 0"
+        details = ", ".join(f"{name} {count}" for name, count in self.by_rule.most_common())
+        return f"Overlays suppressed: {self.total} ({details})"
@@ -0,0 +1,194 @@
+import re
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# Runs at document start in each top-level document. Buffered observers
+# catch entries from before the script ran; `since` holds what happened after
+# the previous snapshot, so each action gets its own shift/latency numbers.
+PAGE_PERF_JS = """
+(() => {
+  if (window.__cuaPerf || window !== window.top) return;
+  const fresh = () => ({cls: 0, inp: 0, longTasks: 0, longTaskMs: 0});
+  const perf = window.__cuaPerf = {lcp: null, lcpElement: null, cls: 0, inp: 0, longTasks: 0, longTaskMs: 0, since: fresh()};
+  const observe = (type, onEntry, options) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(onEntry))
+        .observe({type, buffered: true, ...options});
+    } catch (e) {}  // entry type not supported by this browser
+  };
+  observe('largest-contentful-paint', (e) => {
+    perf.lcp = e.startTime;
+    perf.lcpElement = e.element ? e.element.tagName.toLowerCase() : null;
+  });
+  // CLS is the largest session window: shifts less than 1s apart, at most 5s long
+  let windowValue = 0, windowStart = 0, windowLast = -Infinity;
+  observe('layout-shift', (e) => {
+    if (e.hadRecentInput) return;
+    if (e.startTime - windowLast < 1000 && e.startTime - windowStart < 5000) windowValue += e.value;
+    else { windowValue = e.value; windowStart = e.startTime; }
+    windowLast = e.startTime;
+    perf.cls = Math.max(perf.cls, windowValue);
+    perf.since.cls += e.value;
+  });
+  // INP-style: the slowest interaction (input delay + handlers + next paint)
+  const interaction = (e) => {
+    perf.inp = Math.max(perf.inp, e.duration);
+    perf.since.inp = Math.max(perf.since.inp, e.duration);
+  };
+  observe('event', (e) => { if (e.interactionId) interaction(e); }, {durationThreshold: 16});
+  observe('first-input', interaction);
+  observe('longtask', (e) => {
+    perf.longTasks += 1;
+    perf.longTaskMs += e.duration;
+    perf.since.longTasks += 1;
+    perf.since.longTaskMs += e.duration;
+  });
+  perf.reset = () => { perf.since = fresh(); };
+})();
+"""
+
+# One snapshot of the current document; resets the per-action counters.
+COLLECT_PAGE_PERF_JS = """
+() => {
+  const ms = (x) => (x == null || x < 0 ? null : Math.round(x));
+  const nav = performance.getEntriesByType('navigation')[0];
+  const byType = {};
+  let bytes = 0, slowest = null;
+  for (const r of performance.getEntriesByType('resource')) {
+    const t = byType[r.initiatorType] || (byType[r.initiatorType] = {count: 0, bytes: 0});
+    t.count += 1;
+    t.bytes += r.transferSize || 0;
+    bytes += r.transferSize || 0;
+    if (!slowest || r.duration > slowest.duration) slowest = r;
+  }
+  const perf = window.__cuaPerf;
+  const snapshot = {
+    url: location.href,
+    time_origin: Math.round(performance.timeOrigin),
+    navigation: nav ? {
+      type: nav.type,
+      ttfb_ms: ms(nav.responseStart),
+      dom_content_loaded_ms: ms(nav.domContentLoadedEventEnd) || null,
+      load_ms: ms(nav.loadEventEnd) || null,
+      transfer_bytes: nav.transferSize || 0,
+    } : null,
+    resources: {
+      count: Object.values(byType).reduce((n, t) => n + t.count, 0),
+      transfer_bytes: bytes,
+      by_type: byType,
+      slowest: slowest ? {url: slowest.name.slice(0, 200), ms: ms(slowest.duration)} : null,
+    },
+    lcp_ms: perf ? ms(perf.lcp) : null,
+    lcp_element: perf ? perf.lcpElement : null,
+    cls: perf ? Math.round(perf.cls * 1e4) / 1e4 : null,
+    inp_ms: perf ? ms(perf.inp) : null,
+    long_tasks: perf ? perf.longTasks : null,
+    long_task_ms: perf ? ms(perf.longTaskMs) : null,
+    since_last: perf ? {
+      cls: Math.round(perf.since.cls * 1e4) / 1e4,
+      inp_ms: ms(perf.since.inp),
+      long_tasks: perf.since.longTasks,
+      long_task_ms: ms(perf.since.longTaskMs),
+    } : null,
+  };
+  if (perf) perf.reset();
+  return snapshot;
+}
+"""
+
+# Path segments with a run of 3+ digits (product/category ids) are collapsed
+_ID_SEGMENT = re.compile(r"^[^.]*\d{3,}[^.]*")
+
+
+def url_pattern(url: str) -> str:
+    """Host and path with id-bearing segments replaced by `*`; the query is dropped."""
+    parts = urlsplit(url)
+    segments = [_ID_SEGMENT.sub("*", segment) for segment in parts.path.split("/")]
+    return parts.netloc + ("/".join(segments) or "/")
+
+
+class PagePerfLog:
+    """
+    Page performance snapshots for one session: one per action or function
+    call, each tagged with whether it is the first from a new document (a
+    navigation). Summaries use the last snapshot of each document, since
+    LCP and CLS keep updating while the page is in use.
+    """
+
+    def __init__(self):
+        self.records: list[dict] = []
+        self._last_document = None
+
+    def record(self, snapshot: dict, action: str | None = None) -> dict:
+        document = snapshot.get("time_origin")
+        record = {
+            "at": time.time(),
+            "action": action,
+            "pattern": url_pattern(snapshot["url"]),
+            "new_document": document != self._last_document,
+            **snapshot,
+        }
+        self._last_document = document
+        self.records.append(record)
+        return record
+
+    def summary(self) -> dict[str, dict]:
+        """Per URL pattern: navigation count, p50/p95 page timings and per-action latency."""
+        documents: dict[tuple, dict] = {}
+        actions = defaultdict(list)
+        for record in self.records:
+            documents[(record["pattern"], record["time_origin"])] = record
+            if record.get("since_last"):
+                actions[record["pattern"]].append(record["since_last"])
+
+        by_pattern = defaultdict(list)
+        for (pattern, _), record in documents.items():
+            by_pattern[pattern].append(record)
+
+        summary = {}
+        for pattern, records in sorted(by_pattern.items()):
+            navigations = [r["navigation"] for r in records if r.get("navigation")]
+            summary[pattern] = {
+                "navigations": len(records),
+                "ttfb_ms": _percentiles(n["ttfb_ms"] for n in navigations),
+                "load_ms": _percentiles(n["load_ms"] for n in navigations),
+                "lcp_ms": _percentiles(r["lcp_ms"] for r in records),
+                "cls": _percentiles(r["cls"] for r in records),
+                "transfer_bytes": _percentiles(r["resources"]["transfer_bytes"] for r in records),
+                "actions": len(actions[pattern]),
+                "action_inp_ms": _percentiles(a["inp_ms"] for a in actions[pattern]),
+                "long_task_ms": sum(a["long_task_ms"] or 0 for a in actions[pattern]),
+            }
+        return summary
+
+    def format(self) -> str:
+        summary = self.summary()
+        if not summary:
+            return "Page performance: no samples"
+        lines = [f"Page performance: {len(self.records)} snapshots, {len(summary)} URL patterns"]
+        for pattern, s in summary.items():
+            lines.append(
+                f"  {pattern}: {s['navigations']} loads, "
+                f"TTFB {_format_p(s['ttfb_ms'], 'ms')}, load {_format_p(s['load_ms'], 'ms')}, "
+                f"LCP {_format_p(s['lcp_ms'], 'ms')}, CLS {_format_p(s['cls'])}, "
+                f"INP {_format_p(s['action_inp_ms'], 'ms')} over {s['actions']} actions, "
+                f"long tasks {s['long_task_ms']}ms"
+            )
+        return "\n".join(lines)
+
+
+def _percentiles(values) -> dict | None:
+    import numpy as np
+
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    p50, p95 = np.percentile(values, [50, 95])
+    return {"p50": round(float(p50), 4), "p95": round(float(p95), 4), "n": len(values)}
+
+
+def _format_p(p: dict | None, unit: str = "") -> str:
+    if not p:
+        return "-"
+    return f"p50 {p['p50']:g}{unit}/p95 {p['p95']:g}{unit}"
@@ -0,0 +1,534 @@
+import time
+import base64
+import asyncio
+import inspect
+from typing import List, Dict, Literal
+from steps import steps
+from utils import BLOCKLIST
+from telemetry import TELEMETRY
+from .stability import SettleHistogram, frame_from_image_bytes, frame_diff
+from .extraction import EXTRACT_LISTING_JS, ListingCache, fit_to_budget
+from .overlays import BINDING_NAME, OverlayCounter, load_overlay_rules, overlay_init_script
+from .input_engine import PLAIN_TEXT_FIELD_JS, can_insert, chord, drag_segments
+from .page_perf import COLLECT_PAGE_PERF_JS, PAGE_PERF_JS, PagePerfLog
+from .prefetch import DEFAULT_LINK_PATTERN, PREFETCH_JS, PrefetchStats
+
+# Optional: key mapping if your model uses "CUA" style keys
+CUA_KEY_TO_PLAYWRIGHT_KEY = {
+    "/": "Divide",
+    "\\": "Backslash",
+    "alt": "Alt",
+    "arrowdown": "ArrowDown",
+    "arrowleft": "ArrowLeft",
+    "arrowright": "ArrowRight",
+    "arrowup": "ArrowUp",
+    "backspace": "Backspace",
+    "capslock": "CapsLock",
+    "cmd": "Meta",
+    "ctrl": "Control",
+    "delete": "Delete",
+    "end": "End",
+    "enter": "Enter",
+    "esc": "Escape",
+    "home": "Home",
+    "insert": "Insert",
+    "option": "Alt",
+    "pagedown": "PageDown",
+    "pageup": "PageUp",
+    "shift": "Shift",
+    "space": " ",
+    "super": "Meta",
+    "tab": "Tab",
+    "win": "Meta",
+}
+
+
+class PlaywrightComputerCore:
+    """
+    Settings, state and actions shared by `BasePlaywrightComputer` (sync API)
+    and `AsyncBasePlaywrightComputer` (async API). Actions are `@steps`
+    generators that yield every Playwright call (see `steps.py`); each
+    subclass runs them with its own API, so there is one body per action.
+    Imports neither Playwright API.
+    """
+
+    environment: Literal["browser"] = "browser"
+    dimensions = (1024, 768)
+    start_url = None  # opened once the context is instrumented; None: about:blank
+
+    # Post-action settling: poll low-res frames until they stop changing.
+    settle_after_actions = True
+    settle_timeout_ms = 3000
+    settle_poll_ms = 100
+    settle_threshold = 0.002  # mean abs diff of 0..1 grayscale pixels
+    settle_stable_polls = 2
+    network_idle_ceiling_ms = 1000  # once the network is this quiet, stop waiting for changing frames
+
+    # Input: "fast" presses key chords in one call, drags each straight segment
+    # in one interpolated move and inserts text into plain fields in one input
+    # event; "events" sends every key and mouse event separately.
+    input_fidelity = "fast"
+    drag_tolerance_px = 2  # drag points this close to a straight line are dropped
+    drag_step_px = 20  # one interpolated mouse event per ~20px of a drag segment
+
+    # Blocklists up to this size are pushed down to Playwright as one route regex
+    max_pushdown_domains = 2000
+
+    # Hide/dismiss popups, consent banners and chat widgets at document start
+    suppress_overlays = True
+    overlay_rules_file = None  # None: $CUA_OVERLAY_RULES or overlay_rules.json
+
+    # Navigation Timing, LCP, CLS, interaction latency and long tasks per document
+    collect_page_perf = True
+
+    # Speculative prefetch while the model is thinking: visible product/result
+    # links (regex over the URL) are warmed into the HTTP cache, a few per turn,
+    # until the session has spent the byte budget
+    speculative_prefetch = False
+    prefetch_link_pattern = DEFAULT_LINK_PATTERN
+    prefetch_max_links = 4
+    prefetch_budget_bytes = 10_000_000
+
+    # extract_listing(): output cap, per-URL cache lifetime (input and navigation
+    # actions clear the cache), records read per page
+    listing_max_tokens = 1500
+    listing_cache_ttl_s = 60
+    listing_scan_items = 100
+
+    # open_in_tabs(): most tabs per call, per-tab load timeout
+    max_tabs = 6
+    tab_load_timeout_ms = 15000
+
+    # capture_page(): tallest capture (in viewports), pause per scroll step for lazy content
+    max_overview_viewports = 12
+    lazy_scroll_wait_ms = 150
+
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._page = None
+        self._inflight_requests = 0
+        self._last_network_activity = time.monotonic()
+        self.settle_histogram = SettleHistogram()
+        self.listing_cache = ListingCache(self.listing_cache_ttl_s)
+        self.overlays = OverlayCounter()
+        self.perf_log = PagePerfLog()
+        self.prefetch = PrefetchStats()
+
+    @steps
+    def _open(self):
+        """Get the browser and page from the subclass hook and instrument the context."""
+        self._browser, self._page = yield self._get_browser_and_page()
+
+        yield self._install_blocklist(self._page)
+        if self.suppress_overlays:
+            yield self._install_overlay_suppression(self._page.context)
+        if self.collect_page_perf:
+            yield self._install_page_perf(self._page.context)
+
+        # Track in-flight requests on the context so settle() can see network idle
+        context = self._page.context
+        context.on("request", self._on_request_started)
+        context.on("requestfinished", self._on_request_finished)
+        context.on("requestfailed", self._on_request_done)
+
+        if self.start_url:
+            yield self.goto(self.start_url)
+
+    @steps
+    def _close(self):
+        if self._browser:
+            # close contexts first so recordings (HAR, video) are flushed
+            for context in self._browser.contexts:
+                yield context.close()
+            yield self._browser.close()
+
+    @property
+    def page(self):
+        """The active Playwright page, for tools that need more than the Computer actions."""
+        return self._page
+
+    @steps
+    def get_current_url(self) -> str:
+        return self._page.url
+
+    # --- Common "Computer" actions ---
+    @steps
+    def screenshot(self) -> str:
+        """Capture only the viewport (not full_page), in CSS pixels."""
+        png_bytes = yield self._page.screenshot(full_page=False, scale="css")
+        return base64.b64encode(png_bytes).decode("utf-8")
+
+    @steps
+    def quick_screenshot(self) -> str:
+        """Low-quality JPEG of the viewport, for intermediate calls of a coalesced burst."""
+        jpeg_bytes = yield self._page.screenshot(full_page=False, scale="css", type="jpeg", quality=40)
+        return base64.b64encode(jpeg_bytes).decode("utf-8")
+
+    @steps
+    def click(self, x: int, y: int, button: str = "left") -> None:
+        self.listing_cache.clear()
+        match button:
+            case "back":
+                yield self.back()
+            case "forward":
+                yield self.forward()
+            case "wheel":
+                yield self._page.mouse.wheel(x, y)
+            case _:
+                button_mapping = {"left": "left", "right": "right"}
+                button_type = button_mapping.get(button, "left")
+                yield self._page.mouse.click(x, y, button=button_type)
+
+    @steps
+    def double_click(self, x: int, y: int) -> None:
+        self.listing_cache.clear()
+        yield self._page.mouse.dblclick(x, y)
+
+    @steps
+    def scroll(self, x: int, y: int, scroll_x: int, scroll_y: int) -> None:
+        self.listing_cache.clear()
+        yield self._page.mouse.move(x, y)
+        yield self._page.evaluate(f"window.scrollBy({scroll_x}, {scroll_y})")
+
+    @steps
+    def type(self, text: str) -> None:
+        """Plain text fields get `insert_text`; anything else is typed key by key."""
+        self.listing_cache.clear()
+        if (
+            self.input_fidelity == "fast"
+            and can_insert(text)
+            and (yield self._page.evaluate(PLAIN_TEXT_FIELD_JS))
+        ):
+            yield self.insert_text(text)
+        else:
+            yield self._page.keyboard.type(text)
+
+    @steps
+    def insert_text(self, text: str) -> None:
+        """
+        Insert text into the focused field as one input event per line (no
+        key events), pressing Enter between lines.
+        """
+        self.listing_cache.clear()
+        for i, line in enumerate(text.split("\n")):
+            if i:
+                yield self._page.keyboard.press("Enter")
+            if line:
+                yield self._page.keyboard.insert_text(line)
+
+    @steps
+    def wait(self, ms: int = 1000) -> None:
+        """Wait up to `ms`, returning early only once the page is visually stable."""
+        yield self.settle(timeout_ms=ms, network_cap=False)
+
+    @steps
+    def move(self, x: int, y: int) -> None:
+        yield self._page.mouse.move(x, y)
+
+    @steps
+    def keypress(self, keys: List[str]) -> None:
+        self.listing_cache.clear()
+        mapped_keys = [CUA_KEY_TO_PLAYWRIGHT_KEY.get(key.lower(), key) for key in keys]
+        if self.input_fidelity == "fast":
+            yield self._page.keyboard.press(chord(mapped_keys))
+            return
+        for key in mapped_keys:
+            yield self._page.keyboard.down(key)
+        for key in reversed(mapped_keys):
+            yield self._page.keyboard.up(key)
+
+    @steps
+    def drag(self, path: List[Dict[str, int]]) -> None:
+        self.listing_cache.clear()
+        if not path:
+            return
+        yield self._page.mouse.move(path[0]["x"], path[0]["y"])
+        yield self._page.mouse.down()
+        if self.input_fidelity == "fast":
+            for x, y, moves in drag_segments(path, self.drag_tolerance_px, self.drag_step_px):
+                yield self._page.mouse.move(x, y, steps=moves)
+        else:
+            for point in path[1:]:
+                yield self._page.mouse.move(point["x"], point["y"])
+        yield self._page.mouse.up()
+
+    # --- Extra browser-oriented actions ---
+    @steps
+    def goto(self, url: str) -> None:
+        self.listing_cache.clear()
+        try:
+            return (yield self._page.goto(url))
+        except Exception as e:
+            print(f"Error navigating to {url}: {e}")
+
+    @steps
+    def back(self) -> None:
+        self.listing_cache.clear()
+        return self._page.go_back()
+
+    @steps
+    def forward(self) -> None:
+        self.listing_cache.clear()
+        return self._page.go_forward()
+
+    # --- Structured extraction ---
+    @steps
+    def extract_listing(self, max_tokens: int | None = None, fresh: bool = False) -> dict:
+        """
+        Read the current Wayfair results or product page into JSON records (name,
+        price, rating, review_count, shipping, url) in one in-page pass, capped
+        to about `max_tokens`. Cached per URL for `listing_cache_ttl_s`, until
+        the next action that may change the page, unless `fresh`.
+        """
+        url = self._page.url
+        listing = None if fresh else self.listing_cache.get(url)
+        cached = listing is not None
+        if not cached:
+            listing = yield self._page.evaluate(EXTRACT_LISTING_JS, self.listing_scan_items)
+            self.listing_cache.put(url, listing)
+        budget = self.listing_max_tokens if max_tokens is None else max_tokens
+        return {"url": url, "cached": cached, **fit_to_budget(listing, budget)}
+
+    # --- Multi-page capture ---
+    @steps
+    def open_in_tabs(self, urls: List[str], composite: bool = True) -> dict:
+        """
+        Load up to `max_tabs` URLs in parallel tabs of this context, capture
+        each viewport and close the tabs again. Returns per-tab url/title/status
+        and `images`: one numbered grid (`composite`) or one image per tab.
+        """
+        context = self._page.context
+        current = self._page
+        tabs, loaded = [], []
+        try:
+            # start every navigation before waiting on any of them
+            for url in urls[: self.max_tabs]:
+                tab = {"n": len(tabs) + 1, "url": url}
+                tabs.append(tab)
+                if BLOCKLIST.is_blocked_url(url):
+                    tab["error"] = "blocked domain"
+                    continue
+                page = yield context.new_page()
+                self._page = current  # the new-page handler makes every tab current
+                yield self._install_blocklist(page)
+                try:
+                    response = yield page.goto(url, wait_until="commit", timeout=self.tab_load_timeout_ms)
+                    tab["status"] = response.status if response else None
+                    loaded.append((tab, page))
+                except Exception as e:
+                    tab["error"] = f"{type(e).__name__}: {e}"
+                    yield page.close()
+
+            screenshots = []
+            for tab, page in loaded:
+                try:
+                    yield page.wait_for_load_state("load", timeout=self.tab_load_timeout_ms)
+                except Exception:
+                    tab["note"] = "captured before load finished"
+                tab["url"], tab["title"] = page.url, (yield page.title())
+                screenshots.append((tab, (yield page.screenshot(scale="css"))))
+        finally:
+            for _, page in loaded:
+                yield page.close()
+            self._page = current
+
+        from .imaging import tab_capture_result  # PIL, only needed by the capture tools
+
+        return tab_capture_result(tabs, screenshots, composite)
+
+    @steps
+    def capture_page(self, max_tiles: int = 4, overview: bool = False, lazy: bool = True) -> dict:
+        """
+        Read a long page in one call: one full-page capture, cut server-side into
+        viewport-sized tiles from the top (at most `max_tiles`), or a single
+        downscaled `overview` of the page. With `lazy`, the page is scrolled
+        through first so lazy-loaded content is rendered. The scroll position
+        is restored afterwards.
+        """
+        max_tiles = max(1, min(max_tiles, self.max_overview_viewports))
+        viewport_height = self._page.viewport_size["height"]
+        limit = viewport_height * (self.max_overview_viewports if overview else max_tiles)
+        scroll_y = yield self._page.evaluate("window.scrollY")
+        if lazy:
+            for y in range(0, min((yield self._page_height()), limit), viewport_height):
+                yield self._page.evaluate(f"window.scrollTo(0, {y})")
+                yield self._page.wait_for_timeout(self.lazy_scroll_wait_ms)
+        page_height = yield self._page_height()
+        width = self._page.viewport_size["width"]
+        png = yield self._page.screenshot(
+            full_page=True, scale="css", clip={"x": 0, "y": 0, "width": width, "height": min(page_height, limit)}
+        )
+        yield self._page.evaluate(f"window.scrollTo(0, {scroll_y})")
+        from .imaging import page_capture_result
+
+        result = page_capture_result(png, page_height, viewport_height, max_tiles, overview)
+        return {"url": self._page.url, **result}
+
+    @steps
+    def _page_height(self) -> int:
+        return self._page.evaluate("document.documentElement.scrollHeight")
+
+    # --- Page performance ---
+    @steps
+    def page_perf(self, action: str | None = None) -> dict | None:
+        """
+        Snapshot the current document's timings (see `page_perf.py`) into
+        `perf_log`. Returns the record, or None if the page couldn't be read
+        (e.g. mid-navigation).
+        """
+        try:
+            snapshot = yield self._page.evaluate(COLLECT_PAGE_PERF_JS)
+        except Exception:
+            return None
+        return self.perf_log.record(snapshot, action)
+
+    # --- Speculative prefetch ---
+    @steps
+    def prefetch_visible_links(self) -> list[str]:
+        """
+        Warm the likeliest next pages (see `prefetch.py`) while the model
+        decides; call right before the model request. Returns the URLs issued.
+        """
+        if not self.prefetch.within_budget(self.prefetch_budget_bytes):
+            return []
+        try:
+            urls = yield self._page.evaluate(
+                PREFETCH_JS,
+                {"pattern": self.prefetch_link_pattern, "maxLinks": self.prefetch_max_links},
+            )
+        except Exception:  # mid-navigation; try again next turn
+            return []
+        return self.prefetch.record(urls)
+
+    # --- Visual stability ---
+    @steps
+    def settle(self, timeout_ms: int | None = None, network_cap: bool = True) -> float:
+        """
+        Block until the viewport stops changing (`settle_stable_polls` unchanged
+        polls in a row). Only a stable viewport ends the wait early; the network
+        just caps it: once no request has been in flight for
+        `network_idle_ceiling_ms` (counted from the call), frames that still
+        change are taken for animation (unless `network_cap` is False).
+        Otherwise waits up to `timeout_ms`. Returns elapsed ms.
+        """
+        timeout_ms = self.settle_timeout_ms if timeout_ms is None else timeout_ms
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        reason = "timeout"
+        stable_polls = 0
+        previous = yield self._capture_frame()
+        while previous is not None:
+            limit = self._wait_limit(start, deadline) if network_cap else deadline
+            remaining_ms = (limit - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                reason = "network_idle" if limit < deadline else "timeout"
+                break
+            # wait_for_timeout (not time.sleep) so network events keep flowing
+            yield self._page.wait_for_timeout(min(self.settle_poll_ms, remaining_ms))
+            frame = yield self._capture_frame()
+            if frame is None:
+                break
+            if frame_diff(previous, frame) <= self.settle_threshold:
+                stable_polls += 1
+                if stable_polls >= self.settle_stable_polls:
+                    reason = "stable"
+                    break
+            else:
+                stable_polls = 0
+            previous = frame
+
+        elapsed_ms = (time.monotonic() - start) * 1000
+        self.settle_histogram.record(elapsed_ms, reason)
+        return elapsed_ms
+
+    @steps
+    def _capture_frame(self):
+        """Cheap low-quality JPEG capture, reduced to a tiny grayscale frame."""
+        if self._page is None:
+            return None
+        jpeg_bytes = yield self._page.screenshot(type="jpeg", quality=25, scale="css", caret="initial")
+        return frame_from_image_bytes(jpeg_bytes)
+
+    def _wait_limit(self, start: float, deadline: float) -> float:
+        """`deadline`, or `network_idle_ceiling_ms` after the network went quiet (not before `start`)."""
+        if self._inflight_requests > 0:
+            return deadline
+        quiet_since = max(self._last_network_activity, start)
+        return min(deadline, quiet_since + self.network_idle_ceiling_ms / 1000)
+
+    def _on_request_started(self, request) -> None:
+        if self.prefetch.issued:
+            if self.prefetch.is_prefetch(request):
+                return  # idle-priority background fetch, not the page settling
+            if request.is_navigation_request() and _is_main_frame(request):
+                self.prefetch.navigation(request.url)
+        self._inflight_requests += 1
+        self._last_network_activity = time.monotonic()
+
+    def _on_request_finished(self, request) -> None:
+        if self.prefetch.issued and self.prefetch.is_prefetch(request):
+            # the budget counts what the network actually delivered, including
+            # prefetches of pages the agent has since left
+            sizes = request.sizes()  # a coroutine with the async API
+            if inspect.isawaitable(sizes):
+                asyncio.ensure_future(sizes).add_done_callback(self._prefetch_transferred)
+            else:
+                self.prefetch.transferred(sizes)
+        self._on_request_done(request)
+
+    def _prefetch_transferred(self, task) -> None:
+        if not task.cancelled() and task.exception() is None:
+            self.prefetch.transferred(task.result())
+
+    def _on_request_done(self, request) -> None:
+        if self.prefetch.issued and self.prefetch.is_prefetch(request):
+            return
+        self._inflight_requests = max(self._inflight_requests - 1, 0)
+        self._last_network_activity = time.monotonic()
+
+    @steps
+    def _install_blocklist(self, page):
+        """Set up network interception to flag URLs matching domains in the blocklist."""
+
+        # Returns what route.abort()/fallback() return: nothing with the sync
+        # API, a coroutine the async API awaits.
+        def handle_route(route, request):
+            url = request.url
+            if BLOCKLIST.is_blocked_url(url):
+                print(f"Flagging blocked domain: {url}")
+                TELEMETRY.count("blocked_requests")
+                return route.abort()
+            return route.fallback()  # lets context-level routes (e.g. HAR replay) run
+
+        # Small lists become one regex matched by the Playwright driver, so only
+        # blocked requests reach Python; large lists use the cached Python lookup.
+        blocked_pattern = BLOCKLIST.route_pattern(self.max_pushdown_domains)
+        yield page.route(blocked_pattern or "**/*", handle_route)
+
+    @steps
+    def _install_overlay_suppression(self, context):
+        """Run the overlay rules in every document of the context, counting suppressions."""
+        script = overlay_init_script(load_overlay_rules(self.overlay_rules_file))
+        yield context.expose_binding(BINDING_NAME, self.overlays.record)
+        yield context.add_init_script(script)
+        for page in context.pages:  # already loaded (e.g. a pre-navigated pool page)
+            yield page.evaluate(script)
+
+    @steps
+    def _install_page_perf(self, context):
+        yield context.add_init_script(PAGE_PERF_JS)
+        for page in context.pages:
+            yield page.evaluate(PAGE_PERF_JS)
+
+    # --- Subclass hook ---
+    def _get_browser_and_page(self):
+        """Subclasses must implement, returning (Browser, Page) (awaitable for the async API)."""
+        raise NotImplementedError
+
+
+def _is_main_frame(request) -> bool:
+    try:
+        return request.frame.parent_frame is None
+    except Exception:  # e.g. service worker requests have no frame
+        return False
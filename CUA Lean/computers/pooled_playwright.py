@@ -0,0 +1,48 @@
+from playwright.sync_api import Browser, Page
+from .browser_pool import BrowserPool, AsyncBrowserPool
+from .local_playwright import LocalPlaywrightComputer
+from .async_local_playwright import AsyncLocalPlaywrightComputer
+
+
+class PooledPlaywrightComputer(LocalPlaywrightComputer):
+    """Borrows a fresh context from a `BrowserPool` instead of launching Chromium."""
+
+    def __init__(self, pool: BrowserPool):
+        super().__init__(profile=pool.profile)
+        self._pool = pool
+        self._context = None
+
+    def __enter__(self):
+        self._playwright = self._pool.playwright  # the pool owns the driver
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._context:
+            self._pool.release(self._context)
+            self._context = None
+
+    def _get_browser_and_page(self) -> tuple[Browser, Page]:
+        browser, self._context, page = self._pool.acquire()
+        self._context.on("page", self._handle_new_page)
+        page.on("close", self._handle_page_close)
+        return browser, page
+
+
+class AsyncPooledPlaywrightComputer(AsyncLocalPlaywrightComputer):
+    """Async `PooledPlaywrightComputer`, backed by an `AsyncBrowserPool`."""
+
+    def __init__(self, pool: AsyncBrowserPool):
+        super().__init__(playwright=pool.playwright, profile=pool.profile)
+        self._pool = pool
+        self._context = None
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._context:
+            await self._pool.release(self._context)
+            self._context = None
+
+    async def _get_browser_and_page(self):
+        browser, self._context, page = await self._pool.acquire()
+        self._context.on("page", self._handle_new_page)
+        page.on("close", self._handle_page_close)
+        return browser, page
@@ -0,0 +1,90 @@
+from collections import Counter
+from telemetry import TELEMETRY
+
+# Wayfair product pages, category/search result pages and result pagination
+DEFAULT_LINK_PATTERN = r"/pdp/|/sb\d/|keyword\.php|[?&]curpage="
+
+# Adds <link rel=prefetch> for the largest visible same-origin links matching
+# `pattern` (product tiles before text links), so the browser fetches them
+# into its HTTP cache at idle priority. Nothing is rendered, so the page looks
+# the same. Returns the URLs issued.
+PREFETCH_JS = """
+({pattern, maxLinks}) => {
+  const state = window.__cuaPrefetch || (window.__cuaPrefetch = {urls: new Set()});
+  const re = new RegExp(pattern);
+  const here = location.href.split('#')[0];
+  const candidates = new Map();
+  for (const a of document.querySelectorAll('a[href]')) {
+    const url = a.href.split('#')[0];
+    if (a.origin !== location.origin || url === here || state.urls.has(url) || !re.test(url)) continue;
+    const box = a.getBoundingClientRect();
+    const w = Math.min(box.right, innerWidth) - Math.max(box.left, 0);
+    const h = Math.min(box.bottom, innerHeight) - Math.max(box.top, 0);
+    if (w > 0 && h > 0) candidates.set(url, Math.max(candidates.get(url) || 0, w * h));
+  }
+  const urls = [...candidates].sort((a, b) => b[1] - a[1]).slice(0, maxLinks).map(([url]) => url);
+  for (const url of urls) {
+    const link = document.createElement('link');
+    link.rel = 'prefetch';
+    link.as = 'document';
+    link.href = url;
+    document.head.appendChild(link);
+    state.urls.add(url);
+  }
+  return urls;
+}
+"""
+
+
+class PrefetchStats:
+    """
+    Speculative prefetches of one session: URLs issued, bytes spent (counted
+    from each finished prefetch request, whichever page issued it) and, for
+    each main-frame navigation after the first prefetch, whether its URL had
+    been prefetched (hit) or not (miss).
+    """
+
+    def __init__(self):
+        self.issued: set[str] = set()
+        self.used: set[str] = set()  # prefetched URLs that were navigated to
+        self.bytes = 0
+        self.counts = Counter()  # hits, misses
+
+    def within_budget(self, budget_bytes: int) -> bool:
+        return self.bytes < budget_bytes
+
+    def record(self, urls: list[str]) -> list[str]:
+        """Account one PREFETCH_JS result; returns the newly issued URLs."""
+        self.issued.update(urls)
+        if urls:
+            TELEMETRY.count("prefetch_issued", len(urls))
+        return urls
+
+    def transferred(self, sizes: dict) -> None:
+        """Account a finished prefetch request's `request.sizes()`."""
+        self.bytes += sizes["responseHeadersSize"] + sizes["responseBodySize"]
+
+    def navigation(self, url: str) -> None:
+        if not self.issued:
+            return
+        url = url.split("#")[0]
+        outcome = "hits" if url in self.issued else "misses"
+        if outcome == "hits":
+            self.used.add(url)
+        self.counts[outcome] += 1
+        TELEMETRY.count(f"prefetch_{outcome}")
+
+    def is_prefetch(self, request) -> bool:
+        return request.resource_type == "prefetch" or (
+            request.url in self.issued and not request.is_navigation_request()
+        )
+
+    def format(self) -> str:
+        hits, misses = self.counts["hits"], self.counts["misses"]
+        navigations = hits + misses
+        rate = f", {100 * hits / navigations:.0f}% hit rate" if navigations else ""
+        return (
+            f"Prefetch: {len(self.issued)} URLs, {self.bytes / 1e6:.1f}MB, "
+            f"{hits} hits / {misses} misses over {navigations} navigations{rate}, "
+            f"{len(self.issued - self.used)} unused"
+        )
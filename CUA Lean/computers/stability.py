@@ -0,0 +1,79 @@
+import io
+import numpy as np
+
+# Frames are compared at this tiny size; enough to see layout shifts and
+# spinners, cheap enough to poll every ~100ms.
+FRAME_SIZE = (64, 48)
+
+
+def frame_from_image_bytes(image_bytes: bytes, size=FRAME_SIZE) -> np.ndarray:
+    """Decode a screenshot into a small grayscale float32 array in [0, 1]."""
+    from PIL import Image  # deferred: not needed until the first settle
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("L")
+    image = image.resize(size, Image.BILINEAR)
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def frame_diff(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute pixel difference between two frames (0 = identical)."""
+    return float(np.mean(np.abs(a - b)))
+
+
+class SettleHistogram:
+    """Bucketed settle times (ms), plus a count of why each settle returned."""
+
+    BUCKETS_MS = np.array([50, 100, 250, 500, 1000, 2000, 5000])
+
+    def __init__(self):
+        self.counts = np.zeros(len(self.BUCKETS_MS) + 1, dtype=np.int64)
+        self.reasons: dict[str, int] = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, reason: str) -> None:
+        self.counts[np.searchsorted(self.BUCKETS_MS, elapsed_ms, side="right")] += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def samples(self) -> int:
+        return int(self.counts.sum())
+
+    def summary(self) -> dict:
+        labels = [f"<{b}ms" for b in self.BUCKETS_MS] + [f">={self.BUCKETS_MS[-1]}ms"]
+        return {
+            "samples": self.samples,
+            "mean_ms": self.total_ms / self.samples if self.samples else 0.0,
+            "max_ms": self.max_ms,
+            "buckets": dict(zip(labels, self.counts.tolist())),
+            "reasons": dict(self.reasons),
+        }
+
+    def format(self) -> str:
+        summary = self.summary()
+        lines = [
+            f"Settle times: {summary['samples']} samples, "
+            f"mean {summary['mean_ms']:.0f}ms, max {summary['max_ms']:.0f}ms"
+        ]
+        peak = max(summary["buckets"].values()) or 1
+        for label, count in summary["buckets"].items():
+            bar = "#" * round(30 * count / peak)
+            lines.append(f"  {label:>9} {count:6d} {bar}")
+        lines.append(
+            "  reasons: " + ", ".join(f"{k}={v}" for k, v in summary["reasons"].items())
+        )
+        return "\n".join(lines)
+
+
+def average_hash(image_bytes: bytes, hash_size: int = 8) -> int:
+    """64-bit perceptual aHash: which cells of an 8x8 thumbnail are brighter than average."""
+    frame = frame_from_image_bytes(image_bytes, size=(hash_size, hash_size))
+    bits = np.packbits(frame.flatten() > frame.mean())
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Number of differing bits between two perceptual hashes."""
+    return (a ^ b).bit_count()
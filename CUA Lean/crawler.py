@@ -0,0 +1,431 @@
+"""Crawl Wayfair search results / categories into JSONL or Parquet product records."""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import time
+from urllib.parse import parse_qsl, quote_plus, urlencode, urlsplit, urlunsplit
+import numpy as np
+from agent.tools import WAYFAIR_URL
+from computers import (
+    LAUNCH_PROFILES,
+    AsyncBrowserPool,
+    AsyncPooledPlaywrightComputer,
+    get_launch_profile,
+)
+
+RECORD_FIELDS = [
+    "name", "sku", "price", "currency", "rating", "review_count", "shipping",
+    "in_stock", "url", "page_type", "source_url", "seed", "page", "crawled_at",
+]
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for dedup: lowercase host, no fragment, sorted query."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+def seed_url(seed: str) -> str:
+    """Seeds are category/search URLs or plain search queries."""
+    if seed.startswith(("http://", "https://")):
+        return seed
+    return f"{WAYFAIR_URL}/keyword.php?keyword={quote_plus(seed)}"
+
+
+class SeenSet:
+    """
+    URL dedup at 8 bytes per URL: 64-bit hashes in a sorted numpy array, with
+    recent additions buffered in a small set and merged in batches.
+    """
+
+    def __init__(self, merge_every: int = 4096):
+        self.merge_every = merge_every
+        self._sorted = np.empty(0, dtype=np.uint64)
+        self._recent: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent)
+
+    @staticmethod
+    def _hash(url: str) -> int:
+        digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def __contains__(self, url: str) -> bool:
+        h = self._hash(url)
+        if h in self._recent:
+            return True
+        i = np.searchsorted(self._sorted, np.uint64(h))
+        return i < len(self._sorted) and self._sorted[i] == h
+
+    def add(self, url: str) -> bool:
+        """Add `url`; False if it was already seen."""
+        if url in self:
+            return False
+        self._recent.add(self._hash(url))
+        if len(self._recent) >= self.merge_every:
+            self._merge()
+        return True
+
+    def _merge(self) -> None:
+        recent = np.fromiter(self._recent, dtype=np.uint64, count=len(self._recent))
+        self._sorted = np.union1d(self._sorted, recent)
+        self._recent.clear()
+
+    def save(self, path: str) -> None:
+        self._merge()
+        with open(path, "wb") as f:
+            np.save(f, self._sorted)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "SeenSet":
+        seen = cls(**kwargs)
+        seen._sorted = np.load(path)
+        return seen
+
+
+class HostLimiter:
+    """Per-host politeness: at most `per_host` requests in flight, `delay_s` apart."""
+
+    def __init__(self, per_host: int = 2, delay_s: float = 1.0):
+        self.per_host = per_host
+        self.delay_s = delay_s
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._last: dict[str, float] = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one of the host's slots around a page load."""
+        host = urlsplit(url).hostname or ""
+        slots = self._slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with slots:
+            async with self._locks.setdefault(host, asyncio.Lock()):
+                wait = self._last.get(host, 0) + self.delay_s - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last[host] = time.monotonic()
+            yield
+
+
+class JsonlSink:
+    """Appends records as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def checkpoint(self) -> None:
+        self.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    Writes records to Parquet in row groups of `batch_size` (needs pyarrow).
+    A Parquet file is only readable once its footer is written on close, so
+    `checkpoint()` closes the current part and the next write starts a new
+    one: `<name>.parquet`, then the next free `<name>.partN.parquet` (also
+    how a resumed crawl avoids overwriting earlier output).
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        types = {
+            "price": pa.float64(),
+            "rating": pa.float64(),
+            "review_count": pa.int64(),
+            "in_stock": pa.bool_(),
+            "page": pa.int64(),
+            "crawled_at": pa.float64(),
+        }
+        self.schema = pa.schema([(f, types.get(f, pa.string())) for f in RECORD_FIELDS])
+        self._pq = pq
+        self._stem = path[: -len(".parquet")] if path.endswith(".parquet") else path
+        self.path = self._next_part(path)  # the first part; `parts` lists them all
+        self.parts: list[str] = []
+        self.batch_size = batch_size
+        self._writer = None
+        self._batch: list[dict] = []
+
+    def _next_part(self, path: str) -> str:
+        part = 0
+        while os.path.exists(path):
+            part += 1
+            path = f"{self._stem}.part{part}.parquet"
+        return path
+
+    def write(self, record: dict) -> None:
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        columns = {}
+        for field in self.schema:
+            values = [r.get(field.name) for r in self._batch]
+            if self._pa.types.is_integer(field.type):
+                values = [None if v is None else int(v) for v in values]
+            columns[field.name] = self._pa.array(values, type=field.type)
+        if self._writer is None:
+            part = self.path if not self.parts else self._next_part(self.path)
+            self._writer = self._pq.ParquetWriter(part, self.schema)
+            self.parts.append(part)
+        self._writer.write_table(self._pa.table(columns, schema=self.schema))
+        self._batch = []
+
+    def checkpoint(self) -> None:
+        """Write out the batch and close the part, so everything so far is readable."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self) -> None:
+        self.checkpoint()
+
+
+def open_sink(path: str):
+    return ParquetSink(path) if path.endswith(".parquet") else JsonlSink(path)
+
+
+class CatalogCrawler:
+    """
+    Paginates seed searches/categories across `workers` pooled browser
+    contexts and yields product records as they are parsed (`crawl()` is an
+    async generator fed through a bounded queue, so nothing accumulates).
+
+    Listing pages follow their rel=next link up to `max_pages` per seed; with
+    `follow_products`, each product page is visited too. Every URL is
+    deduplicated by a `SeenSet`. `checkpoint()` saves the frontier and
+    seen-set; a crawler built with `resume=True` continues from them (records
+    written after the last checkpoint may be emitted again). A page stays in
+    the saved frontier until `crawl()` has yielded all of its records, so
+    checkpoint only once the records yielded so far are in the sink.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncBrowserPool,
+        seeds: list[str],
+        workers: int = 4,
+        max_pages: int = 20,
+        follow_products: bool = False,
+        limiter: HostLimiter | None = None,
+        checkpoint_path: str | None = None,
+        resume: bool = False,
+        max_items_per_page: int = 200,
+    ):
+        self.pool = pool
+        self.workers = workers
+        self.max_pages = max_pages
+        self.follow_products = follow_products
+        self.limiter = limiter or HostLimiter()
+        self.checkpoint_path = checkpoint_path
+        self.max_items_per_page = max_items_per_page
+        self.seen = SeenSet()
+        self.stats = {"pages": 0, "records": 0, "errors": 0, "duplicates": 0}
+        self._frontier: asyncio.Queue = asyncio.Queue()
+        self._pending: dict[str, dict] = {}  # enqueued, in flight or not all yielded, for checkpoints
+
+        if resume and checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                state = json.load(f)
+            self.seen = SeenSet.load(checkpoint_path + ".seen.npy")
+            self.stats.update(state["stats"])
+            for task in state["pending"]:
+                self._put(task)
+        else:
+            for seed in seeds:
+                self._enqueue({"url": seed_url(seed), "seed": seed, "page": 1, "kind": "listing"})
+
+    def _enqueue(self, task: dict) -> None:
+        if self.seen.add(task["url"]):
+            self._put(task)
+        else:
+            self.stats["duplicates"] += 1
+
+    def _put(self, task: dict) -> None:
+        self._pending[task["url"]] = task
+        self._frontier.put_nowait(task)
+
+    def checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        self.seen.save(self.checkpoint_path + ".seen.npy")
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pending": list(self._pending.values()), "stats": self.stats}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    async def crawl(self):
+        records: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        done = object()
+        workers = [asyncio.create_task(self._worker(records)) for _ in range(self.workers)]
+
+        async def finish():
+            # all work done, or every worker gone (e.g. the browser failed to start)
+            drained = asyncio.ensure_future(self._frontier.join())
+            stopped = asyncio.gather(*workers, return_exceptions=True)
+            await asyncio.wait([drained, stopped], return_when=asyncio.FIRST_COMPLETED)
+            if stopped.done():
+                for result in stopped.result():
+                    if isinstance(result, Exception):
+                        print(f"[crawler] worker failed: {type(result).__name__}: {result}")
+            drained.cancel()
+            await records.put(done)
+
+        finisher = asyncio.create_task(finish())
+        try:
+            while (item := await records.get()) is not done:
+                url, record = item
+                if record is None:  # queued after the page's records: all of them were yielded
+                    self._pending.pop(url, None)
+                else:
+                    yield record
+        finally:
+            finisher.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(finisher, *workers, return_exceptions=True)
+
+    async def _worker(self, records: asyncio.Queue) -> None:
+        async with AsyncPooledPlaywrightComputer(self.pool) as computer:
+            computer.listing_scan_items = self.max_items_per_page
+            await computer.page.route("**/*", _skip_heavy_resources)
+            while True:
+                task = await self._frontier.get()
+                try:
+                    async for record in self._visit(computer, task):
+                        await records.put((task["url"], record))
+                    self.stats["pages"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"[crawler] {task['url']}: {type(e).__name__}: {e}")
+                # leaves _pending when crawl() reaches this, i.e. after its records
+                await records.put((task["url"], None))
+                self._frontier.task_done()
+
+    async def _visit(self, computer, task: dict):
+        async with self.limiter.slot(task["url"]):
+            await computer.page.goto(task["url"], wait_until="domcontentloaded")
+        listing = await computer.extract_listing(max_tokens=10**9, fresh=True)
+        now = time.time()
+        for item in listing["items"]:
+            self.stats["records"] += 1
+            yield {
+                **item,
+                "page_type": listing["page_type"],
+                "source_url": task["url"],
+                "seed": task["seed"],
+                "page": task["page"],
+                "crawled_at": now,
+            }
+            if self.follow_products and listing["page_type"] == "listing" and item.get("url"):
+                self._enqueue({**task, "url": item["url"], "kind": "product"})
+        if listing["page_type"] == "listing" and listing.get("next") and task["page"] < self.max_pages:
+            self._enqueue({**task, "url": listing["next"], "page": task["page"] + 1})
+
+
+async def _skip_heavy_resources(route, request):
+    # records come from the DOM; images, media and fonts are wasted bandwidth
+    if request.resource_type in ("image", "media", "font"):
+        await route.abort()
+    else:
+        await route.fallback()
+
+
+async def run_crawl(args, seeds) -> dict:
+    pool = AsyncBrowserPool(
+        browsers=args.browsers,
+        warm_contexts=args.workers,
+        profile=get_launch_profile(args.profile),
+    )
+    sink = open_sink(args.output)
+    last_checkpoint = time.monotonic()
+    try:
+        async with pool:
+            crawler = CatalogCrawler(
+                pool,
+                seeds,
+                workers=args.workers,
+                max_pages=args.max_pages,
+                follow_products=args.follow_products,
+                limiter=HostLimiter(per_host=args.per_host, delay_s=args.delay),
+                checkpoint_path=args.checkpoint,
+                resume=args.resume,
+            )
+            async for record in crawler.crawl():
+                sink.write(record)
+                if time.monotonic() - last_checkpoint >= args.checkpoint_every:
+                    sink.checkpoint()
+                    crawler.checkpoint()
+                    last_checkpoint = time.monotonic()
+            sink.checkpoint()
+            crawler.checkpoint()
+    finally:
+        sink.close()
+    output = sink.path
+    if len(getattr(sink, "parts", ())) > 1:
+        output += f" (+{len(sink.parts) - 1} more parts)"
+    return {**crawler.stats, "seen": len(crawler.seen), "output": output}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("seeds", nargs="*", help="Search queries or category/search URLs.")
+    parser.add_argument("--seeds-file", help="File with one seed per line.")
+    parser.add_argument("--output", default="catalog.jsonl", help="*.jsonl or *.parquet.")
+    parser.add_argument("--workers", type=int, default=4, help="Browser contexts crawling at once.")
+    parser.add_argument("--browsers", type=int, default=1, help="Chromium instances in the pool.")
+    parser.add_argument("--max-pages", type=int, default=20, help="Result pages per seed.")
+    parser.add_argument("--follow-products", action="store_true", help="Also visit every product page.")
+    parser.add_argument("--per-host", type=int, default=2, help="Concurrent page loads per host.")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between page loads per host.")
+    parser.add_argument("--profile", choices=list(LAUNCH_PROFILES), default="container")
+    parser.add_argument("--checkpoint", help="Checkpoint file (frontier + seen-set) for resuming.")
+    parser.add_argument("--checkpoint-every", type=float, default=30, help="Seconds between checkpoints.")
+    parser.add_argument("--resume", action="store_true", help="Continue from --checkpoint.")
+    args = parser.parse_args()
+
+    seeds = list(args.seeds)
+    if args.seeds_file:
+        with open(args.seeds_file) as f:
+            seeds += [line.strip() for line in f if line.strip()]
+    if not seeds and not args.resume:
+        parser.error("give at least one seed (or --resume with --checkpoint)")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+
+    start = time.monotonic()
+    stats = asyncio.run(run_crawl(args, seeds))
+    elapsed = time.monotonic() - start
+    print(
+        f"{stats['records']} records from {stats['pages']} pages in {elapsed:.1f}s "
+        f"({stats['pages'] / elapsed:.2f} pages/s), {stats['errors']} errors, "
+        f"{stats['duplicates']} duplicate URLs skipped -> {stats['output']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Debug logging for the agent loop: lazy, truncated, optionally written off-thread."""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOGGER = logging.getLogger("cua.agent")
+
+# Longest string kept per field; data URLs are always replaced by their size
+MAX_FIELD_CHARS = 500
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def truncate(value, max_chars: int = MAX_FIELD_CHARS):
+    """Copy of `value` with long strings cut and images replaced by their size."""
+    if isinstance(value, str):
+        if value.startswith("data:image/"):
+            return f"[image, {len(value) * 3 // 4} bytes]"
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}... (+{len(value) - max_chars} chars)"
+        return value
+    if isinstance(value, dict):
+        return {k: truncate(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [truncate(v, max_chars) for v in value]
+    return value
+
+
+class LazyJson:
+    """Log argument that is only truncated and serialized if the record is emitted."""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value, max_chars: int = MAX_FIELD_CHARS):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        return json.dumps(truncate(self.value, self.max_chars), indent=2, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records unformatted, so LazyJson arguments are serialized on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def configure_debug_logging(path: str | None = None, level: int = logging.DEBUG) -> logging.Logger:
+    """
+    Send `cua.agent` records to stdout, or to `path` through a QueueHandler so
+    the file writes happen on a background thread instead of in the agent loop.
+    """
+    global _listener
+    for handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(handler)
+    _stop_listener()  # flushes whatever the previous file listener still has queued
+
+    if path:
+        file_handler = logging.FileHandler(path, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+        LOGGER.addHandler(_DeferredQueueHandler(records))
+    else:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        LOGGER.addHandler(stream_handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
+    return LOGGER
+
+
+def ensure_debug_logging() -> logging.Logger:
+    """`debug=True` without any configuration keeps the old behaviour: print to stdout."""
+    if not LOGGER.handlers:
+        configure_debug_logging()
+    return LOGGER
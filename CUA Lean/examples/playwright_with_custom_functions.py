@@ -28,7 +28,7 @@ tools = [
 
 
 def main():
-    with LocalPlaywrightComputer() as computer:
+    with LocalPlaywrightComputer(start_url="https://bing.com") as computer:
         agent = Agent(computer=computer, tools=tools)
         items = [
             {
@@ -0,0 +1,21 @@
+import time
+from agent.agent import Agent
+from computers import BrowserPool, PooledPlaywrightComputer
+
+
+def main():
+    # One warm Chromium; every task below gets its own fresh, isolated context.
+    with BrowserPool(warm_contexts=1, start_url="https://www.wayfair.com") as pool:
+        while True:
+            user_input = input("> ")
+            start = time.monotonic()
+            with PooledPlaywrightComputer(pool) as computer:
+                print(f"Session started in {(time.monotonic() - start) * 1000:.0f}ms")
+                agent = Agent(computer=computer)
+                items = [{"role": "user", "content": user_input}]
+                agent.run_full_turn(items)
+            print(pool.health_check())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Load-test the agent/computer loop: N concurrent agents, local fixtures, mock model."""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import numpy as np
+from agent.async_agent import AsyncAgent
+from computers import (
+    LAUNCH_PROFILES,
+    AsyncBrowserPool,
+    AsyncPooledPlaywrightComputer,
+    get_launch_profile,
+)
+from mock_server import MockResponsesServer, load_script
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class PhaseTimer:
+    """Collects durations (ms) per phase: model, action, settle, screenshot, url_check, first_action."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def add(self, phase: str, ms: float) -> None:
+        self.samples[phase].append(ms)
+
+    def format(self) -> str:
+        lines = [f"  {'phase':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}"]
+        for phase, values in sorted(self.samples.items()):
+            p50, p95 = np.percentile(values, [50, 95])
+            lines.append(
+                f"  {phase:<12}{len(values):>8}{p50:>10.1f}{p95:>10.1f}{sum(values) / 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+class TimedComputer:
+    """Proxy that times every coroutine method of an async computer by phase."""
+
+    PHASES = {"screenshot": "screenshot", "get_current_url": "url_check", "settle": "settle"}
+
+    def __init__(self, computer, timer: PhaseTimer):
+        self._computer = computer
+        self._timer = timer
+
+    def __getattr__(self, name):
+        attr = getattr(self._computer, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        phase = self.PHASES.get(name, "action")
+
+        @functools.wraps(attr)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                self._timer.add(phase, (time.perf_counter() - start) * 1000)
+
+        return timed
+
+
+def start_fixture_server() -> tuple[ThreadingHTTPServer, str]:
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(QuietHandler, directory=FIXTURES_DIR)
+    )
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    return httpd, f"http://{host}:{port}"
+
+
+def process_tree_rss_kb(pid: int) -> int:
+    """RSS of a process and all its descendants (Linux /proc; 0 elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+        children = []
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children += [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return 0
+    return rss + sum(process_tree_rss_kb(child) for child in children)
+
+
+async def sample_memory(peak: list[int], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        peak[0] = max(peak[0], process_tree_rss_kb(os.getpid()))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_agent(index, args, pool, client, timer, semaphore, start_url, counters):
+    async with semaphore:
+        try:
+            async with AsyncPooledPlaywrightComputer(pool) as computer:
+                await computer.goto(start_url)
+                agent = AsyncAgent(
+                    computer=TimedComputer(computer, timer), client=client, stream=args.stream
+                )
+                try:
+                    await agent.run_full_turn(
+                        [{"role": "user", "content": args.task}], print_steps=False
+                    )
+                finally:
+                    for ms in agent.first_action_ms:
+                        timer.add("first_action", ms)
+            counters["ok"] += 1
+        except Exception as e:
+            counters["error"] += 1
+            if args.verbose:
+                print(f"[agent {index}] {type(e).__name__}: {e}")
+
+
+async def run_load(args, start_url) -> dict:
+    timer = PhaseTimer()
+    counters = defaultdict(int)
+
+    async def on_request(request):
+        request.extensions["loadgen_start"] = time.perf_counter()
+
+    async def on_response(response):
+        start = response.request.extensions.get("loadgen_start")
+        if start is not None:
+            counters["turns"] += 1
+            timer.add("model", (time.perf_counter() - start) * 1000)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    pool = AsyncBrowserPool(
+        browsers=args.browsers,
+        warm_contexts=args.concurrency,
+        profile=get_launch_profile(args.profile),
+    )
+    peak_rss = [0]
+    stop = asyncio.Event()
+    async with pool, httpx.AsyncClient(
+        timeout=120,
+        limits=httpx.Limits(max_connections=args.concurrency),
+        event_hooks={"request": [on_request], "response": [on_response]},
+    ) as client:
+        baseline_rss = process_tree_rss_kb(os.getpid())
+        sampler = asyncio.create_task(sample_memory(peak_rss, stop))
+        start = time.monotonic()
+        await asyncio.gather(
+            *(
+                run_agent(i, args, pool, client, timer, semaphore, start_url, counters)
+                for i in range(args.agents)
+            )
+        )
+        elapsed = time.monotonic() - start
+        stop.set()
+        await sampler
+
+    return {
+        "elapsed": elapsed,
+        "counters": counters,
+        "timer": timer,
+        "baseline_rss_kb": baseline_rss,
+        "peak_rss_kb": peak_rss[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=20, help="Total agent sessions to run.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Sessions in flight at once.")
+    parser.add_argument("--browsers", type=int, default=1, help="Chromium instances in the pool.")
+    parser.add_argument("--profile", choices=list(LAUNCH_PROFILES), default="container")
+    parser.add_argument("--fixture", default="search.html", help="Fixture page each agent starts on.")
+    parser.add_argument("--task", default="Find a velvet sofa and open it.")
+    parser.add_argument("--script", help="Mock model script (see mock_server.py).")
+    parser.add_argument("--latency-ms", type=int, help="Override the mock model latency.")
+    parser.add_argument("--failure-rate", type=float, help="Override the mock failure rate.")
+    parser.add_argument(
+        "--api-base",
+        help="Use this Responses endpoint instead of an in-process mock (e.g. a shared mock_server.py).",
+    )
+    parser.add_argument("--stream", action="store_true", help="Use streaming responses.")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    fixture_server, fixtures_url = start_fixture_server()
+    mock = None
+    if args.api_base:
+        os.environ["OPENAI_BASE_URL"] = args.api_base
+    else:
+        script = dict(load_script(args.script))
+        if args.latency_ms is not None:
+            script["latency_ms"] = args.latency_ms
+        if args.failure_rate is not None:
+            script["failure_rate"] = args.failure_rate
+        mock = MockResponsesServer(script)
+        mock.start()
+        os.environ["OPENAI_BASE_URL"] = mock.base_url
+
+    try:
+        result = asyncio.run(run_load(args, f"{fixtures_url}/{args.fixture}"))
+    finally:
+        if mock:
+            mock.stop()
+        fixture_server.shutdown()
+
+    counters = result["counters"]
+    per_agent_mb = (result["peak_rss_kb"] - result["baseline_rss_kb"]) / 1024 / args.concurrency
+    print(
+        f"{args.agents} agents ({args.concurrency} concurrent, {args.browsers} browser(s), "
+        f"profile {args.profile}) in {result['elapsed']:.1f}s: "
+        f"{counters['ok']} ok, {counters['error']} failed"
+    )
+    print(f"  turns/sec: {counters['turns'] / result['elapsed']:.2f} ({counters['turns']} model calls)")
+    print(
+        f"  memory: peak {result['peak_rss_kb'] / 1024:.0f}MB for the process tree, "
+        f"~{per_agent_mb:.0f}MB per concurrent agent"
+    )
+    print(result["timer"].format())
+
+
+if __name__ == "__main__":
+    main()
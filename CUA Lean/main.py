@@ -3,7 +3,7 @@ from computers import LocalPlaywrightComputer
 
 
 def main(user_input=None):
-    with LocalPlaywrightComputer() as computer:
+    with LocalPlaywrightComputer(start_url="https://bing.com") as computer:
         agent = Agent(computer=computer)
         items = []
         while True:
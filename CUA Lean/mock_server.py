@@ -0,0 +1,217 @@
+"""Local mock of the Responses API that replays scripted model outputs."""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Used when no --script is given: a short browse over the local fixtures.
+DEFAULT_SCRIPT = {
+    "latency_ms": 300,
+    "jitter_ms": 100,
+    "failure_rate": 0.0,
+    "responses": [
+        {"output": [{"type": "computer_call", "action": {"type": "screenshot"}}]},
+        {"output": [{"type": "computer_call", "action": {"type": "scroll", "x": 512, "y": 400, "scroll_x": 0, "scroll_y": 600}}]},
+        {"output": [{"type": "computer_call", "action": {"type": "click", "x": 180, "y": 260, "button": "left"}}]},
+        {"output": [{"type": "computer_call", "action": {"type": "wait", "ms": 500}}]},
+        {"output": [{"type": "computer_call", "action": {"type": "type", "text": "velvet sofa"}}]},
+        {"output": [{"type": "computer_call", "action": {"type": "keypress", "keys": ["ENTER"]}}]},
+        {
+            "output": [
+                {
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": "Done (mock)."}],
+                }
+            ]
+        },
+    ],
+}
+
+
+class MockResponsesServer:
+    """
+    Serves POST /v1/responses from a script of model outputs.
+
+    The server is stateless across agents: it tags every output item with an id
+    like "mock_<turn>_<n>" and works out the next turn from the highest tag in
+    the request's `input`, so any number of concurrent agents can share it.
+    Each response waits `latency_ms` (+ up to `jitter_ms`); `failure_rate` of
+    requests fail with `failure_status`. Requests with "stream": true get SSE
+    events, with `item_latency_ms` before each output item.
+    """
+
+    def __init__(self, script: dict | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.script = script or DEFAULT_SCRIPT
+        self.requests_served = 0
+        self.failures_served = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def build_response(self, request_body: dict) -> tuple[int, dict]:
+        """Wait out the scripted latency and return (status, response body)."""
+        script = self.script
+        delay_ms = script.get("latency_ms", 0) + random.uniform(0, script.get("jitter_ms", 0))
+        time.sleep(delay_ms / 1000)
+
+        with self._lock:
+            self.requests_served += 1
+            failed = random.random() < script.get("failure_rate", 0)
+            self.failures_served += failed
+        if failed:
+            status = script.get("failure_status", 500)
+            return status, {"error": {"message": "mock failure", "type": "server_error"}}
+
+        turn = _next_turn(request_body.get("input", []))
+        responses = script["responses"]
+        if turn < len(responses):
+            output = [dict(item) for item in responses[turn]["output"]]
+        else:  # script exhausted: finish the conversation
+            output = [
+                {
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": "Done (mock, script exhausted)."}],
+                }
+            ]
+        for n, item in enumerate(output):
+            item["id"] = f"mock_{turn}_{n}"
+            if item["type"] in ("computer_call", "function_call"):
+                item.setdefault("call_id", f"call_{uuid.uuid4().hex[:12]}")
+                item.setdefault("pending_safety_checks", [])
+            if item["type"] == "function_call" and not isinstance(item.get("arguments"), str):
+                item["arguments"] = json.dumps(item.get("arguments", {}))
+
+        input_chars = len(json.dumps(request_body.get("input", [])))
+        return 200, {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "model": request_body.get("model"),
+            "output": output,
+            "usage": {
+                "input_tokens": input_chars // 4,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": len(json.dumps(output)) // 4,
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/responses"):
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, payload = server.build_response(body)
+                if body.get("stream") and status == 200:
+                    self._send_stream(payload)
+                else:
+                    self._send(status, payload)
+
+            def _send_stream(self, payload):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                self._event({"type": "response.created", "response": {**payload, "output": []}})
+                for index, item in enumerate(payload["output"]):
+                    time.sleep(server.script.get("item_latency_ms", 0) / 1000)
+                    self._event({"type": "response.output_item.added", "output_index": index, "item": item})
+                    self._event({"type": "response.output_item.done", "output_index": index, "item": item})
+                self._event({"type": "response.completed", "response": payload})
+
+            def _event(self, event):
+                self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # keep load tests quiet
+
+        return Handler
+
+
+def _next_turn(input_items) -> int:
+    """One past the highest "mock_<turn>_<n>" id already in the conversation."""
+    turn = -1
+    for item in input_items:
+        item_id = item.get("id", "") if isinstance(item, dict) else ""
+        if item_id.startswith("mock_"):
+            turn = max(turn, int(item_id.split("_")[1]))
+    return turn + 1
+
+
+def load_script(path: str | None) -> dict:
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--script", help="JSON file: {responses: [{output: [...]}, ...], latency_ms, ...}")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=int, help="Override the script's latency_ms.")
+    parser.add_argument("--failure-rate", type=float, help="Override the script's failure_rate.")
+    args = parser.parse_args()
+
+    script = dict(load_script(args.script))
+    if args.latency_ms is not None:
+        script["latency_ms"] = args.latency_ms
+    if args.failure_rate is not None:
+        script["failure_rate"] = args.failure_rate
+
+    server = MockResponsesServer(script, host=args.host, port=args.port)
+    print(f"Mock Responses API on {server.base_url} (export OPENAI_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
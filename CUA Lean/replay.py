@@ -0,0 +1,75 @@
+"""Replay recorded agent runs without the model, for regression checks or a cheap warm path."""
+
+import argparse
+import sys
+from agent.agent import Agent
+from agent.tools import WAYFAIR_TOOLS
+from agent.trajectory import TrajectoryReplayer
+from computers import LAUNCH_PROFILES, LocalPlaywrightComputer, get_launch_profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("runs", nargs="+", help="Run logs written by `cli.py --record`.")
+    parser.add_argument("--profile", choices=list(LAUNCH_PROFILES), default="headless")
+    parser.add_argument(
+        "--check",
+        choices=["both", "url", "screenshot"],
+        default="both",
+        help="What each replayed step must match.",
+    )
+    parser.add_argument(
+        "--hash-threshold",
+        type=int,
+        default=10,
+        help="Max differing bits (of 64) between screenshot hashes.",
+    )
+    parser.add_argument(
+        "--run",
+        default="-1",
+        help="Run id, or index into each log's runs (default -1: the last run recorded).",
+    )
+    parser.add_argument(
+        "--fallback-model",
+        action="store_true",
+        help="Let the model continue from the first diverging step instead of failing.",
+    )
+    args = parser.parse_args()
+
+    failures = 0
+    for path in args.runs:
+        with LocalPlaywrightComputer(profile=get_launch_profile(args.profile)) as computer:
+            replayer = TrajectoryReplayer(
+                computer,
+                path,
+                check=args.check,
+                hash_threshold=args.hash_threshold,
+                registry=WAYFAIR_TOOLS,
+                run=int(args.run) if args.run.lstrip("-").isdigit() else args.run,
+            )
+            start_url = replayer.header.get("start_url")
+            if start_url:
+                computer.goto(start_url)
+            agent = (
+                Agent(computer=computer, registry=WAYFAIR_TOOLS) if args.fallback_model else None
+            )
+            result = replayer.replay(agent=agent, print_steps=False)
+
+        if result.ok:
+            print(f"PASS {path}: {result.matched_steps}/{result.total_steps} steps")
+        else:
+            status = "MODEL" if result.model_used else "FAIL"
+            failures += not result.model_used
+            print(
+                f"{status} {path}: diverged at step {result.diverged_at} "
+                f"({result.matched_steps}/{result.total_steps} matched): {result.reason}"
+            )
+        for item in result.items:
+            if item.get("type") == "message":
+                print("  " + item["content"][0]["text"])
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Summarize a run-metrics store (see run_metrics.py): latency percentiles,
+failure rates and tokens per step type, page timings per URL pattern, and
+regressions of one build against a baseline.
+
+The dataset is read one record batch at a time into fixed log-scale
+histograms, so memory stays flat however many rows there are; percentiles
+are accurate to one bucket (under 5%).
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+# Histogram bucket upper edges; values below the first edge (incl. 0) land in bucket 0
+MS_EDGES = np.geomspace(0.1, 1e7, 400)
+CLS_EDGES = np.geomspace(1e-4, 100, 240)
+
+# Only these columns are read from the store
+COLUMNS = [
+    "build", "kind", "name", "ok", "duration_ms", "input_tokens", "output_tokens",
+    "pattern", "ttfb_ms", "lcp_ms", "cls", "inp_ms",
+]
+
+
+class GroupedHistograms:
+    """Per-group counts, sums and histograms, grown as new group keys appear."""
+
+    def __init__(self, histograms: dict[str, np.ndarray], sums: tuple[str, ...] = ()):
+        self.edges = histograms
+        self.keys: list[tuple] = []
+        self._ids: dict[str, int] = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.failures = np.zeros(0, dtype=np.int64)
+        self.sums = {name: np.zeros(0) for name in sums}
+        self.hists = {name: np.zeros((0, len(e) + 1), dtype=np.int64) for name, e in histograms.items()}
+
+    def group_ids(self, batch: pa.RecordBatch, key_columns: list[str]) -> np.ndarray:
+        """Dense group id per row, via a dictionary-encoded key column (one Python call per distinct key)."""
+        parts = [pc.cast(pc.fill_null(batch.column(c), ""), pa.string()) for c in key_columns]
+        joined = pc.binary_join_element_wise(*parts, "\x1f")
+        encoded = pc.dictionary_encode(joined)
+        local = encoded.indices.to_numpy(zero_copy_only=False)
+        mapping = np.array([self._group(key) for key in encoded.dictionary.to_pylist()], dtype=np.int64)
+        return mapping[local] if len(mapping) else local.astype(np.int64)
+
+    def _group(self, key: str) -> int:
+        gid = self._ids.get(key)
+        if gid is None:
+            gid = self._ids[key] = len(self.keys)
+            self.keys.append(tuple(key.split("\x1f")))
+            self.count = np.append(self.count, 0)
+            self.failures = np.append(self.failures, 0)
+            for name in self.sums:
+                self.sums[name] = np.append(self.sums[name], 0.0)
+            for name, hist in self.hists.items():
+                self.hists[name] = np.vstack([hist, np.zeros((1, hist.shape[1]), dtype=np.int64)])
+        return gid
+
+    def add(self, gids: np.ndarray, batch: pa.RecordBatch, ok_column: str | None = None) -> None:
+        n = len(self.keys)
+        self.count += np.bincount(gids, minlength=n)
+        if ok_column:
+            failed = ~pc.fill_null(batch.column(ok_column), True).to_numpy(zero_copy_only=False)
+            self.failures += np.bincount(gids[failed], minlength=n)
+        for name in self.sums:
+            values = pc.fill_null(batch.column(name), 0).to_numpy(zero_copy_only=False)
+            self.sums[name] += np.bincount(gids, weights=values, minlength=n)
+        for name, edges in self.edges.items():
+            column = batch.column(name)
+            valid = pc.is_valid(column).to_numpy(zero_copy_only=False)
+            values = pc.fill_null(column, 0).to_numpy(zero_copy_only=False)[valid]
+            buckets = np.searchsorted(edges, values, side="right")
+            nbins = len(edges) + 1
+            flat = np.bincount(gids[valid] * nbins + buckets, minlength=n * nbins)
+            self.hists[name] += flat.reshape(n, nbins)
+
+    def percentile(self, name: str, gid: int, q: float) -> float | None:
+        hist = self.hists[name][gid]
+        total = hist.sum()
+        if not total:
+            return None
+        bucket = int(np.searchsorted(np.cumsum(hist), q * total))
+        edges = self.edges[name]
+        if bucket == 0:
+            return 0.0
+        if bucket >= len(edges):
+            return float(edges[-1])
+        return float(np.sqrt(edges[bucket - 1] * edges[bucket]))  # geometric bucket midpoint
+
+
+def summarize(dataset: ds.Dataset, filter_expr, batch_size: int) -> tuple[GroupedHistograms, GroupedHistograms, int]:
+    steps = GroupedHistograms({"duration_ms": MS_EDGES}, sums=("input_tokens", "output_tokens"))
+    pages = GroupedHistograms({"ttfb_ms": MS_EDGES, "lcp_ms": MS_EDGES, "cls": CLS_EDGES, "inp_ms": MS_EDGES})
+    rows = 0
+    for batch in dataset.to_batches(columns=COLUMNS, filter=filter_expr, batch_size=batch_size):
+        if not batch.num_rows:
+            continue
+        rows += batch.num_rows
+        steps.add(steps.group_ids(batch, ["build", "kind", "name"]), batch, ok_column="ok")
+        with_page = batch.filter(pc.is_valid(batch.column("pattern")))
+        if with_page.num_rows:
+            pages.add(pages.group_ids(with_page, ["build", "pattern"]), with_page)
+    return steps, pages, rows
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_steps(steps: GroupedHistograms) -> None:
+    print(f"{'build':<12} {'kind':<14} {'name':<22} {'n':>8} {'fail%':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'in_tok':>10} {'out_tok':>9}")
+    for gid in sorted(range(len(steps.keys)), key=lambda g: steps.keys[g]):
+        build, kind, name = steps.keys[gid]
+        count = steps.count[gid]
+        print(
+            f"{build:<12} {kind:<14} {name[:22]:<22} {count:>8} "
+            f"{100 * steps.failures[gid] / count:>6.1f} "
+            f"{_ms(steps.percentile('duration_ms', gid, 0.5)):>8} "
+            f"{_ms(steps.percentile('duration_ms', gid, 0.95)):>8} "
+            f"{_ms(steps.percentile('duration_ms', gid, 0.99)):>8} "
+            f"{steps.sums['input_tokens'][gid]:>10.0f} {steps.sums['output_tokens'][gid]:>9.0f}"
+        )
+
+
+def print_pages(pages: GroupedHistograms) -> None:
+    if not pages.keys:
+        return
+    print(f"\n{'build':<12} {'pattern':<48} {'n':>7} {'TTFB p75':>9} {'LCP p75':>8} {'CLS p75':>8} {'INP p75':>8}")
+    for gid in sorted(range(len(pages.keys)), key=lambda g: pages.keys[g]):
+        build, pattern = pages.keys[gid]
+        cls = pages.percentile("cls", gid, 0.75)
+        print(
+            f"{build:<12} {pattern[-48:]:<48} {pages.count[gid]:>7} "
+            f"{_ms(pages.percentile('ttfb_ms', gid, 0.75)):>9} "
+            f"{_ms(pages.percentile('lcp_ms', gid, 0.75)):>8} "
+            f"{'-' if cls is None else f'{cls:.3f}':>8} "
+            f"{_ms(pages.percentile('inp_ms', gid, 0.75)):>8}"
+        )
+
+
+def regressions(steps: GroupedHistograms, build: str, baseline: str, threshold: float, fail_threshold: float) -> list[str]:
+    """Step types whose p95 grew by more than `threshold` or failure rate by more than `fail_threshold`."""
+    by_key = {key: gid for gid, key in enumerate(steps.keys)}
+    found = []
+    for (group_build, kind, name), gid in sorted(by_key.items()):
+        base = by_key.get((baseline, kind, name))
+        if group_build != build or base is None:
+            continue
+        new_p95 = steps.percentile("duration_ms", gid, 0.95)
+        old_p95 = steps.percentile("duration_ms", base, 0.95)
+        new_fail = steps.failures[gid] / steps.count[gid]
+        old_fail = steps.failures[base] / steps.count[base]
+        reasons = []
+        if new_p95 and old_p95 and new_p95 > old_p95 * (1 + threshold):
+            reasons.append(f"p95 {old_p95:.0f}ms -> {new_p95:.0f}ms (+{100 * (new_p95 / old_p95 - 1):.0f}%)")
+        if new_fail - old_fail > fail_threshold:
+            reasons.append(f"failures {100 * old_fail:.1f}% -> {100 * new_fail:.1f}%")
+        if reasons:
+            found.append(f"{kind} {name}: " + ", ".join(reasons))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("store", help="Run-metrics directory (cli.py --metrics-store).")
+    parser.add_argument("--since", help="First day to include (YYYY-MM-DD).")
+    parser.add_argument("--until", help="Last day to include (YYYY-MM-DD).")
+    parser.add_argument("--source", action="append", help="Only rows from this source; may be repeated.")
+    parser.add_argument("--build", help="Build to check (with --baseline), or the only build to report.")
+    parser.add_argument("--baseline", help="Compare --build against this build and exit 1 on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p95 growth (0.10 = 10%%).")
+    parser.add_argument("--fail-threshold", type=float, default=0.02, help="Allowed failure-rate growth.")
+    parser.add_argument("--batch-size", type=int, default=131072, help="Rows per streamed record batch.")
+    args = parser.parse_args()
+    if args.baseline and not args.build:
+        parser.error("--baseline needs --build")
+
+    partitioning = ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+    # skips unreadable files (e.g. footerless ones from older, killed runs)
+    dataset = ds.dataset(args.store, format="parquet", partitioning=partitioning, exclude_invalid_files=True)
+    filters = []
+    if args.since:
+        filters.append(ds.field("day") >= args.since)
+    if args.until:
+        filters.append(ds.field("day") <= args.until)
+    if args.source:
+        filters.append(ds.field("source").isin(args.source))
+    if args.build:
+        builds = [args.build, args.baseline] if args.baseline else [args.build]
+        filters.append(ds.field("build").isin(builds))
+    filter_expr = None
+    for expr in filters:
+        filter_expr = expr if filter_expr is None else filter_expr & expr
+
+    start = time.monotonic()
+    steps, pages, rows = summarize(dataset, filter_expr, args.batch_size)
+    print(f"{rows} rows scanned in {time.monotonic() - start:.2f}s\n")
+    if not rows:
+        return
+    print_steps(steps)
+    print_pages(pages)
+
+    if args.baseline:
+        found = regressions(steps, args.build, args.baseline, args.threshold, args.fail_threshold)
+        print(f"\n{len(found)} regressions in {args.build} against {args.baseline}")
+        for line in found:
+            print(f"  {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Step-level run metrics appended to a Parquet dataset partitioned by day (needs pyarrow)."""
+
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from telemetry import _Exporter
+
+# Column name -> type. Rows are model calls ("model") and agent/scraper steps;
+# fields that don't apply to a row are null.
+STEP_FIELDS = {
+    "ts": "float",  # wall-clock start, seconds since the epoch
+    "run_id": "string",
+    "build": "string",
+    "source": "string",  # agent, async_driver, wayfair_scraper, ...
+    "kind": "string",  # model, computer_call, function_call, codegen, selenium_exec
+    "name": "string",  # action type, function name or model
+    "duration_ms": "float",
+    "action_ms": "float",
+    "settle_ms": "float",
+    "screenshot_bytes": "int",
+    "request_bytes": "int",
+    "input_tokens": "int",
+    "output_tokens": "int",
+    "cached_tokens": "int",
+    "ok": "bool",
+    "error": "string",
+    "url": "string",
+    "pattern": "string",  # url_pattern() of url, see computers/page_perf.py
+    "ttfb_ms": "float",
+    "load_ms": "float",
+    "lcp_ms": "float",
+    "cls": "float",
+    "inp_ms": "float",
+    "long_task_ms": "float",
+}
+
+
+def default_build() -> str:
+    return os.getenv("CUA_BUILD") or "dev"
+
+
+class RunMetricsStore:
+    """
+    Appends rows to `<root>/day=YYYY-MM-DD/<source>-<run_id>-<part>.parquet`,
+    one complete file per flushed batch of `batch_size` rows. Each part is
+    written under a dot-prefixed temporary name (which readers skip) and
+    renamed when done, so every visible file is readable, even while the run
+    is live or after it was killed. Only rows not yet flushed are lost then.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        source: str = "agent",
+        build: str | None = None,
+        run_id: str | None = None,
+        batch_size: int = 500,
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("The run-metrics store needs pyarrow (pip install pyarrow)") from e
+        self._pa, self._pq = pa, pq
+        types = {"string": pa.string(), "float": pa.float64(), "int": pa.int64(), "bool": pa.bool_()}
+        self.schema = pa.schema([(name, types[kind]) for name, kind in STEP_FIELDS.items()])
+        self.root = root
+        self.source = source
+        self.build = build or default_build()
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.batch_size = batch_size
+        self._batches: dict[str, list[dict]] = defaultdict(list)
+        self._parts = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, record: dict) -> None:
+        record = {"run_id": self.run_id, "build": self.build, "source": self.source, **record}
+        record.setdefault("ts", time.time())
+        day = time.strftime("%Y-%m-%d", time.gmtime(record["ts"]))
+        with self._lock:
+            batch = self._batches[day]
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._flush_day(day)
+
+    def flush(self) -> None:
+        with self._lock:
+            for day in list(self._batches):
+                self._flush_day(day)
+
+    def close(self) -> None:
+        self.flush()
+
+    def _flush_day(self, day: str) -> None:
+        batch = self._batches.pop(day, None)
+        if not batch:
+            return
+        pa = self._pa
+        columns = {}
+        for field in self.schema:
+            values = [r.get(field.name) for r in batch]
+            if pa.types.is_integer(field.type):
+                values = [None if v is None else int(v) for v in values]
+            elif pa.types.is_floating(field.type):
+                values = [None if v is None else float(v) for v in values]
+            columns[field.name] = pa.array(values, type=field.type)
+        directory = os.path.join(self.root, f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"{self.source}-{self.run_id}-{self._parts:05d}.parquet"
+        self._parts += 1
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        self._pq.write_table(pa.table(columns, schema=self.schema), tmp_path)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+
+# Child spans of an "agent.step" that are folded into the step's row
+_STEP_CHILDREN = {"computer.action", "computer.settle", "computer.screenshot", "computer.page_perf", "agent.function_call"}
+_PAGE_FIELDS = ("url", "pattern", "ttfb_ms", "load_ms", "lcp_ms", "cls", "inp_ms", "long_task_ms")
+
+
+class RunMetricsExporter(_Exporter):
+    """
+    Telemetry exporter writing one row per model call ("model.request" span)
+    and per agent step ("agent.step" span, with its action, settle,
+    screenshot, page-perf and function-call children folded in).
+    """
+
+    def __init__(self, store: RunMetricsStore):
+        self.store = store
+        self._pending: dict[int, dict] = {}  # parent span id -> fields from finished children
+        self._lock = threading.Lock()
+
+    def export_span(self, span) -> None:
+        with self._lock:
+            children = self._pending.pop(span.span_id, {})
+            if span.name in _STEP_CHILDREN and span.parent_id is not None:
+                _fold_child(self._pending.setdefault(span.parent_id, {}), span)
+                return
+        match span.name:
+            case "model.request":
+                attrs = span.attrs
+                self.store.write(
+                    {
+                        **self._base(span, "model"),
+                        "name": attrs.get("model"),
+                        "request_bytes": attrs.get("request_bytes"),
+                        "input_tokens": attrs.get("input_tokens"),
+                        "output_tokens": attrs.get("output_tokens"),
+                        "cached_tokens": attrs.get("cached_tokens"),
+                        "ok": "error" not in attrs,
+                        "error": attrs.get("error"),
+                    }
+                )
+            case "agent.step" if span.labels.get("kind") in ("computer_call", "function_call"):
+                row = {**self._base(span, span.labels.get("kind")), **children}
+                if "error" in span.attrs:
+                    row["error"] = span.attrs["error"]
+                row.setdefault("ok", "error" not in row)
+                if span.attrs.get("url"):  # after the step, not when the page was timed
+                    row["url"] = span.attrs["url"]
+                self.store.write(row)
+
+    def _base(self, span, kind: str) -> dict:
+        telemetry = self.telemetry
+        return {
+            "ts": telemetry.wall_epoch + (span.start_ns - telemetry.epoch_ns) / 1e9,
+            "kind": kind,
+            "duration_ms": span.duration_s * 1000,
+        }
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def _fold_child(row: dict, span) -> None:
+    attrs = span.attrs
+    match span.name:
+        case "computer.action":
+            row["name"] = span.labels.get("type")
+            row["action_ms"] = span.duration_s * 1000
+        case "computer.settle":
+            row["settle_ms"] = span.duration_s * 1000
+        case "computer.screenshot":
+            row["screenshot_bytes"] = attrs.get("bytes")
+        case "computer.page_perf":
+            row.update({k: attrs[k] for k in _PAGE_FIELDS if attrs.get(k) is not None})
+        case "agent.function_call":
+            row["name"] = span.labels.get("name")
+            row["ok"] = attrs.get("ok", "error" not in attrs)
+    if attrs.get("error"):
+        row["error"] = str(attrs["error"])
+        row["ok"] = False
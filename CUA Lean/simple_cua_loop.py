@@ -55,7 +55,7 @@ def handle_item(item, computer: Computer):
 
 def main():
     """Run the CUA (Computer Use Assistant) loop, using Local Playwright."""
-    with LocalPlaywrightComputer() as computer:
+    with LocalPlaywrightComputer(start_url="https://bing.com") as computer:
         tools = [
             {
                 "type": "computer-preview",
@@ -0,0 +1,100 @@
+"""
+Write I/O logic once for sync and asyncio callers.
+
+A `@steps` method is a generator that yields each I/O call instead of using
+its result directly: `png = yield self._page.screenshot()`. Under the sync
+Playwright API the call has already run, so its value is sent straight back.
+Under the async API the call returns a coroutine, which is awaited, and its
+result (or exception) is sent back. The `run_sync` and `run_async` class
+decorators turn every `@steps` method of a class into a plain or an `async`
+method, so one body serves both the sync and the async computer (and agent).
+
+Steps call other steps the same way (`yield self.back()`), and may return a
+plain value or an awaitable instead of being generators at all. `resolve`
+and `resolve_async` run the result of any such call outside a class (e.g.
+function tools).
+"""
+
+import functools
+import inspect
+
+
+def steps(method):
+    """Mark a method as step logic, for `run_sync` / `run_async`."""
+    method.is_steps = True
+    return method
+
+
+def _drive(gen):
+    value = None
+    while True:
+        try:
+            value = gen.send(value)
+        except StopIteration as stop:
+            return stop.value
+
+
+async def _drive_async(gen):
+    send, value = gen.send, None
+    while True:
+        try:
+            step = send(value)
+        except StopIteration as stop:
+            return stop.value
+        if inspect.isawaitable(step):
+            try:
+                value, send = await step, gen.send
+            except BaseException as e:  # raised at the yield, so the step's try/finally sees it
+                value, send = e, gen.throw
+        else:
+            value, send = step, gen.send
+
+
+def resolve(result):
+    """Value of a step's result with the sync API: runs it if it is a generator."""
+    return _drive(result) if inspect.isgenerator(result) else result
+
+
+async def resolve_async(result):
+    """Value of a step's result with the async API: runs or awaits it as needed."""
+    if inspect.isgenerator(result):
+        return await _drive_async(result)
+    return await result if inspect.isawaitable(result) else result
+
+
+def _sync_method(fn):
+    @functools.wraps(fn, updated=())
+    def method(*args, **kwargs):
+        return resolve(fn(*args, **kwargs))
+
+    return method
+
+
+def _async_method(fn):
+    @functools.wraps(fn, updated=())
+    async def method(*args, **kwargs):
+        return await resolve_async(fn(*args, **kwargs))
+
+    return method
+
+
+def _step_methods(cls):
+    for name in dir(cls):
+        attr = inspect.getattr_static(cls, name)
+        fn = getattr(attr, "__wrapped__", attr)  # already run_sync'd in a base class
+        if getattr(fn, "is_steps", False):
+            yield name, fn
+
+
+def run_sync(cls):
+    """Class decorator: every `@steps` method of `cls` runs as a plain method."""
+    for name, fn in list(_step_methods(cls)):
+        setattr(cls, name, _sync_method(fn))
+    return cls
+
+
+def run_async(cls):
+    """Class decorator: every `@steps` method of `cls` runs as a coroutine method."""
+    for name, fn in list(_step_methods(cls)):
+        setattr(cls, name, _async_method(fn))
+    return cls
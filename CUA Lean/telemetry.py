@@ -0,0 +1,302 @@
+"""Timed spans, counters and histograms for the agent loop, with pluggable exporters."""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets (seconds) for every span's duration
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("telemetry", "name", "labels", "attrs", "span_id", "parent_id", "start_ns", "end_ns", "_token")
+
+    def __init__(self, telemetry, name: str, labels: dict, attrs: dict):
+        self.telemetry = telemetry
+        self.name = name
+        self.labels = labels
+        self.attrs = attrs
+        self.span_id = next(_span_ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = self.end_ns = 0
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.telemetry._finish(self)
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class _NoopSpan:
+    """Shared stand-in returned while telemetry is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Telemetry:
+    """
+    Spans, counters and duration histograms, sent to any number of exporters.
+
+    Disabled until an exporter is added: `span()` then returns a shared no-op
+    and `count()` returns immediately, so instrumented code pays one attribute
+    check. Callers should also guard expensive attributes (e.g. serialized
+    request size) with `if TELEMETRY.enabled`.
+
+    Every finished span feeds the `<name>_seconds` histogram (dots become
+    underscores), labelled with the span's `labels`.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.exporters: list = []
+        self.epoch_ns = time.perf_counter_ns()
+        self.wall_epoch = time.time()
+        self._lock = threading.Lock()
+        self.counters: dict[tuple, float] = defaultdict(float)
+        self.histograms: dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def add_exporter(self, exporter) -> None:
+        self.exporters.append(exporter)
+        exporter.attach(self)
+        self.enabled = True
+
+    def close(self) -> None:
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+        self.enabled = False
+
+    def span(self, name: str, labels: dict | None = None, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, labels or {}, attrs)
+
+    def count(self, name: str, value: float = 1, /, **labels) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name: str, seconds: float, /, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            buckets = self.histograms.get(key)
+            if buckets is None:
+                buckets = self.histograms[key] = [0] * (len(DURATION_BUCKETS) + 1) + [0.0, 0]
+            buckets[bisect_left(DURATION_BUCKETS, seconds)] += 1
+            buckets[-2] += seconds
+            buckets[-1] += 1
+
+    def _finish(self, span: Span) -> None:
+        self.observe(span.name.replace(".", "_") + "_seconds", span.duration_s, **span.labels)
+        for exporter in self.exporters:
+            exporter.export_span(span)
+
+
+TELEMETRY = Telemetry()
+
+
+def _task_id() -> int:
+    """Thread id, or the running asyncio task's, so concurrent sessions get separate tracks."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task else threading.get_ident()
+
+
+class _Exporter:
+    def attach(self, telemetry: Telemetry) -> None:
+        self.telemetry = telemetry
+
+    def export_span(self, span: Span) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlExporter(_Exporter):
+    """One JSON line per finished span; counters are appended on close."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export_span(self, span: Span) -> None:
+        record = {
+            "type": "span",
+            "name": span.name,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": self.telemetry.wall_epoch + (span.start_ns - self.telemetry.epoch_ns) / 1e9,
+            "duration_ms": round(span.duration_s * 1000, 3),
+            **({"labels": span.labels} if span.labels else {}),
+            **({"attrs": span.attrs} if span.attrs else {}),
+        }
+        with self._lock:
+            self._file.write(json.dumps(record, default=str, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            for (name, labels), value in sorted(self.telemetry.counters.items()):
+                record = {"type": "counter", "name": name, "labels": dict(labels), "value": value}
+                self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.close()
+
+
+class ChromeTraceExporter(_Exporter):
+    """
+    Chrome trace-event JSON (chrome://tracing, Perfetto), streamed as spans
+    finish; each thread or asyncio task gets its own track.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def export_span(self, span: Span) -> None:
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": (span.start_ns - self.telemetry.epoch_ns) / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": self._pid,
+            "tid": _task_id(),
+            "args": {**span.labels, **span.attrs},
+        }
+        with self._lock:
+            self._file.write(json.dumps(event, default=str) + ",\n")
+
+    def close(self) -> None:
+        with self._lock:
+            # a trailing metadata event closes the array without a dangling comma
+            self._file.write(json.dumps({"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "cua"}}))
+            self._file.write("\n]\n")
+            self._file.close()
+
+
+class PrometheusExporter(_Exporter):
+    """Serves counters and span-duration histograms at http://host:port/metrics."""
+
+    def __init__(self, port: int = 9464, host: str = "127.0.0.1", prefix: str = "cua_"):
+        self.prefix = prefix
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("/metrics", ""):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def render(self) -> str:
+        telemetry = self.telemetry
+        lines = []
+        with telemetry._lock:
+            counters = sorted(telemetry.counters.items())
+            histograms = sorted((k, list(v)) for k, v in telemetry.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}{name}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        for (name, labels), buckets in histograms:
+            metric = f"{self.prefix}{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), buckets):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {buckets[-2]:g}")
+            lines.append(f"{metric}_count{_labels(labels)} {buckets[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def configure_telemetry(
+    jsonl: str | None = None,
+    trace: str | None = None,
+    metrics_port: int | None = None,
+    metrics_store: str | None = None,
+    source: str = "agent",
+) -> Telemetry:
+    """Enable the global TELEMETRY with the exporters given (CLI flags)."""
+    if jsonl:
+        TELEMETRY.add_exporter(JsonlExporter(jsonl))
+    if trace:
+        TELEMETRY.add_exporter(ChromeTraceExporter(trace))
+    if metrics_port:
+        TELEMETRY.add_exporter(PrometheusExporter(metrics_port))
+    if metrics_store:
+        from run_metrics import RunMetricsExporter, RunMetricsStore  # imports pyarrow
+
+        TELEMETRY.add_exporter(RunMetricsExporter(RunMetricsStore(metrics_store, source=source)))
+    return TELEMETRY
@@ -1,12 +1,17 @@
 import os
-import requests
+import time
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 import json
 import base64
-from PIL import Image
 from io import BytesIO
 import io
-from urllib.parse import urlparse
+from blocklist import DomainBlocklist
+
+# PIL, requests and httpx are imported where they are used: they account for
+# most of the CLI's import time and none of them is needed before the first turn.
+if TYPE_CHECKING:
+    import httpx
 
 load_dotenv(override=True)
 
@@ -19,36 +24,62 @@ BLOCKED_DOMAINS = [
     "ilanbigio.com",
 ]
 
+# Set CUA_BLOCKLIST_FILE to add a large tracker/malware list (plain, hosts or "||host^" format)
+BLOCKLIST = (
+    DomainBlocklist.from_file(os.environ["CUA_BLOCKLIST_FILE"])
+    if os.getenv("CUA_BLOCKLIST_FILE")
+    else DomainBlocklist()
+)
+BLOCKLIST.update(BLOCKED_DOMAINS)
+
 
 def pp(obj):
     print(json.dumps(obj, indent=4))
 
 
 def show_image(base_64_image):
+    from PIL import Image
+
     image_data = base64.b64decode(base_64_image)
     image = Image.open(BytesIO(image_data))
     image.show()
 
 
 def calculate_image_dimensions(base_64_image):
+    from PIL import Image
+
     image_data = base64.b64decode(base_64_image)
     image = Image.open(io.BytesIO(image_data))
     return image.size
 
 
 def sanitize_message(msg: dict) -> dict:
-    """Return a copy of the message with image_url omitted for computer_call_output messages."""
+    """Return a copy of the message with image_url omitted for computer_call_output and image-bearing function_call_output messages."""
     if msg.get("type") == "computer_call_output":
         output = msg.get("output", {})
         if isinstance(output, dict):
             sanitized = msg.copy()
             sanitized["output"] = {**output, "image_url": "[omitted]"}
             return sanitized
+    if msg.get("type") == "function_call_output" and isinstance(msg.get("output"), list):
+        sanitized = msg.copy()
+        sanitized["output"] = [
+            {**part, "image_url": "[omitted]"} if "image_url" in part else part
+            for part in msg["output"]
+        ]
+        return sanitized
     return msg
 
 
-def create_response(**kwargs):
-    url = "https://api.openai.com/v1/responses"
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+
+
+def responses_url() -> str:
+    """Responses API endpoint; set OPENAI_BASE_URL to target a proxy or the mock server."""
+    return os.getenv("OPENAI_BASE_URL", DEFAULT_API_BASE).rstrip("/") + "/responses"
+
+
+def _api_headers() -> dict:
     headers = {
         "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
         "Content-Type": "application/json"
@@ -57,8 +88,39 @@ def create_response(**kwargs):
     openai_org = os.getenv("OPENAI_ORG")
     if openai_org:
         headers["Openai-Organization"] = openai_org
+    return headers
+
+
+_session = None
+
+
+def api_session():
+    """Shared requests.Session, so every model call reuses one kept-alive TLS connection."""
+    global _session
+    if _session is None:
+        import requests
+
+        _session = requests.Session()
+    return _session
+
+
+def prewarm_api() -> float:
+    """
+    Open the TLS connection to the API host ahead of the first model call (e.g.
+    while the user is still typing). Returns elapsed ms.
+    """
+    start = time.monotonic()
+    session = api_session()
+    try:
+        # any response will do: the point is the pooled connection it leaves behind
+        session.head(responses_url(), headers=_api_headers(), timeout=10)
+    except Exception as e:
+        print(f"API pre-connect failed: {e}")
+    return (time.monotonic() - start) * 1000
 
-    response = requests.post(url, headers=headers, json=kwargs)
+
+def create_response(**kwargs):
+    response = api_session().post(responses_url(), headers=_api_headers(), json=kwargs)
 
     if response.status_code != 200:
         print(f"Error: {response.status_code} {response.text}")
@@ -66,11 +128,86 @@ def create_response(**kwargs):
     return response.json()
 
 
+async def create_response_async(client: "httpx.AsyncClient | None" = None, **kwargs):
+    """Async `create_response`; pass a shared `client` to reuse its connection pool."""
+    if client is None:
+        import httpx
+
+        async with httpx.AsyncClient(timeout=120) as temp_client:
+            return await create_response_async(client=temp_client, **kwargs)
+
+    response = await client.post(responses_url(), headers=_api_headers(), json=kwargs)
+
+    if response.status_code != 200:
+        print(f"Error: {response.status_code} {response.text}")
+
+    return response.json()
+
+
+def is_blocklisted_url(url: str) -> bool:
+    """True if the given URL's host (or a parent domain) is in the blocklist."""
+    return BLOCKLIST.is_blocked_url(url)
+
+
 def check_blocklisted_url(url: str) -> None:
     """Raise ValueError if the given URL (including subdomains) is in the blocklist."""
-    hostname = urlparse(url).hostname or ""
-    if any(
-        hostname == blocked or hostname.endswith(f".{blocked}")
-        for blocked in BLOCKED_DOMAINS
-    ):
+    if BLOCKLIST.is_blocked_url(url):
         raise ValueError(f"Blocked URL: {url}")
+
+
+class SSEParser:
+    """Incremental server-sent-events parser: feed lines, get JSON events back."""
+
+    def __init__(self):
+        self._data: list[str] = []
+
+    def feed(self, line: str) -> dict | None:
+        if line.startswith("data:"):
+            self._data.append(line[5:].lstrip())
+            return None
+        if line.strip() or not self._data:
+            return None  # "event:", "id:", comments, or a blank line with no data
+        data, self._data = "\n".join(self._data), []
+        if data == "[DONE]":
+            return None
+        return json.loads(data)
+
+
+def stream_response(**kwargs):
+    """Yield Responses API stream events (dicts) as they arrive."""
+    with api_session().post(
+        responses_url(), headers=_api_headers(), json={**kwargs, "stream": True}, stream=True
+    ) as response:
+        if response.status_code != 200:
+            print(f"Error: {response.status_code} {response.text}")
+            yield {"type": "error", "status": response.status_code, "body": response.text}
+            return
+        parser = SSEParser()
+        # chunk_size=None hands us bytes as soon as they arrive (no 512-byte buffering)
+        for line in response.iter_lines(chunk_size=None):
+            event = parser.feed(line.decode("utf-8"))
+            if event is not None:
+                yield event
+        event = parser.feed("")  # flush a final event without a trailing blank line
+        if event is not None:
+            yield event
+
+
+async def stream_response_async(client: "httpx.AsyncClient", **kwargs):
+    """Async `stream_response`, on a shared `httpx.AsyncClient`."""
+    async with client.stream(
+        "POST", responses_url(), headers=_api_headers(), json={**kwargs, "stream": True}
+    ) as response:
+        if response.status_code != 200:
+            body = (await response.aread()).decode("utf-8", "replace")
+            print(f"Error: {response.status_code} {body}")
+            yield {"type": "error", "status": response.status_code, "body": body}
+            return
+        parser = SSEParser()
+        async for line in response.aiter_lines():
+            event = parser.feed(line)
+            if event is not None:
+                yield event
+        event = parser.feed("")
+        if event is not None:
+            yield event
@@ -0,0 +1,277 @@
+"""
+Deadlines for LLM-generated Selenium code (used by both Wayfair scrapers).
+
+Each step runs under a per-step budget, capped by what is left of the
+scenario (one command or paragraph). Inside the step, time.sleep and
+WebDriverWait never wait past the deadline and the driver's page-load and
+script timeouts are lowered to it. If the code is still running `grace_s`
+after the deadline (e.g. a busy loop), DeadlineExceeded is raised in it
+asynchronously. Code with obviously unbounded constructs is rejected before
+it runs, and its own imports of `time` are rewritten to the bounded one.
+"""
+
+import ast
+import ctypes
+import os
+import threading
+import time
+import types
+from collections import Counter
+
+
+class DeadlineExceeded(BaseException):
+    """
+    The step (or the scenario) ran out of time. A BaseException, so the
+    `except Exception:` blocks generated code wraps its actions in don't
+    swallow it.
+    """
+
+
+class UnsafeCodeError(ValueError):
+    """The generated code was rejected before running."""
+
+
+def _constant_number(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return node.value
+    return None
+
+
+def _is_call(node, *names):
+    """True for calls like time.sleep(...) or input(...), by attribute or plain name"""
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else None
+    return name in names
+
+
+def _breaks_out(loop):
+    """True if a break, return or raise in `loop`'s body leaves this loop, not a nested one"""
+    stack = list(loop.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Break, ast.Return, ast.Raise)):
+            return True
+        if isinstance(node, (ast.For, ast.While, ast.AsyncFor)):
+            stack += node.orelse  # a break in a nested loop only ends that loop
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        stack += ast.iter_child_nodes(node)
+    return False
+
+
+class _ProvidedTime(ast.NodeTransformer):
+    """
+    Rewrites `import time` and `from time import sleep` into assignments from
+    the `time` the watchdog puts in the namespace; a real import would rebind
+    the name to the module, whose sleeps the deadline can't interrupt
+    """
+
+    def visit_Import(self, node):
+        kept = [alias for alias in node.names if alias.name != 'time']
+        bound = [_assign(alias.asname, 'time') for alias in node.names if alias.name == 'time' and alias.asname]
+        if len(kept) == len(node.names):
+            return node
+        nodes = ([ast.Import(names=kept)] if kept else []) + bound
+        return [ast.copy_location(n, node) for n in nodes] or ast.copy_location(ast.Pass(), node)
+
+    def visit_ImportFrom(self, node):
+        if node.module != 'time' or node.level:
+            return node
+        if any(alias.name == '*' for alias in node.names):
+            raise UnsafeCodeError(f'line {node.lineno}: "from time import *" would bring back the unbounded sleep')
+        return [ast.copy_location(_assign(alias.asname or alias.name, 'time', alias.name), node) for alias in node.names]
+
+
+def _assign(target, name, attr=None):
+    value = ast.Name(id=name, ctx=ast.Load())
+    if attr:
+        value = ast.Attribute(value=value, attr=attr, ctx=ast.Load())
+    return ast.Assign(targets=[ast.Name(id=target, ctx=ast.Store())], value=value)
+
+
+def check_code(code, step_budget_s):
+    """Compile `code`; raise UnsafeCodeError if it can't finish (or can't finish in time)"""
+    tree = ast.fix_missing_locations(_ProvidedTime().visit(ast.parse(code)))
+    fixed_sleep_s = 0.0
+    # sleeps in loops and functions may run any number of times; only the rest add up
+    repeated = [node for node in ast.walk(tree) if isinstance(node, (ast.For, ast.While, ast.FunctionDef, ast.Lambda))]
+    in_loop = {id(n) for block in repeated for n in ast.walk(block) if n is not block}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.While) and isinstance(node.test, ast.Constant) and node.test.value:
+            if not _breaks_out(node):
+                raise UnsafeCodeError(f'line {node.lineno}: "while {node.test.value!r}" loop without a break')
+        elif _is_call(node, 'input'):
+            raise UnsafeCodeError(f'line {node.lineno}: input() would wait for the console')
+        elif _is_call(node, 'sleep') and node.args and id(node) not in in_loop:
+            seconds = _constant_number(node.args[0])
+            fixed_sleep_s += seconds or 0
+    if fixed_sleep_s > step_budget_s:
+        raise UnsafeCodeError(f'{fixed_sleep_s:g}s of fixed sleeps, over the {step_budget_s:g}s step budget')
+    return compile(tree, '<generated selenium code>', 'exec')
+
+
+class _DeadlineTime:
+    """Stand-in for the `time` module in generated code: sleeps end the step instead of outlasting it"""
+
+    def __init__(self, deadline, counts):
+        self._deadline = deadline
+        self._counts = counts
+        self.cut = None  # the first sleep cut short, even if the code caught it
+
+    def sleep(self, seconds):
+        remaining = self._deadline - time.monotonic()
+        if seconds > remaining:
+            self._counts['sleeps_cut'] += 1
+            message = f'time.sleep({seconds:g}) with {max(remaining, 0):.1f}s left'
+            self.cut = self.cut or message
+            raise DeadlineExceeded(message)
+        time.sleep(seconds)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def _bounded_wait(wait_class, deadline):
+    """WebDriverWait whose timeout is capped at the time left in the step"""
+
+    class BoundedWait(wait_class):
+        def __init__(self, driver, timeout, *args, **kwargs):
+            super().__init__(driver, min(timeout, max(deadline - time.monotonic(), 0.1)), *args, **kwargs)
+
+    return BoundedWait
+
+
+def _rebind(func, overrides):
+    """A copy of `func` that sees `overrides` instead of its module's globals of those names"""
+    bound = types.FunctionType(
+        func.__code__, {**func.__globals__, **overrides}, func.__name__, func.__defaults__, func.__closure__
+    )
+    bound.__kwdefaults__ = func.__kwdefaults__
+    return bound
+
+
+class StepWatchdog:
+    """Runs compiled steps under per-step and per-scenario deadlines, counting what it cut short"""
+
+    def __init__(self, step_budget_s=None, scenario_budget_s=None, grace_s=2.0):
+        self.step_budget_s = step_budget_s or float(os.getenv('SELENIUM_STEP_BUDGET_S', 30))
+        self.scenario_budget_s = scenario_budget_s or float(os.getenv('SELENIUM_SCENARIO_BUDGET_S', 300))
+        self.grace_s = grace_s
+        self.counts = Counter()  # steps, deadline_hits, hard_stops, rejected, sleeps_cut
+        self.last_error = None  # 'deadline' or 'rejected' for the last step, else None
+        self._scenario_deadline = time.monotonic() + self.scenario_budget_s
+
+    def start_scenario(self):
+        self._scenario_deadline = time.monotonic() + self.scenario_budget_s
+
+    def step_deadline(self):
+        return min(time.monotonic() + self.step_budget_s, self._scenario_deadline)
+
+    def check(self, code):
+        try:
+            return check_code(code, self.step_budget_s)
+        except UnsafeCodeError:
+            self.counts['rejected'] += 1
+            self.last_error = 'rejected'
+            raise
+
+    def run(self, compiled, namespace, driver, deadline, helpers=()):
+        """
+        exec `compiled` in a copy of `namespace`; raises DeadlineExceeded when
+        out of time. `helpers` names module functions in the namespace that get
+        the same deadline-bounded `time` and `WebDriverWait` as the code.
+        """
+        self.counts['steps'] += 1
+        self.last_error = None
+        if deadline - time.monotonic() <= 0:
+            self._deadline_hit('scenario budget spent before the step started')
+        deadline_time = _DeadlineTime(deadline, self.counts)
+        overrides = {'time': deadline_time}
+        if 'WebDriverWait' in namespace:
+            overrides['WebDriverWait'] = _bounded_wait(namespace['WebDriverWait'], deadline)
+        namespace = {**namespace, **overrides}
+        for name in helpers:
+            namespace[name] = _rebind(namespace[name], overrides)
+        restore = _cap_driver_timeouts(driver, deadline - time.monotonic())
+
+        # Past the deadline (plus grace), DeadlineExceeded is raised in this
+        # thread every `grace_s` until the code gives up, in case it swallows one
+        lock = threading.Lock()
+        done = threading.Event()
+        thread_id = ctypes.c_ulong(threading.get_ident())
+
+        def hard_stop():
+            if done.wait(max(deadline - time.monotonic(), 0) + self.grace_s):
+                return
+            self.counts['hard_stops'] += 1
+            while True:
+                with lock:
+                    if done.is_set():
+                        return
+                    ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, ctypes.py_object(DeadlineExceeded))
+                if done.wait(self.grace_s):
+                    return
+
+        def disarm():
+            # the hard stop may land in here too; retry until the watchdog is off
+            while True:
+                try:
+                    with lock:
+                        done.set()
+                        ctypes.pythonapi.PyThreadState_SetAsyncExc(thread_id, None)  # drop a pending one
+                    restore()
+                    return
+                except DeadlineExceeded:
+                    continue
+
+        threading.Thread(target=hard_stop, daemon=True).start()
+        reason = None
+        try:
+            try:
+                exec(compiled, namespace)
+            finally:
+                disarm()
+        except DeadlineExceeded as e:
+            reason = str(e) or 'still running after the deadline'
+        if reason is None:
+            reason = deadline_time.cut  # a sleep was cut short but the code carried on
+        if reason is None and time.monotonic() > deadline:
+            reason = 'finished after the deadline'
+        if reason:
+            self._deadline_hit(reason)
+
+    def _deadline_hit(self, reason):
+        self.counts['deadline_hits'] += 1
+        self.last_error = 'deadline'
+        raise DeadlineExceeded(f'step deadline exceeded: {reason}')
+
+    def format(self):
+        c = self.counts
+        return (
+            f"Step watchdog: {c['steps']} steps, {c['deadline_hits']} deadline hits "
+            f"({c['hard_stops']} hard stops, {c['sleeps_cut']} sleeps cut short), "
+            f"{c['rejected']} rejected before running"
+        )
+
+
+def _cap_driver_timeouts(driver, seconds):
+    """Lower page-load and script timeouts to `seconds`; returns a function restoring them"""
+    try:
+        saved = driver.timeouts
+        page_load, script = saved.page_load, saved.script
+        driver.set_page_load_timeout(max(min(page_load, seconds), 1))
+        driver.set_script_timeout(max(min(script, seconds), 1))
+    except Exception:
+        return lambda: None
+
+    def restore():
+        try:
+            driver.set_page_load_timeout(page_load)
+            driver.set_script_timeout(script)
+        except Exception:
+            pass
+
+    return restore
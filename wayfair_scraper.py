@@ -11,7 +11,9 @@ import base64
 import requests
 import json
 import re
+import sys
 from dotenv import load_dotenv
+from selenium_watchdog import DeadlineExceeded, StepWatchdog
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,6 +23,18 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
     raise ValueError("OpenAI API key not found. Please make sure you have a .env file with OPENAI_API_KEY set.")
 
+# Optional step metrics for "CUA Lean/report.py"; set RUN_METRICS_DIR to enable (needs pyarrow)
+metrics = None
+if os.getenv('RUN_METRICS_DIR'):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CUA Lean'))
+    from run_metrics import RunMetricsStore
+    metrics = RunMetricsStore(os.getenv('RUN_METRICS_DIR'), source='wayfair_scraper')
+
+# Deadlines for generated code; SELENIUM_STEP_BUDGET_S / SELENIUM_SCENARIO_BUDGET_S override the defaults
+watchdog = StepWatchdog()
+# Helpers the generated code calls; they run under the step deadline too
+BOUNDED_HELPERS = ('try_multiple_selectors',)
+
 def clean_code(code):
     """Clean up the code returned by the LLM"""
     # Remove markdown code blocks if present
@@ -82,7 +96,7 @@ def try_multiple_selectors(driver, element_description):
                 EC.presence_of_element_located((By.XPATH, selector))
             )
             return element
-        except:
+        except Exception:
             continue
     return None
 
@@ -190,16 +204,33 @@ def execute_selenium_code(driver, code):
             'try_multiple_selectors': try_multiple_selectors
         }
         
-        # Execute the code with the provided context
-        exec(code, globals(), locals_dict)
+        # Execute the code with the provided context, under the step deadline
+        compiled = watchdog.check(code)
+        watchdog.run(compiled, {**globals(), **locals_dict}, driver, watchdog.step_deadline(), BOUNDED_HELPERS)
         time.sleep(1)  # Small delay after execution
         return True
+    except DeadlineExceeded as e:
+        print(f"Error executing Selenium code: {str(e)}")
+        return False
     except Exception as e:
         print(f"Error executing Selenium code: {str(e)}")
         if hasattr(e, 'msg'):
             print(f"Detailed error: {e.msg}")
         return False
 
+def record_step(kind, start, ok, url=None, error=None):
+    """Append one row (codegen or selenium_exec) to the metrics store, if enabled"""
+    if metrics:
+        metrics.write({
+            'ts': start,
+            'kind': kind,
+            'name': 'command',
+            'duration_ms': (time.time() - start) * 1000,
+            'ok': ok,
+            'error': error,
+            'url': url,
+        })
+
 def encode_image_to_base64(image_path):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode('utf-8')
@@ -312,15 +343,20 @@ try:
         
         if user_command.lower() == 'quit':
             break
+        watchdog.start_scenario()  # the scenario budget covers codegen and execution
             
         # Check for bot detection before executing command
         handle_bot_detection(driver)
             
         # Get Selenium code for the command with visual context
+        start = time.time()
         selenium_code = get_selenium_code(driver, user_command)
+        record_step('codegen', start, bool(selenium_code))
         if selenium_code:
             print("\nExecuting your command...")
+            start = time.time()
             success = execute_selenium_code(driver, selenium_code)
+            record_step('selenium_exec', start, success, driver.current_url, watchdog.last_error)
             
             if success:
                 print("Command executed successfully!")
@@ -339,6 +375,11 @@ except Exception as e:
     print(traceback.format_exc())
 
 finally:
+    if watchdog.counts['steps'] or watchdog.counts['rejected']:
+        print(watchdog.format())
+    if metrics:
+        metrics.close()
+
     # Close the browser
     if 'driver' in locals():
         print("\nClosing browser...")
@@ -11,11 +11,25 @@ import base64
 import requests
 import json
 import re
+import sys
 import logging
+from selenium_watchdog import DeadlineExceeded, StepWatchdog
+
+# Optional step metrics for "CUA Lean/report.py"; set RUN_METRICS_DIR to enable (needs pyarrow)
+metrics = None
+if os.getenv('RUN_METRICS_DIR'):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CUA Lean'))
+    from run_metrics import RunMetricsStore
+    metrics = RunMetricsStore(os.getenv('RUN_METRICS_DIR'), source='wayfair_scraper_paragraph_parsing')
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Deadlines for generated code; SELENIUM_STEP_BUDGET_S / SELENIUM_SCENARIO_BUDGET_S override the defaults
+watchdog = StepWatchdog()
+# Helpers the generated code calls; they run under the step deadline too
+BOUNDED_HELPERS = ('try_multiple_selectors',)
+
 # Get API key directly
 OPENAI_API_KEY = ""  # Replace with your actual API key
 
@@ -148,7 +162,7 @@ def close_popup_if_present(driver):
                 if overlay.is_displayed():
                     logging.info(f"Detected visible overlay/popup: {overlay_selector}")
                     break
-            except:
+            except Exception:
                 continue
 
         # Try each close button selector
@@ -166,7 +180,7 @@ def close_popup_if_present(driver):
                     try:
                         driver.execute_script("arguments[0].click();", close_button)
                         logging.info("Closed popup using JavaScript click")
-                    except:
+                    except Exception:
                         # Fall back to regular click
                         close_button.click()
                         logging.info("Closed popup using regular click")
@@ -179,7 +193,7 @@ def close_popup_if_present(driver):
                         if not close_button.is_displayed():
                             logging.info("Popup successfully closed")
                             return True
-                    except:
+                    except Exception:
                         return True
             except Exception as e:
                 continue
@@ -307,8 +321,10 @@ def execute_selenium_code(driver, code):
             'try_multiple_selectors': try_multiple_selectors
         }
         
-        # Execute the code
-        exec(code, globals(), locals_dict)
+        # Execute the code under the step deadline; a retry below gets what is left of it
+        compiled = watchdog.check(code)
+        deadline = watchdog.step_deadline()
+        watchdog.run(compiled, {**globals(), **locals_dict}, driver, deadline, BOUNDED_HELPERS)
         time.sleep(1)
         
         # Check for popups again after execution
@@ -318,6 +334,9 @@ def execute_selenium_code(driver, code):
         
         return True
         
+    except DeadlineExceeded as e:
+        logging.error(f"Error executing Selenium code: {str(e)}")
+        return False
     except Exception as e:
         logging.error(f"Error executing Selenium code: {str(e)}")
         if hasattr(e, 'msg'):
@@ -330,12 +349,25 @@ def execute_selenium_code(driver, code):
                 logging.info("Popup closed after error, retrying action...")
                 # Retry the action once
                 try:
-                    exec(code, globals(), locals_dict)
+                    watchdog.run(compiled, {**globals(), **locals_dict}, driver, deadline, BOUNDED_HELPERS)
                     return True
-                except:
+                except (Exception, DeadlineExceeded):
                     pass
         return False
 
+def record_step(kind, start, ok, url=None, error=None):
+    """Append one row (codegen or selenium_exec) to the metrics store, if enabled"""
+    if metrics:
+        metrics.write({
+            'ts': start,
+            'kind': kind,
+            'name': 'step',
+            'duration_ms': (time.time() - start) * 1000,
+            'ok': ok,
+            'error': error,
+            'url': url,
+        })
+
 def encode_image_to_base64(image_path):
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode('utf-8')
@@ -412,6 +444,7 @@ try:
         user_paragraph = input("> ").strip()
         if user_paragraph.lower() == 'quit':
             break
+        watchdog.start_scenario()  # the scenario budget covers planning and every step
         
         # Break the paragraph into extremely basic steps
         steps = get_basic_steps(user_paragraph)
@@ -425,9 +458,13 @@ try:
             # Check for bot detection before each step
             handle_bot_detection(driver)
             
+            start = time.time()
             step_code = get_selenium_code(driver, step)
+            record_step('codegen', start, bool(step_code))
             if step_code:
+                start = time.time()
                 success = execute_selenium_code(driver, step_code)
+                record_step('selenium_exec', start, success, driver.current_url, watchdog.last_error)
                 if success:
                     logging.info(f"Step {idx} executed successfully!")
                     time.sleep(2)
@@ -452,6 +489,10 @@ except Exception as e:
     logging.error("Full error trace:")
     logging.error(traceback.format_exc())
 finally:
+    if watchdog.counts['steps'] or watchdog.counts['rejected']:
+        logging.info(watchdog.format())
+    if metrics:
+        metrics.close()
     if 'driver' in locals():
         logging.info("Closing browser...")
         driver.quit()